@@ -0,0 +1,206 @@
+# backend/app/api/v1/routers/inventory_router.py
+"""Typed REST endpoints for a user's kitchen inventory.
+
+UI actions (add, remove, list) call the same `inventory_tools` functions InventoryAgent
+uses, so results are identical to a chat turn, without the model round trips. Handlers
+are plain `def`: with a SQLite database or a journal, a call waits on disk (a
+transaction, an fsync), so FastAPI runs them in its threadpool, off the event loop.
+The inventory backends lock per user, so concurrent handlers are safe.
+
+    GET    /v1/inventory/{user_id}/items              list (or ?item_name= for one item), with an ETag
+    POST   /v1/inventory/{user_id}/items              add a quantity
+    PATCH  /v1/inventory/{user_id}/items              adjust a quantity by a signed delta
+    DELETE /v1/inventory/{user_id}/items?item_name=&unit=[&quantity=]
+                                                      remove a quantity, or the whole item
+    POST   /v1/inventory/{user_id}/items/bulk         several adds/removes in one pass, per-item results
+    GET    /v1/inventory/{user_id}/expiring?within_days=
+                                                      dated items expiring soon, soonest first
+    GET    /v1/inventory/{user_id}/changes?since=     journaled changes after a seq (INVENTORY_JOURNAL_DIR only)
+
+The ETag is the inventory's version (see `inventory_store`). PATCH and DELETE accept it in
+If-Match and then apply only if nothing changed since that GET, or return 412. A client
+acting on a list it showed the user, say two phones in one household, can't apply a
+decision made on a stale view. Removing a whole item without If-Match reads its quantity
+and removes exactly that, retrying (compare-and-swap) if the item changes in between.
+"""
+
+from datetime import date
+from itertools import groupby
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+
+from backend.app.models.inventory_types import (
+    ExpiringItem,
+    InventoryBulkInput,
+    InventoryBulkResult,
+    InventoryChange,
+    InventoryChangesResponse,
+    InventoryExpiringResponse,
+    InventoryItem,
+    InventoryItemInput,
+    InventoryItemPatch,
+    InventoryListResponse,
+    InventoryMutationResult,
+)
+from backend.app.tools import inventory_tools
+from backend.app.tools.inventory_store import VersionConflict, retry_on_conflict
+
+router = APIRouter(prefix="/v1/inventory", tags=["inventory"])
+
+
+def _find_item(user_id: str, item_name: str, unit: str) -> Optional[InventoryItem]:
+    item = inventory_tools.inventory_store.get(user_id, item_name, unit)
+    return InventoryItem(**item) if item is not None else None
+
+
+def _result(user_id: str, tool_result: Dict[str, Any], item_name: str, unit: str) -> InventoryMutationResult:
+    item = _find_item(user_id, item_name, unit) if tool_result["status"] == "success" else None
+    return InventoryMutationResult(status=tool_result["status"], message=tool_result["message"], item=item)
+
+
+def _raise_for_error(result: InventoryMutationResult) -> None:
+    """Maps a failed removal to 404 (no such item) or 409 (not enough of it)."""
+    if result.status == "success":
+        return
+    missing = "not found" in result.message.lower()
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND if missing else status.HTTP_409_CONFLICT, detail=result.message)
+
+
+def _expected_version(if_match: Optional[str]) -> Optional[int]:
+    """The version in an If-Match header (an ETag from GET), or None to apply unconditionally."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match must be an ETag returned by GET /v1/inventory/{user_id}/items.")
+
+
+def _precondition_failed(error: VersionConflict) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=f"{error} Fetch the inventory again and retry.")
+
+
+def _add(user_id: str, item_name: str, quantity: float, unit: str, expected_version: Optional[int] = None,
+         expires_on: Optional[date] = None) -> InventoryMutationResult:
+    expires_on = expires_on.isoformat() if expires_on is not None else None
+    if expected_version is None:
+        return _result(user_id, inventory_tools.add_item_to_inventory(user_id, item_name, quantity, unit, expires_on), item_name, unit)
+    item, created = inventory_tools.inventory_store.add(user_id, item_name, quantity, unit, expected_version=expected_version,
+                                                        expires_on=expires_on)
+    return _result(user_id, inventory_tools.addition_result(user_id, item_name, quantity, unit, item, created), item_name, unit)
+
+
+def _remove(user_id: str, item_name: str, quantity: float, unit: str, expected_version: Optional[int] = None) -> InventoryMutationResult:
+    if expected_version is None:
+        return _result(user_id, inventory_tools.remove_item_from_inventory(user_id, item_name, quantity, unit), item_name, unit)
+    outcome, item = inventory_tools.inventory_store.remove(user_id, item_name, quantity, unit, expected_version=expected_version)
+    return _result(user_id, inventory_tools.removal_result(user_id, item_name, quantity, unit, outcome, item), item_name, unit)
+
+
+@router.get("/{user_id}/items", response_model=InventoryListResponse)
+def list_items(response: Response, user_id: str,
+                     item_name: Optional[str] = Query(None, description="Return only this item (any unit).")):
+    if item_name is None:
+        version, items = inventory_tools.inventory_store.snapshot(user_id)
+    else:
+        version = inventory_tools.inventory_store.version(user_id) # Read first: a change after it makes If-Match fail, never pass
+        result = inventory_tools.check_item_in_inventory(user_id, item_name)
+        if result["status"] != "found":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=result["message"])
+        items = [result["item"]]
+    response.headers["ETag"] = f'"{version}"'
+    return InventoryListResponse(user_id=user_id, items=[InventoryItem(**item) for item in items], version=version)
+
+
+@router.post("/{user_id}/items", response_model=InventoryMutationResult, status_code=status.HTTP_201_CREATED)
+def add_item(user_id: str, body: InventoryItemInput):
+    return _add(user_id, body.item_name, body.quantity, body.unit, expires_on=body.expires_on)
+
+
+@router.patch("/{user_id}/items", response_model=InventoryMutationResult)
+def adjust_item(user_id: str, body: InventoryItemPatch, if_match: Optional[str] = Header(None, alias="If-Match")):
+    if body.quantity_delta == 0:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="quantity_delta must not be zero.")
+    expected_version = _expected_version(if_match)
+    try:
+        if body.quantity_delta > 0:
+            return _add(user_id, body.item_name, body.quantity_delta, body.unit, expected_version)
+        result = _remove(user_id, body.item_name, -body.quantity_delta, body.unit, expected_version)
+    except VersionConflict as e:
+        raise _precondition_failed(e)
+    _raise_for_error(result)
+    return result
+
+
+@router.delete("/{user_id}/items", response_model=InventoryMutationResult)
+def remove_item(
+    user_id: str,
+    item_name: str = Query(..., min_length=1),
+    unit: str = Query(..., min_length=1),
+    quantity: Optional[float] = Query(None, gt=0, description="Amount to remove; the whole item if omitted."),
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+):
+    expected_version = _expected_version(if_match)
+
+    def remove_all(version: int) -> InventoryMutationResult:
+        """Removes the quantity read at `version`; a change in between raises VersionConflict."""
+        existing = _find_item(user_id, item_name, unit)
+        if existing is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Item {item_name} ({unit}) not found in inventory.")
+        return _remove(user_id, item_name, existing.quantity, unit, expected_version=version)
+
+    try:
+        if quantity is not None:
+            result = _remove(user_id, item_name, quantity, unit, expected_version)
+        elif expected_version is not None:
+            result = remove_all(expected_version)
+        else:
+            result = retry_on_conflict(inventory_tools.inventory_store, user_id, remove_all)
+    except VersionConflict as e:
+        raise _precondition_failed(e)
+    _raise_for_error(result)
+    return result
+
+
+@router.post("/{user_id}/items/bulk", response_model=InventoryBulkResult)
+def bulk_update(user_id: str, body: InventoryBulkInput):
+    """Applies the operations in order. A failed operation is reported and the rest still run.
+
+    Each run of consecutive adds (or removes) is one `add_items_bulk` (`remove_items_bulk`)
+    call, applied atomically. Operations on the same item within a run are merged and share
+    its result.
+    """
+    results: List[InventoryMutationResult] = []
+    for op, run in groupby(body.operations, key=lambda operation: operation.op):
+        run = list(run)
+        bulk_tool = inventory_tools.add_items_bulk if op == "add" else inventory_tools.remove_items_bulk
+        outcome = bulk_tool(user_id, [{"item_name": operation.item_name, "quantity": operation.quantity, "unit": operation.unit,
+                                       "expires_on": operation.expires_on.isoformat() if operation.expires_on else None}
+                                      for operation in run])
+        by_position = {position: result for result in outcome["results"] for position in result["entries"]}
+        results.extend(_result(user_id, by_position[position], operation.item_name, operation.unit)
+                       for position, operation in enumerate(run))
+    failed = sum(1 for result in results if result.status != "success")
+    return InventoryBulkResult(results=results, succeeded=len(results) - failed, failed=failed)
+
+
+@router.get("/{user_id}/expiring", response_model=InventoryExpiringResponse)
+def list_expiring(user_id: str, within_days: int = Query(3, ge=0, le=365, description="Days ahead to look; 0 is today only.")):
+    """The fridge view's "use it up" list: items past or near their best-before date."""
+    result = inventory_tools.get_expiring_items(user_id, within_days)
+    return InventoryExpiringResponse(user_id=user_id, within_days=within_days, items=[ExpiringItem(**item) for item in result["items"]])
+
+
+@router.get("/{user_id}/changes", response_model=InventoryChangesResponse)
+def list_changes(user_id: str,
+                       since: int = Query(0, ge=0, description="Return changes after this seq."),
+                       limit: int = Query(1000, ge=1, le=10000)):
+    """What changed since a client last synced, from the inventory journal."""
+    journal = inventory_tools.inventory_journal
+    if journal is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The inventory journal is not enabled (INVENTORY_JOURNAL_DIR).")
+    changes = journal.changes_since(user_id, since, limit)
+    latest_seq = changes[-1]["seq"] if changes else max(since, journal.seq(user_id))
+    return InventoryChangesResponse(user_id=user_id, since=since, latest_seq=latest_seq,
+                                    changes=[InventoryChange(**change) for change in changes])
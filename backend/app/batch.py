@@ -0,0 +1,43 @@
+# backend/app/batch.py
+"""Bounded-concurrency execution for batched agent turns."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchOutcome:
+    """Result of one batch item: either `result` or `error` is set."""
+    result: Any = None
+    error: Optional[str] = None
+
+
+async def run_bounded(
+    jobs: List[Callable[[], Awaitable[Any]]],
+    max_concurrency: int,
+    timeout_seconds: float,
+) -> List[BatchOutcome]:
+    """Runs coroutine factories with at most `max_concurrency` in flight.
+
+    Each job gets its own timeout, measured from when it acquires a slot (queueing time
+    does not count). A failing or timed-out job never affects the others. Outcomes are
+    returned in the same order as `jobs`.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(index: int, job: Callable[[], Awaitable[Any]]) -> BatchOutcome:
+        async with semaphore:
+            try:
+                return BatchOutcome(result=await asyncio.wait_for(job(), timeout=timeout_seconds))
+            except asyncio.TimeoutError:
+                logger.warning(f"Batch item {index} timed out after {timeout_seconds}s")
+                return BatchOutcome(error=f"Timed out after {timeout_seconds} seconds.")
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}", exc_info=True)
+                return BatchOutcome(error=f"An unexpected error occurred: {str(e)}")
+
+    return list(await asyncio.gather(*(run_one(index, job) for index, job in enumerate(jobs))))
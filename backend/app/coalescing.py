@@ -0,0 +1,92 @@
+# backend/app/coalescing.py
+"""Single-flight coalescing and per-session serialization of chat turns.
+
+Flaky clients retry `/chat/` while the first attempt is still running. Identical
+concurrent requests (same session and query) share one agent execution and all
+receive its result. Different queries on the same session wait for each other,
+so their session state writes never interleave. Unrelated sessions are unaffected.
+
+A shared execution keeps running while any caller still waits for it. When the last
+waiting caller is cancelled (a client disconnect, or a batch item's timeout), the
+execution is cancelled too, and that caller returns only once it has stopped. So a
+timed-out turn gives up its session lock and its batch slot together.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRequestCoalescer:
+    """Deduplicates in-flight turns by (session_id, query) and serializes turns per session."""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Any]"] = {}
+        self._waiters: Dict["asyncio.Task[Any]", int] = {} # Callers awaiting each in-flight execution
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_waiters: Dict[str, int] = {} # Reference counts so idle session locks can be dropped
+        self.executions = 0
+        self.coalesced = 0
+
+    @asynccontextmanager
+    async def session_lock(self, session_id: str) -> AsyncIterator[None]:
+        """Holds the session's lock; locks are created on demand and dropped when unused."""
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        self._session_waiters[session_id] = self._session_waiters.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._session_waiters[session_id] -= 1
+            if self._session_waiters[session_id] == 0:
+                del self._session_waiters[session_id]
+                del self._session_locks[session_id]
+
+    async def run(self, session_id: str, query: str, turn: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs `turn()` once for concurrent identical requests and returns its result to all of them."""
+        key = (session_id, query.strip())
+        task = self._inflight.get(key)
+        if task is None:
+            # A separate task, so a disconnecting first caller does not cancel an execution others still wait for.
+            task = asyncio.ensure_future(self._execute(session_id, turn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced duplicate in-flight request for session '{session_id}'.")
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                logger.info(f"Cancelling the turn for session '{session_id}': no caller is waiting for it.")
+                task.cancel()
+                with suppress(asyncio.CancelledError, Exception):
+                    await task # Let it release the session lock before this caller's slot is reused
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    async def _execute(self, session_id: str, turn: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.session_lock(session_id):
+            self.executions += 1
+            return await turn()
+
+    def _forget(self, key: Tuple[str, str], finished: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is finished:
+            del self._inflight[key]
+        if not finished.cancelled():
+            finished.exception() # Mark the exception as retrieved even if every caller went away
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "active_sessions": len(self._session_locks),
+        }
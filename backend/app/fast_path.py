@@ -0,0 +1,237 @@
+# backend/app/fast_path.py
+"""Local fast path for simple inventory commands in `/chat/`.
+
+"add 2 kg flour", "do I have milk?" or "list my inventory" normally take at least two
+model round trips. ButlerAgent transfers to InventoryAgent, which then picks a tool.
+`parse_intent` recognizes such commands with strict patterns, and the router calls
+`inventory_tools` directly and answers from a template. Anything else returns None
+and goes to the agent tree unchanged. That includes extra words ("add 2 kg flour please",
+"add 3 tomatoes for tonight"), several items, units it does not know and shopping lists.
+A false negative costs the usual model calls; a false positive would apply the wrong
+mutation, so the patterns err on the side of None.
+
+The inventory belongs to the user in the session's UserProfile, the same user_id the
+InventoryAgent passes to the tools. A session without a profile yet (its first turn) is
+left to the agents, which create it.
+
+The command and its reply are appended to the session's events, as a Runner turn would,
+so the next model turn sees the exchange ("and how much of it?"). No agent runs, so agent
+and model callbacks (state initialization, caches, tracing spans) do not run on this path.
+"""
+
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.genai import types as genai_types
+
+from backend.app.shared_libraries import constants
+from backend.app.tools import inventory_tools
+
+logger = logging.getLogger(__name__)
+
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "a dozen": 12, "half a": 0.5}
+
+# Spoken unit -> unit stored in the inventory (the spelling the default inventory and the agents use)
+UNIT_ALIASES = {
+    "g": "grams", "gram": "grams", "grams": "grams", "gr": "grams",
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "liter", "liter": "liter", "liters": "liter", "litre": "liter", "litres": "liter",
+    "piece": "pieces", "pieces": "pieces", "pcs": "pieces",
+    "cup": "cups", "cups": "cups", "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "oz": "oz", "ounce": "oz", "ounces": "oz", "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "can": "cans", "cans": "cans", "bottle": "bottles", "bottles": "bottles",
+    "loaf": "loaf", "loaves": "loaf", "head": "head", "heads": "head",
+}
+DEFAULT_UNIT = "pieces" # "add 6 eggs"
+
+_PLACE = r"(?:(?:to|in|into|from|out of)\s+(?:my\s+|the\s+)?(?:inventory|pantry|fridge|kitchen))"
+_ITEM = r"(?P<item>[a-z][a-z'\- ]{0,40}?)"
+_QUANTITY = r"(?P<quantity>\d+(?:\.\d+)?|" + "|".join(sorted((re.escape(word) for word in NUMBER_WORDS), key=len, reverse=True)) + r")"
+_UNIT = r"(?:(?P<unit>[a-z]+)\.?\s+(?:of\s+)?)?"
+_END = r"\s*[.!?]*\s*$"
+
+_ADD_RE = re.compile(rf"^(?:please\s+)?(?:add|put|bought|i bought)\s+{_QUANTITY}\s*{_UNIT}{_ITEM}(?:\s+{_PLACE})?{_END}")
+_REMOVE_RE = re.compile(rf"^(?:please\s+)?(?:remove|take out|i used|used|use up|i ate)\s+{_QUANTITY}\s*{_UNIT}{_ITEM}(?:\s+{_PLACE})?{_END}")
+_CHECK_RE = re.compile(rf"^(?:do i (?:still )?have|have i got|is there|are there)\s+(?:any\s+)?{_ITEM}(?:\s+(?:left|{_PLACE}|in stock))?{_END}")
+_LIST_RE = re.compile(
+    rf"^(?:(?:please\s+)?(?:list|show)(?:\s+me)?\s+(?:my|the)\s+(?:inventory|pantry)|what(?:'s| is) in (?:my|the) (?:inventory|pantry|fridge)){_END}")
+
+# Words that mean the request is more than a single inventory operation
+_AMBIGUOUS_WORDS = frozenset({"and", "or", "recipe", "recipes", "shopping", "list", "cook", "make", "if", "then", "not", "some", "more", "all", "every"})
+# Filler, time words and prepositions: "flour please", "tomatoes for tonight", "milk for the cake" are not item names
+_FILLER_WORDS = frozenset({
+    "please", "thanks", "thank", "for", "to", "from", "with", "without", "at", "on", "in", "into", "by", "of", "off",
+    "yesterday", "today", "tonight", "tomorrow", "now", "later", "just", "again", "also", "too", "this", "that",
+    "because", "so", "about", "after", "before", "the", "my", "me",
+})
+
+
+@dataclass(frozen=True)
+class Intent:
+    action: str # "add", "remove", "check" or "list"
+    item_name: Optional[str] = None
+    quantity: Optional[Union[int, float]] = None
+    unit: Optional[str] = None
+
+
+def _quantity(text: str) -> Optional[Union[int, float]]:
+    value = NUMBER_WORDS.get(text)
+    if value is None:
+        value = float(text)
+    if value <= 0:
+        return None
+    return int(value) if float(value).is_integer() else value
+
+
+def _item_name(text: str) -> Optional[str]:
+    item_name = " ".join(text.split())
+    words = item_name.split(" ")
+    if not item_name or len(words) > 4 or _AMBIGUOUS_WORDS.intersection(words) or _FILLER_WORDS.intersection(words):
+        return None
+    return item_name
+
+
+def parse_intent(query: str) -> Optional[Intent]:
+    """Returns the inventory command in `query`, or None unless it is unambiguous."""
+    text = " ".join(query.lower().split())
+    if len(text) > 120:
+        return None
+    if _LIST_RE.match(text):
+        return Intent("list")
+
+    match = _CHECK_RE.match(text)
+    if match:
+        item_name = _item_name(match.group("item"))
+        return Intent("check", item_name) if item_name else None
+
+    for action, pattern in (("add", _ADD_RE), ("remove", _REMOVE_RE)):
+        match = pattern.match(text)
+        if not match:
+            continue
+        quantity = _quantity(match.group("quantity"))
+        unit_word = match.group("unit")
+        item_text = match.group("item")
+        if unit_word is not None and unit_word not in UNIT_ALIASES:
+            # "add 2 red peppers": the first word belongs to the item unless "of" followed it
+            if re.search(rf"\b{re.escape(unit_word)}\.?\s+of\s", text):
+                return None # "2 bags of rice": a unit we don't know
+            item_text = f"{unit_word} {item_text}"
+            unit_word = None
+        item_name = _item_name(item_text)
+        if quantity is None or item_name is None:
+            return None
+        return Intent(action, item_name, quantity, UNIT_ALIASES[unit_word] if unit_word else DEFAULT_UNIT)
+    return None
+
+
+def _format_quantity(quantity: Union[int, float]) -> str:
+    return str(int(quantity)) if float(quantity).is_integer() else f"{quantity:g}"
+
+
+ROOT_AGENT_NAME = "ButlerAgent" # Author of the replies in the session, as if the root agent had answered
+
+
+class FastPathRouter:
+    """Answers recognized inventory commands without the agent tree."""
+
+    def __init__(self, session_service: BaseSessionService, app_name: str):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.served: Dict[str, int] = {"add": 0, "remove": 0, "check": 0, "list": 0}
+        self.fallbacks = 0
+        self.unknown_user = 0 # Recognized commands left to the agents because the session has no profile yet
+
+    @staticmethod
+    def _inventory_owner(session: Optional[Session]) -> Optional[str]:
+        """The user_id in the session's UserProfile, or None if the session or profile does not exist."""
+        profile: Any = session.state.get(constants.USER_PROFILE_KEY) if session else None
+        if isinstance(profile, dict):
+            return profile.get("user_id")
+        return getattr(profile, "user_id", None)
+
+    async def handle(self, query: str, session_id: str, user_id: str) -> Optional[str]:
+        """Runs the command and returns the reply, or None if the agent tree must answer."""
+        intent = parse_intent(query)
+        if intent is None:
+            self.fallbacks += 1
+            return None
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        owner = self._inventory_owner(session)
+        if owner is None:
+            self.fallbacks += 1
+            self.unknown_user += 1
+            return None
+        self.served[intent.action] += 1
+        logger.info("Fast path '%s' for user '%s': %s", intent.action, owner, query)
+
+        reply = self._run(intent, owner)
+        invocation_id = f"e-{uuid.uuid4()}"
+        for author, role, text in (("user", "user", query), (ROOT_AGENT_NAME, "model", reply)):
+            content = genai_types.Content(role=role, parts=[genai_types.Part(text=text)])
+            await self.session_service.append_event(session, Event(invocation_id=invocation_id, author=author, content=content))
+        return reply
+
+    def _run(self, intent: Intent, owner: str) -> str:
+        if intent.action == "add":
+            return inventory_tools.add_item_to_inventory(owner, intent.item_name, intent.quantity, intent.unit)["message"]
+        if intent.action == "remove":
+            return inventory_tools.remove_item_from_inventory(owner, intent.item_name, intent.quantity, intent.unit)["message"]
+        if intent.action == "check":
+            result = inventory_tools.check_item_in_inventory(owner, intent.item_name)
+            if result["status"] != "found":
+                return f"You don't have any {intent.item_name} in your inventory."
+            item = result["item"]
+            return f"Yes, you have {_format_quantity(item['quantity'])} {item['unit']} of {item['item_name']}."
+
+        result = inventory_tools.list_inventory_items(owner)
+        if not result["inventory"]:
+            return result["message"]
+        lines = [f"- {item['item_name']}: {_format_quantity(item['quantity'])} {item['unit']}" for item in result["inventory"]]
+        return "Here's what's in your inventory:\n" + "\n".join(lines)
+
+    def stats(self) -> Dict[str, object]:
+        return {"served": dict(self.served), "fallbacks": self.fallbacks, "unknown_user": self.unknown_user}
+
+
+if __name__ == "__main__":
+    # Self-check of the parser: every command is either recognized exactly or left to the agents.
+    cases = {
+        "add 2 kg flour": Intent("add", "flour", 2, "kg"),
+        "Add 2 kilograms of flour to my pantry.": Intent("add", "flour", 2, "kg"),
+        "add 6 eggs": Intent("add", "eggs", 6, "pieces"),
+        "add a dozen eggs": Intent("add", "eggs", 12, "pieces"),
+        "add 2 red peppers": Intent("add", "red peppers", 2, "pieces"),
+        "put 0.5 l of milk in the fridge": Intent("add", "milk", 0.5, "liter"),
+        "remove 100 g sugar": Intent("remove", "sugar", 100, "grams"),
+        "I used 2 eggs": Intent("remove", "eggs", 2, "pieces"),
+        "do I have milk?": Intent("check", "milk"),
+        "Do I have any olive oil left?": Intent("check", "olive oil"),
+        "list my inventory": Intent("list"),
+        "What's in my fridge?": Intent("list"),
+        "add 2 bags of rice": None,
+        "add flour": None,
+        "add 2 kg flour and 1 kg sugar": None,
+        "add milk to my shopping list": None,
+        "add 2 eggs to my shopping list": None,
+        "do I have what I need for a recipe?": None,
+        "remove 0 eggs": None,
+        "add 2 kg flour please": None,
+        "add 3 tomatoes for tonight": None,
+        "I ate 2 apples yesterday": None,
+        "do I have milk for the cake": None,
+        "thanks, add 2 eggs": None,
+        "add 2 eggs to the cake": None,
+        "suggest a recipe for dinner with eggs": None,
+    }
+    failures = [(query, expected, parse_intent(query)) for query, expected in cases.items() if parse_intent(query) != expected]
+    for query, expected, got in failures:
+        print(f"FAIL {query!r}: expected {expected}, got {got}")
+    print(f"{len(cases) - len(failures)}/{len(cases)} parser cases passed")
@@ -0,0 +1,110 @@
+# backend/app/idempotency.py
+"""Idempotency-Key replay protection for chat turns.
+
+A retried request that arrives after the first one finished must not run the agent
+again: tools like `add_item_to_inventory` and `save_recipe_wrapper` would apply their
+mutation twice. The first successful response for a key is stored for a window and
+returned verbatim to any repeat of that key. A repeat that arrives while the first
+request is still running waits for it instead of starting a second run.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyConflict(Exception):
+    """The key was already used with a different request body."""
+
+
+def request_fingerprint(*parts: Optional[str]) -> str:
+    """Hashes the identifying parts of a request so a reused key with a different body can be rejected."""
+    return hashlib.sha256("\x1f".join(part or "" for part in parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Bounded LRU of completed responses per Idempotency-Key, with expiry."""
+
+    def __init__(self, max_keys: int = 10000, ttl_seconds: float = 24 * 60 * 60):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._completed: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict() # key -> (expires_at, fingerprint, response)
+        self._inflight: Dict[str, Tuple[str, "asyncio.Task[Any]"]] = {}
+        self.stats_counters: Dict[str, int] = {"executions": 0, "replays": 0, "inflight_joins": 0, "conflicts": 0, "evictions": 0, "expired": 0}
+
+    def _lookup_completed(self, key: str) -> Optional[Tuple[str, Any]]:
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        expires_at, fingerprint, response = entry
+        if expires_at <= time.time():
+            del self._completed[key]
+            self.stats_counters["expired"] += 1
+            return None
+        self._completed.move_to_end(key)
+        return fingerprint, response
+
+    def _store(self, key: str, fingerprint: str, response: Any) -> None:
+        self._completed[key] = (time.time() + self.ttl_seconds, fingerprint, response)
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_keys:
+            self._completed.popitem(last=False)
+            self.stats_counters["evictions"] += 1
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        turn: Callable[[], Awaitable[Any]],
+        should_store: Callable[[Any], bool] = lambda response: True,
+    ) -> Tuple[Any, bool]:
+        """Returns `(response, replayed)`. Runs `turn()` only if the key has no stored or in-flight result.
+
+        Failures (exceptions, or responses rejected by `should_store`) are not stored,
+        so the client can retry them with the same key.
+        """
+        completed = self._lookup_completed(key)
+        if completed is not None:
+            if completed[0] != fingerprint:
+                self.stats_counters["conflicts"] += 1
+                raise IdempotencyKeyConflict(key)
+            self.stats_counters["replays"] += 1
+            logger.info(f"Replaying stored response for Idempotency-Key '{key}'.")
+            return completed[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            if inflight[0] != fingerprint:
+                self.stats_counters["conflicts"] += 1
+                raise IdempotencyKeyConflict(key)
+            self.stats_counters["inflight_joins"] += 1
+            return await asyncio.shield(inflight[1]), True
+
+        task = asyncio.ensure_future(turn())
+        self._inflight[key] = (fingerprint, task)
+        self.stats_counters["executions"] += 1
+
+        def on_done(finished: "asyncio.Task[Any]") -> None:
+            # Runs even if the first caller disconnected, so its result still protects later retries.
+            if self._inflight.get(key, (None, None))[1] is finished:
+                del self._inflight[key]
+            if finished.cancelled() or finished.exception() is not None:
+                return
+            if should_store(finished.result()):
+                self._store(key, fingerprint, finished.result())
+
+        task.add_done_callback(on_done)
+        return await asyncio.shield(task), False
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters; `llm_runs_saved` is the number of requests answered without running the agent."""
+        return {
+            **self.stats_counters,
+            "llm_runs_saved": self.stats_counters["replays"] + self.stats_counters["inflight_joins"],
+            "stored_keys": len(self._completed),
+        }
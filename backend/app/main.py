@@ -1,15 +1,33 @@
+import asyncio
 import logging
 import os
+import time
 import uuid # For generating session IDs
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 
+from backend.app.shared_libraries import metrics, startup_timing
 from backend.app.config import settings
-from backend.app.agents import butler_agent as butler_agent_module  # Import module
+with startup_timing.timed("import"):
+    from backend.app.agents import butler_agent as butler_agent_module  # Import module (sub-agents are built lazily)
+from backend.app.agents.agent_registry import agent_registry
 from backend.app.shared_libraries.types import Recipe as RecipeOutputSchema, UserProfile as UserProfileSchema  # Fix import
+from backend.app.streaming import DEFAULT_USER_ID, ChatStreamer
+from backend.app.api.v1.routers import inventory_router
+from backend.app.batch import run_bounded
+from backend.app.coalescing import SessionRequestCoalescer
+from backend.app.fast_path import FastPathRouter
+from backend.app.idempotency import IdempotencyKeyConflict, IdempotencyStore, request_fingerprint
+from backend.app.shared_libraries.cassette import cassette
+from backend.app.shared_libraries.log_pipeline import Payload, configure_logging
+from backend.app.shared_libraries.response_cache import response_cache
+from backend.app.shared_libraries.session_store import session_state_store
+from backend.app.shared_libraries.tracing import tracer
+from backend.app.shared_libraries.persistent_session_service import PersistentSessionService
 
 # Construct the path to the .env file in the 'backend' directory relative to this main.py file
 # __file__ is backend/app/main.py -> dirname is backend/app -> dirname is backend -> join with .env
@@ -18,7 +36,12 @@ print(f"[DEBUG] Attempting to load .env file from: {dotenv_path}") # Debug print
 load_dotenv(dotenv_path=dotenv_path, override=True) # Load environment variables from specific .env file, override if already set by other means
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=settings.LOG_LEVEL.upper())
+configure_logging(
+    settings.LOG_LEVEL,
+    async_output=settings.LOG_ASYNC,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    sample_rates=settings.LOG_SAMPLE_RATES
+)
 
 app = FastAPI(
     title="Local Butler AI Backend",
@@ -45,6 +68,61 @@ app.add_middleware(
 )
 
 
+# Runner for /chat/ (one JSON response) and /chat/stream (server-sent events), sharing one session service.
+# With SESSION_STORE_PATH set, session state is persisted and survives restarts.
+chat_streamer = ChatStreamer(
+    butler_agent_module.butler_agent,
+    session_service=PersistentSessionService(session_state_store) if session_state_store else None
+)
+
+# Shares one execution between identical in-flight requests and serializes turns per session
+chat_coalescer = SessionRequestCoalescer()
+
+# Answers simple inventory commands without a model call; everything else goes to the agent tree
+fast_path_router = FastPathRouter(chat_streamer.session_service, chat_streamer.app_name)
+
+# Stored /chat/ responses per Idempotency-Key, so late retries don't re-run mutating tools
+idempotency_store = IdempotencyStore(
+    max_keys=settings.IDEMPOTENCY_MAX_KEYS,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS
+)
+
+def _count_sessions() -> int:
+    # InMemorySessionService keeps sessions as {app_name: {user_id: {session_id: Session}}}
+    sessions = getattr(chat_streamer.session_service, "sessions", {})
+    return sum(len(by_session) for by_user in sessions.values() for by_session in by_user.values())
+
+metrics.registry.callback_gauge("local_butler_sessions", "Sessions held by the session service.", _count_sessions)
+metrics.registry.callback_gauge(
+    "local_butler_active_sessions", "Sessions with a chat turn in progress.", lambda: chat_coalescer.stats()["active_sessions"]
+)
+
+def _observe_http_request(request: Request, status_code: int, started: float) -> None:
+    route = getattr(request.scope.get("route"), "path", "unmatched") # Route template keeps label cardinality bounded
+    metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method, str(status_code))
+    metrics.HTTP_IN_FLIGHT.dec()
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Records latency (until the last body chunk, so streamed turns are timed in full) and in-flight requests."""
+    started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_http_request(request, 500, started)
+        raise
+
+    body_iterator = response.body_iterator
+    async def observed_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            _observe_http_request(request, response.status_code, started)
+    response.body_iterator = observed_body()
+    return response
+
 # --- Pydantic Models for Request and Response ---
 class UserQueryInput(BaseModel):
     query: str
@@ -57,10 +135,25 @@ class AgentResponseOutput(BaseModel):
     structured_output: Optional[Dict[str, Any]] = None # To hold RecipeOutputSchema, etc.
     error_message: Optional[str] = None
 
+class BatchChatInput(BaseModel):
+    items: List[UserQueryInput]
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Capped by CHAT_BATCH_MAX_CONCURRENCY.")
+    item_timeout_seconds: Optional[float] = Field(None, gt=0, description="Defaults to CHAT_BATCH_ITEM_TIMEOUT_SECONDS.")
+
+class BatchChatItemResult(BaseModel):
+    index: int
+    session_id: str
+    response: Optional[AgentResponseOutput] = None
+    error_message: Optional[str] = None
+
+class BatchChatOutput(BaseModel):
+    results: List[BatchChatItemResult] # Same order as the request items
+    succeeded: int
+    failed: int
+
 # --- API Key Check Function (remains the same) ---
 def get_api_key():
     api_key = os.getenv("LOCAL_BUTLER_API_KEY")
-    print(f"[DEBUG] LOCAL_BUTLER_API_KEY from os.getenv: '{api_key}'") # Temporary debug print
     if not api_key or api_key == "YOUR_GEMINI_API_KEY_HERE":
         logger.error("LOCAL_BUTLER_API_KEY is not set or is using the default placeholder.")
         raise HTTPException(
@@ -69,6 +162,9 @@ def get_api_key():
         )
     return api_key
 
+# Inventory CRUD for UI actions; calls the inventory tools directly, no agent involved
+app.include_router(inventory_router.router, dependencies=[Depends(get_api_key)])
+
 # --- FastAPI Event Handlers (remains the same) ---
 @app.on_event("startup")
 async def startup_event():
@@ -113,53 +209,116 @@ async def startup_event():
         logger.error(f"Startup check failed: {e.detail}")
         # Depending on policy, you might want the app to not start or just log the error
 
+    if settings.AGENT_PRELOAD:
+        await asyncio.to_thread(agent_registry.preload)
+    logger.info(f"Startup time breakdown: {agent_registry.startup_breakdown()}")
+
 # --- API Endpoints (New - using ButlerAgent) ---
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if session_state_store:
+        session_state_store.close() # Flush queued session state before the instance goes away
+        logger.info("Session state store flushed and closed.")
+
 @app.get("/", status_code=200)
 async def read_root():
     """Provides a simple health check / welcome message for the root endpoint."""
     logger.info("Root endpoint '/' was accessed.")
     return {"message": "Welcome to the Local Butler AI Backend!", "status": "ok"}
 
+async def run_butler_turn(query: str, session_id: str) -> AgentResponseOutput:
+    """Runs one ButlerAgent turn and maps it to an AgentResponseOutput. Unexpected errors propagate."""
+    fast_answer = await fast_path_router.handle(query, session_id, DEFAULT_USER_ID) if settings.FAST_PATH_ENABLED else None
+    if fast_answer is not None:
+        metrics.CHAT_TURNS.inc("fast_path", "false")
+        return AgentResponseOutput(session_id=session_id, text_response=fast_answer)
+
+    # Run the ButlerAgent through the shared runner, so the turn reads and writes the (persistent) session
+    agent_turn = await chat_streamer.run_turn(query, session_id)
+    structured_data = agent_turn.get("structured_output")
+
+    if structured_data:
+        # The structured output from the agent (e.g., RecipeAgent) will be here
+        logger.info("Agent returned structured output for session '%s': %s", session_id, Payload(structured_data))
+
+    elif agent_turn.get("error_message"):
+        logger.error("Agent error for session '%s': %s", session_id, agent_turn["error_message"])
+        # You might want to return a different HTTP status code for agent errors
+        return AgentResponseOutput(
+            session_id=session_id,
+            text_response=agent_turn.get("text_response") or "An error occurred with the agent.",
+            error_message=agent_turn["error_message"]
+        )
+
+    return AgentResponseOutput(
+        session_id=session_id,
+        text_response=agent_turn.get("text_response") or "Agent processed the request.", # Ensure there's always some text
+        structured_output=structured_data
+    )
+
+@app.get("/cache/stats", status_code=200)
+async def get_cache_stats(api_key: str = Depends(get_api_key)):
+    """Returns counters for everything that saves agent runs: fast path, response cache, coalescing and idempotent replays."""
+    return {
+        "fast_path": fast_path_router.stats(),
+        "response_cache": response_cache.stats(),
+        "coalescing": chat_coalescer.stats(),
+        "idempotency": idempotency_store.stats(),
+    }
+
+@app.get("/metrics", status_code=200)
+async def get_metrics():
+    """Prometheus scrape endpoint: request, agent, tool and model latencies, token totals, in-flight requests and sessions."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/traces/recent", status_code=200)
+async def get_recent_traces(limit: int = Query(20, ge=1), api_key: str = Depends(get_api_key)):
+    """Returns the most recent sampled traces (newest first), one list of spans per chat turn."""
+    return {"tracing": tracer.stats(), "traces": tracer.recent(limit)}
+
+@app.get("/cassette/stats", status_code=200)
+async def get_cassette_stats(api_key: str = Depends(get_api_key)):
+    """Returns record/replay counters and the most recent prompt-drift reports (see shared_libraries/cassette.py)."""
+    return cassette.stats()
+
+@app.get("/startup/stats", status_code=200)
+async def get_startup_stats(api_key: str = Depends(get_api_key)):
+    """Returns the startup time breakdown: import, settings, root agent, and each sub-agent once built."""
+    return agent_registry.startup_breakdown()
+
 @app.post("/chat/", response_model=AgentResponseOutput)
-async def chat_with_butler(request: UserQueryInput, api_key: str = Depends(get_api_key)):
+async def chat_with_butler(
+    request: UserQueryInput,
+    response: Response,
+    api_key: str = Depends(get_api_key),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     session_id = request.session_id or str(uuid.uuid4())
-    logger.info(f"Received chat request for session '{session_id}': Query: '{request.query}'")
+    logger.info("Received chat request for session '%s': Query: '%s'", session_id, Payload(request.query))
+
+    def coalesced_turn():
+        return chat_coalescer.run(session_id, request.query, lambda: run_butler_turn(request.query, session_id))
 
     try:
-        # Send message to the ButlerAgent
-        # The ADK's agent.send_message_async handles session state internally based on session_id
-        print(f"[DEBUG] Type of butler_agent in chat_with_butler: {type(butler_agent_module.butler_agent)}")
-        print(f"[DEBUG] Attributes of butler_agent: {dir(butler_agent_module.butler_agent)}")
-        agent_turn = await butler_agent_module.butler_agent.send_message_async(
-            message=request.query,
-            session_id=session_id
-        ) # Revert to send_message_async
-
-        text_response = agent_turn.output_text
-        structured_data = None
-
-        if agent_turn.structured_output:
-            # The structured_output from the agent (e.g., RecipeAgent) will be here
-            # It's already a dict if the sub-agent used an output_schema and output_key
-            structured_data = agent_turn.structured_output
-            logger.info(f"Agent returned structured output for session '{session_id}': {structured_data}")
-        
-        elif agent_turn.error_message:
-            logger.error(f"Agent error for session '{session_id}': {agent_turn.error_message}")
-            # You might want to return a different HTTP status code for agent errors
-            return AgentResponseOutput(
-                session_id=session_id,
-                text_response=text_response or "An error occurred with the agent.",
-                error_message=agent_turn.error_message
-            )
+        if not idempotency_key:
+            return await coalesced_turn()
 
-        return AgentResponseOutput(
-            session_id=session_id,
-            text_response=text_response or "Agent processed the request.", # Ensure there's always some text
-            structured_output=structured_data
+        agent_response, replayed = await idempotency_store.run(
+            idempotency_key,
+            request_fingerprint(request.session_id, request.query),
+            coalesced_turn,
+            should_store=lambda output: not output.error_message # Let clients retry agent errors
         )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return agent_response
 
+    except IdempotencyKeyConflict:
+        raise HTTPException(
+            status_code=422,
+            detail="This Idempotency-Key was already used with a different request body."
+        )
     except Exception as e:
         logger.error(f"Error during chat processing for session '{session_id}': {e}", exc_info=True)
         # Consider if the error is from the agent or the FastAPI layer
@@ -168,5 +327,51 @@ async def chat_with_butler(request: UserQueryInput, api_key: str = Depends(get_a
         # you might want to customize the response.
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@app.post("/chat/batch", response_model=BatchChatOutput)
+async def chat_with_butler_batch(request: BatchChatInput, api_key: str = Depends(get_api_key)):
+    """Runs many chat turns concurrently on the shared ButlerAgent, returning results in input order."""
+    if len(request.items) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {settings.CHAT_BATCH_MAX_ITEMS})."
+        )
+    max_concurrency = min(request.max_concurrency or settings.CHAT_BATCH_MAX_CONCURRENCY, settings.CHAT_BATCH_MAX_CONCURRENCY)
+    item_timeout = request.item_timeout_seconds or settings.CHAT_BATCH_ITEM_TIMEOUT_SECONDS
+    session_ids = [item.session_id or str(uuid.uuid4()) for item in request.items]
+    logger.info(f"Received batch chat request with {len(request.items)} items (concurrency={max_concurrency}, timeout={item_timeout}s)")
+
+    outcomes = await run_bounded(
+        [lambda item=item, session_id=session_id: chat_coalescer.run(session_id, item.query, lambda: run_butler_turn(item.query, session_id))
+         for item, session_id in zip(request.items, session_ids)],
+        max_concurrency=max_concurrency,
+        timeout_seconds=item_timeout,
+    )
+
+    results = [
+        BatchChatItemResult(index=index, session_id=session_id, response=outcome.result, error_message=outcome.error)
+        for index, (session_id, outcome) in enumerate(zip(session_ids, outcomes))
+    ]
+    failed = sum(1 for result in results if result.error_message)
+    logger.info(f"Batch chat finished: {len(results) - failed} succeeded, {failed} failed")
+    return BatchChatOutput(results=results, succeeded=len(results) - failed, failed=failed)
+
+@app.post("/chat/stream")
+async def chat_with_butler_stream(request: UserQueryInput, api_key: str = Depends(get_api_key)):
+    """Streams a ButlerAgent turn as server-sent events (text, transfer, tool_call, tool_result, final, error)."""
+    session_id = request.session_id or str(uuid.uuid4())
+    logger.info("Received streaming chat request for session '%s': Query: '%s'", session_id, Payload(request.query))
+
+    async def serialized_stream():
+        # Same per-session ordering as /chat/, so streamed turns don't interleave state writes
+        async with chat_coalescer.session_lock(session_id):
+            async for chunk in chat_streamer.sse_stream(request.query, session_id):
+                yield chunk
+
+    return StreamingResponse(
+        serialized_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"} # Disable proxy buffering so events flush immediately
+    )
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
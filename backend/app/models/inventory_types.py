@@ -0,0 +1,81 @@
+# backend/app/models/inventory_types.py
+"""Request and response bodies for the inventory REST endpoints (/v1/inventory)."""
+
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class InventoryItem(BaseModel):
+    item_name: str
+    quantity: float
+    unit: str
+    expires_on: Optional[date] = None # Best-before date, if one was given
+
+
+class InventoryItemInput(BaseModel):
+    item_name: str = Field(..., min_length=1, max_length=100, description="Name of the item, e.g. 'flour'.")
+    quantity: float = Field(..., gt=0, description="Amount to add or remove.")
+    unit: str = Field(..., min_length=1, max_length=32, description="Unit of measurement, e.g. 'kg', 'pieces'.")
+    expires_on: Optional[date] = Field(None, description="Best-before date of an added quantity; the item keeps the earliest.")
+
+
+class InventoryItemPatch(BaseModel):
+    item_name: str = Field(..., min_length=1, max_length=100)
+    unit: str = Field(..., min_length=1, max_length=32)
+    quantity_delta: float = Field(..., description="Added if positive, removed if negative.")
+
+
+class InventoryBulkOperation(InventoryItemInput):
+    op: Literal["add", "remove"]
+
+
+class InventoryBulkInput(BaseModel):
+    operations: List[InventoryBulkOperation] = Field(..., min_length=1, max_length=500)
+
+
+class InventoryListResponse(BaseModel):
+    user_id: str
+    items: List[InventoryItem]
+    version: int # Also sent as the ETag; send it back in If-Match to update only this state
+
+
+class ExpiringItem(InventoryItem):
+    days_left: int # Negative once the date has passed
+
+
+class InventoryExpiringResponse(BaseModel):
+    user_id: str
+    within_days: int
+    items: List[ExpiringItem] # Soonest first
+
+
+class InventoryMutationResult(BaseModel):
+    status: str # "success" or "error", as returned by the inventory tools
+    message: str
+    item: Optional[InventoryItem] = None # The item after the change; None if it was removed completely
+
+
+class InventoryBulkResult(BaseModel):
+    results: List[InventoryMutationResult] # Same order as the operations
+    succeeded: int
+    failed: int
+
+
+class InventoryChange(BaseModel):
+    seq: int # Per-user, from 1, in the order the changes were applied
+    time: float # Unix time
+    op: Literal["add", "remove", "delete", "replace"]
+    item_name: Optional[str] = None
+    quantity: Optional[float] = None # add and remove only
+    unit: Optional[str] = None
+    expires_on: Optional[date] = None # add only, if given
+    items: Optional[List[Dict[str, Any]]] = None # replace only: the new inventory
+
+
+class InventoryChangesResponse(BaseModel):
+    user_id: str
+    since: int
+    latest_seq: int # Pass as `since` next time; equal to the last change's seq once caught up
+    changes: List[InventoryChange]
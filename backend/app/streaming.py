@@ -0,0 +1,194 @@
+# backend/app/streaming.py
+"""Server-sent-events (SSE) streaming of ButlerAgent turns.
+
+Both chat endpoints drive the agent tree through one ADK `Runner` and session service
+(persistent with SESSION_STORE_PATH). `/chat/` waits for the whole multi-agent turn
+(`ChatStreamer.run_turn`). `/chat/stream` turns every ADK event into small SSE messages
+as soon as it is produced:
+
+- `text`:        a chunk of model text (partial output while the model is still writing)
+- `transfer`:    an agent handed control to another agent (`transfer_to_agent`)
+- `tool_call`:   an agent invoked a FunctionTool
+- `tool_result`: a FunctionTool returned
+- `recipe`:      incremental RecipeAgent output (name/ingredient/instruction ready, see RecipeStreamParser),
+                 parsed from its text and from the `recipe_details_json` it hands back in `transfer_to_agent`
+- `final`:       the final answer, shaped like `AgentResponseOutput`
+- `error`:       the turn failed; the stream ends after this message
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.genai import types as genai_types
+
+from backend.app.shared_libraries import metrics
+from backend.app.shared_libraries.tracing import tracer
+from backend.app.sub_agents.recipe.stream_parser import RecipeStreamParser
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "local_butler"
+DEFAULT_USER_ID = "default_user_001" # Matches the default UserProfile created by initialize_session_state
+RECIPE_AGENT_NAME = "RecipeAgent"
+TRANSFER_TOOL_NAME = "transfer_to_agent"
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Formats a single server-sent event with a JSON payload."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _parse_structured_output(text: str) -> Optional[Dict[str, Any]]:
+    """Returns the final text as a dict if the agent answered with a JSON object."""
+    candidate = text.strip()
+    if not candidate.startswith("{"):
+        return None
+    try:
+        parsed = json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _recipe_details_json(args: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The `recipe_details_json` in RecipeAgent's `transfer_to_agent(agent_name=..., parameters={...})` args."""
+    parameters: Any = (args or {}).get("parameters", args)
+    if isinstance(parameters, str):
+        parameters = _parse_structured_output(parameters)
+    recipe_json = parameters.get("recipe_details_json") if isinstance(parameters, dict) else None
+    if isinstance(recipe_json, dict):
+        return json.dumps(recipe_json)
+    return recipe_json if isinstance(recipe_json, str) else None
+
+
+class ChatStreamer:
+    """Runs ButlerAgent turns through an ADK Runner and yields SSE-ready events."""
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        app_name: str = APP_NAME,
+        session_service: Optional[BaseSessionService] = None,
+    ):
+        self.app_name = app_name
+        self.session_service = session_service or InMemorySessionService()
+        self.runner = Runner(agent=agent, app_name=app_name, session_service=self.session_service)
+        self.run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+        self.blocking_run_config = RunConfig() # /chat/: only complete model responses
+
+    async def _ensure_session(self, user_id: str, session_id: str) -> None:
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            await self.session_service.create_session(
+                app_name=self.app_name, user_id=user_id, session_id=session_id
+            )
+            logger.info(f"Created session '{session_id}' for user '{user_id}'.")
+
+    async def stream_turn(
+        self, query: str, session_id: str, user_id: str = DEFAULT_USER_ID, streaming: bool = True, route: str = "/chat/stream"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields `{"event": <type>, "data": <payload>}` dicts for one user turn."""
+        with metrics.observe_turn("agent"), tracer.start_trace("chat", route=route, session_id=session_id, user_id=user_id):
+            await self._ensure_session(user_id, session_id)
+            new_message = genai_types.Content(role="user", parts=[genai_types.Part(text=query)])
+
+            streamed_partial_text = False # Whether the current model response already went out as partial chunks
+            final_text = ""
+            error_message: Optional[str] = None
+            recipe_parser: Optional[RecipeStreamParser] = None # One per RecipeAgent model response
+
+            async for event in self.runner.run_async(
+                user_id=user_id,
+                session_id=session_id,
+                new_message=new_message,
+                run_config=self.run_config if streaming else self.blocking_run_config,
+            ):
+                payloads = self._event_payloads(event, streamed_partial_text)
+                for payload in payloads:
+                    yield payload
+                if event.author == RECIPE_AGENT_NAME:
+                    # Surface the recipe piece by piece while RecipeAgent is still writing it.
+                    recipe_parser = recipe_parser or RecipeStreamParser()
+                    for chunk in self._recipe_chunks(event, payloads):
+                        for recipe_event in recipe_parser.feed(chunk):
+                            yield {"event": "recipe", "data": recipe_event}
+
+                if event.error_message:
+                    error_message = event.error_message
+                if event.partial:
+                    streamed_partial_text = True
+                    continue
+                # A non-partial event closes the current model response.
+                streamed_partial_text = False
+                recipe_parser = None
+                # Multi-hop turns produce several final responses; the last one is the butler's answer.
+                if event.is_final_response() and event.content and event.content.parts:
+                    final_text = "".join(part.text for part in event.content.parts if part.text) or final_text
+
+            text_response = final_text
+            yield {
+                "event": "final",
+                "data": {
+                    "session_id": session_id,
+                    "text_response": text_response or "Agent processed the request.",
+                    "structured_output": _parse_structured_output(text_response),
+                    "error_message": error_message,
+                },
+            }
+
+    async def run_turn(self, query: str, session_id: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Runs one turn to completion and returns the `final` payload, shaped like `AgentResponseOutput`."""
+        final: Dict[str, Any] = {}
+        async for payload in self.stream_turn(query, session_id, user_id=user_id, streaming=False, route="/chat/"):
+            if payload["event"] == "final":
+                final = payload["data"]
+        return final
+
+    def _recipe_chunks(self, event: Event, payloads: List[Dict[str, Any]]) -> List[str]:
+        """RecipeAgent output in one event: new text, and the recipe JSON of a completed `transfer_to_agent` call."""
+        chunks = [payload["data"]["text"] for payload in payloads if payload["event"] == "text"]
+        if not event.partial:
+            for call in event.get_function_calls():
+                recipe_json = _recipe_details_json(call.args) if call.name == TRANSFER_TOOL_NAME else None
+                if recipe_json:
+                    chunks.append(recipe_json)
+        return chunks
+
+    def _event_payloads(self, event: Event, streamed_partial_text: bool) -> List[Dict[str, Any]]:
+        """Translates one ADK event into zero or more stream messages."""
+        payloads: List[Dict[str, Any]] = []
+        author = event.author
+
+        if event.content and event.content.parts:
+            text = "".join(part.text for part in event.content.parts if part.text)
+            # The aggregated (non-partial) event repeats text that was already streamed in chunks.
+            if text and (event.partial or not streamed_partial_text):
+                payloads.append({"event": "text", "data": {"agent": author, "text": text, "partial": bool(event.partial)}})
+
+        if not event.partial:
+            for call in event.get_function_calls():
+                payloads.append({"event": "tool_call", "data": {"agent": author, "name": call.name, "args": call.args}})
+            for response in event.get_function_responses():
+                payloads.append({"event": "tool_result", "data": {"agent": author, "name": response.name, "response": response.response}})
+
+        if event.actions and event.actions.transfer_to_agent:
+            payloads.append({"event": "transfer", "data": {"from_agent": author, "to_agent": event.actions.transfer_to_agent}})
+
+        return payloads
+
+    async def sse_stream(self, query: str, session_id: str, user_id: str = DEFAULT_USER_ID) -> AsyncIterator[str]:
+        """Wraps `stream_turn` as SSE text, reporting failures as a final `error` event."""
+        try:
+            async for payload in self.stream_turn(query, session_id, user_id=user_id):
+                yield format_sse(payload["event"], payload["data"])
+        except Exception as e:
+            logger.error(f"Error during streamed chat for session '{session_id}': {e}", exc_info=True)
+            yield format_sse("error", {"session_id": session_id, "error_message": f"An unexpected error occurred: {str(e)}"})
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_chat_logging.py
+"""Measures the logging overhead of POST /chat/ with a stubbed model.
+
+The ButlerAgent runner is replaced by a stub whose turn calls the real inventory and memory
+tools against a large inventory, so only the request path and its logging are timed.
+Three configurations are compared:
+
+- `off`: root level WARNING; the floor every other mode is compared against.
+- `before`: the previous setup. A synchronous stream handler at INFO, plus the call
+  sites this change removed: the `dir(butler_agent)` debug prints, whole-inventory
+  f-strings and eagerly stringified memory values.
+- `after`: `log_pipeline.configure_logging` at INFO. Deferred formatting, capped
+  payloads and a queue-backed handler.
+
+Log output goes to a temporary file so terminal speed does not skew the numbers.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_chat_logging [--requests N] [--inventory-size N]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LOCAL_BUTLER_API_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.butler_agent_pkg.shared_libraries import log_pipeline
+from backend.butler_agent_pkg.tools import inventory_tools, memory_tool
+
+USER_ID = "bench_user"
+RECIPE = {"name": "Shakshuka", "ingredients": [{"name": "eggs", "quantity": 4, "unit": "pieces"}] * 12, "instructions": ["Simmer."] * 8}
+
+
+class StubButlerAgent:
+    """Stands in for the ADK runner: runs the tools a typical inventory turn would, without a model call."""
+
+    def __init__(self, legacy_logging: bool):
+        self.legacy_logging = legacy_logging
+        self.tool_context = SimpleNamespace(state={})
+
+    async def run_turn(self, query: str, session_id: str, user_id: str = USER_ID) -> Dict[str, object]:
+        if self.legacy_logging:
+            emulate_removed_call_sites(self, query)
+        inventory_tools.list_inventory_items(USER_ID)
+        inventory_tools.check_item_in_inventory(USER_ID, "item_250")
+        memory_tool.memorize("last_recipe", str(RECIPE), self.tool_context)
+        return {"session_id": session_id, "text_response": "Here is your inventory.", "structured_output": RECIPE, "error_message": None}
+
+
+def emulate_removed_call_sites(agent: StubButlerAgent, message: str) -> None:
+    """The statements this change removed or deferred, formatted eagerly as they were."""
+    logger = logging.getLogger("backend.app.main")
+    print(f"[DEBUG] LOCAL_BUTLER_API_KEY from os.getenv: '{os.getenv('LOCAL_BUTLER_API_KEY')}'")
+    print(f"[DEBUG] Type of butler_agent in chat_with_butler: {type(agent)}")
+    print(f"[DEBUG] Attributes of butler_agent: {dir(agent)}")
+    inventory = inventory_tools.inventory_store.list_items(USER_ID)
+    logging.getLogger("butler_agent_pkg.tools.inventory_tools").info(f"Inventory for user {USER_ID}: {inventory}")
+    logging.getLogger("butler_agent_pkg.tools.memory_tool").info(f"Memorized 'last_recipe': value (potentially truncated)='{str(RECIPE)[:100]}'")
+    logger.info(f"Agent returned structured output: {RECIPE}")
+
+
+def configure(mode: str, log_path: str) -> None:
+    log_pipeline.shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.FileHandler(log_path))
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+    elif mode == "before":
+        root.setLevel(logging.INFO)
+    else:
+        log_pipeline.configure_logging("INFO")
+
+
+def run_mode(mode: str, requests: int, log_path: str) -> Dict[str, float]:
+    configure(mode, log_path)
+    main.chat_streamer = StubButlerAgent(legacy_logging=(mode == "before"))
+    client = TestClient(main.app)
+    latencies: List[float] = []
+    with open(log_path, "a") as stdout_sink, contextlib.redirect_stdout(stdout_sink):
+        for i in range(requests):
+            started = time.perf_counter()
+            client.post("/chat/", json={"query": f"What is in my pantry? ({i})", "session_id": f"bench-{i}"})
+            latencies.append(time.perf_counter() - started)
+    log_pipeline.shutdown_logging() # Drain the queue so the next mode starts clean
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--inventory-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    inventory_tools.inventory_store.replace(USER_ID, [
+        {"item_name": f"item_{i}", "quantity": i, "unit": "grams"} for i in range(args.inventory_size)
+    ])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "bench.log")
+        results = {mode: run_mode(mode, args.requests, log_path) for mode in ("off", "before", "after")}
+
+    floor = results["off"]["mean_ms"]
+    print(f"{args.requests} requests, {args.inventory_size}-item inventory (stubbed model)", file=sys.stderr)
+    print(f"{'mode':>7} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'logging overhead ms':>20}")
+    for mode, result in results.items():
+        print(f"{mode:>7} {result['mean_ms']:>8.3f} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} "
+              f"{result['mean_ms'] - floor:>20.3f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,120 @@
+# backend/benchmarks/bench_cold_start.py
+"""Measures cold-start time of the agent package in fresh interpreters.
+
+Each run starts a new Python process, imports `backend.butler_agent_pkg` (settings,
+root agent, lazy sub-agent placeholders) and reports the startup breakdown. It then
+builds every sub-agent, which is the cost a fully eager import would pay up front.
+With `--record`, the median is appended to a history file keyed by git commit, and
+compared with the previous entry so regressions show up per commit.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_cold_start [--runs N] [--record] [--history PATH]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cold_start_history.jsonl")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs in the child interpreter; prints one JSON line.
+CHILD_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import backend.butler_agent_pkg
+ready = time.perf_counter() - started
+from backend.butler_agent_pkg.agent_registry import agent_registry
+preload_started = time.perf_counter()
+agent_registry.preload()
+preload = time.perf_counter() - preload_started
+print(json.dumps({"ready_seconds": ready, "preload_seconds": preload, "breakdown": agent_registry.startup_breakdown()}))
+"""
+
+
+def run_once() -> Dict[str, Any]:
+    env = dict(os.environ)
+    # Settings require these; the benchmark never calls the model.
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("LOCAL_BUTLER_API_KEY", "benchmark")
+    env["LOG_LEVEL"] = "WARNING"
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", CHILD_SCRIPT], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - started
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def median(values: List[Optional[float]]) -> Optional[float]:
+        values = [value for value in values if value is not None]
+        return statistics.median(values) if values else None
+
+    sub_agent_names = runs[0]["breakdown"]["sub_agents"].keys()
+    return {
+        "runs": len(runs),
+        "process_seconds": median([run["process_seconds"] for run in runs]),
+        "ready_seconds": median([run["ready_seconds"] for run in runs]),
+        "settings_seconds": median([run["breakdown"]["settings_seconds"] for run in runs]),
+        "root_agent_seconds": median([run["breakdown"]["root_agent_seconds"] for run in runs]),
+        "deferred_seconds": median([run["preload_seconds"] for run in runs]),
+        "sub_agents": {
+            name: median([run["breakdown"]["sub_agents"][name]["construction_seconds"] for run in runs])
+            for name in sub_agent_names
+        },
+    }
+
+
+def last_recorded(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as history_file:
+        lines = [line for line in history_file if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start.")
+    parser.add_argument("--record", action="store_true", help="Append the result to the history file.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="JSONL history of results per commit.")
+    args = parser.parse_args()
+
+    summary = summarize([run_once() for _ in range(args.runs)])
+    summary["commit"] = git_commit()
+
+    print(f"Median of {summary['runs']} cold starts (commit {summary['commit'] or 'unknown'}):")
+    print(f"  process start to exit     {summary['process_seconds'] * 1000:8.1f} ms")
+    print(f"  import until ready        {summary['ready_seconds'] * 1000:8.1f} ms")
+    print(f"    settings                {summary['settings_seconds'] * 1000:8.1f} ms")
+    print(f"    root agent              {summary['root_agent_seconds'] * 1000:8.1f} ms")
+    print(f"  deferred to first use     {summary['deferred_seconds'] * 1000:8.1f} ms")
+    for name, seconds in summary["sub_agents"].items():
+        print(f"    {name:<24}{seconds * 1000:8.1f} ms")
+
+    previous = last_recorded(args.history)
+    if previous is not None:
+        change = summary["ready_seconds"] - previous["ready_seconds"]
+        print(f"Import until ready vs. commit {previous.get('commit')}: {change * 1000:+.1f} ms "
+              f"({change / previous['ready_seconds']:+.1%})")
+    if args.record:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as history_file:
+            history_file.write(json.dumps(summary) + "\n")
+        print(f"Recorded in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_inventory_backends.py
+"""Compares the inventory backends under concurrent tool calls.
+
+Each run seeds one user's inventory with `--items` items and starts `--threads` worker
+threads. Each thread makes `--ops` calls to the inventory tools (`inventory_tools.*`,
+as InventoryAgent and the REST endpoints call them), picked at random: 40% check,
+25% add, 25% remove and 10% list. All threads share the one user, so every write
+contends for the same rows.
+
+For each backend and thread count it prints throughput and per-call p50/p99 latency.
+It then checks that no update was lost: every item's final quantity must equal its
+seeded quantity plus all adds minus all successful removals. The exit status is 1 if
+any run fails this check.
+
+The SQLite backend uses a fresh database in a temporary directory (or `--db-path`) with
+`--pool-size` connections. Its numbers include the WAL commit on every add and remove.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_inventory_backends [--threads 1,4,16] [--ops 2000] [--items 200]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LOCAL_BUTLER_API_KEY", "benchmark")
+
+from backend.benchmarks.load_generator import percentile
+from backend.butler_agent_pkg.tools import inventory_tools
+from backend.butler_agent_pkg.tools.inventory_sqlite import SqliteInventoryBackend
+from backend.butler_agent_pkg.tools.inventory_store import InMemoryInventoryBackend, InventoryBackend
+
+USER_ID = "bench_user"
+INITIAL_QUANTITY = 1000
+# Integer quantities, so the consistency check is exact
+OPERATIONS = (("check", 40), ("add", 25), ("remove", 25), ("list", 10))
+
+
+def worker(seed: int, ops: int, item_names: List[str], latencies: List[float], deltas: Counter, barrier: threading.Barrier) -> None:
+    """Runs `ops` random tool calls. Records each call's latency and the net quantity change per item."""
+    rng = random.Random(seed)
+    actions = rng.choices([name for name, _ in OPERATIONS], weights=[weight for _, weight in OPERATIONS], k=ops)
+    barrier.wait()
+    for action in actions:
+        item_name = rng.choice(item_names)
+        quantity = rng.randint(1, 5)
+        started = time.perf_counter()
+        if action == "check":
+            inventory_tools.check_item_in_inventory(USER_ID, item_name)
+        elif action == "list":
+            inventory_tools.list_inventory_items(USER_ID)
+        elif action == "add":
+            inventory_tools.add_item_to_inventory(USER_ID, item_name, quantity, "pieces")
+            deltas[item_name] += quantity
+        elif inventory_tools.remove_item_from_inventory(USER_ID, item_name, quantity, "pieces")["status"] == "success":
+            deltas[item_name] -= quantity
+        latencies.append(time.perf_counter() - started)
+
+
+def run(backend: InventoryBackend, threads: int, ops: int, item_count: int) -> Tuple[float, List[float], int]:
+    """Returns (calls per second, sorted latencies, items whose final quantity is wrong)."""
+    item_names = [f"item_{i}" for i in range(item_count)]
+    backend.replace(USER_ID, [{"item_name": name, "quantity": INITIAL_QUANTITY, "unit": "pieces"} for name in item_names])
+    inventory_tools.inventory_store = backend
+
+    per_thread = [([], Counter()) for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=worker, args=(index, ops, item_names, latencies, deltas, barrier))
+               for index, (latencies, deltas) in enumerate(per_thread)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for thread_latencies, _ in per_thread for latency in thread_latencies)
+    expected = Counter({name: INITIAL_QUANTITY for name in item_names})
+    for _, deltas in per_thread:
+        expected.update(deltas)
+    mismatches = sum(1 for name in item_names
+                     if (backend.get(USER_ID, name, "pieces") or {"quantity": 0})["quantity"] != expected[name])
+    return len(latencies) / elapsed, latencies, mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,4,16", help="Comma-separated worker thread counts.")
+    parser.add_argument("--ops", type=int, default=2000, help="Tool calls per thread.")
+    parser.add_argument("--items", type=int, default=200, help="Items in the shared inventory.")
+    parser.add_argument("--pool-size", type=int, default=4, help="SQLite connection pool size.")
+    parser.add_argument("--db-path", default=None, help="SQLite database file (default: a temporary one).")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    thread_counts = [int(count) for count in args.threads.split(",")]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backends: Dict[str, Callable[[], InventoryBackend]] = {
+            "memory": InMemoryInventoryBackend,
+            "sqlite": lambda: SqliteInventoryBackend(args.db_path or os.path.join(tmp_dir, "inventory.sqlite3"), pool_size=args.pool_size),
+        }
+        print(f"{'backend':<8} {'threads':>7} {'calls/s':>10} {'p50 us':>10} {'p99 us':>10} {'consistent':>11}")
+        inconsistent = 0
+        for name, make_backend in backends.items():
+            backend = make_backend()
+            for threads in thread_counts:
+                throughput, latencies, mismatches = run(backend, threads, args.ops, args.items)
+                inconsistent += mismatches
+                print(f"{name:<8} {threads:>7} {throughput:>10.0f} {percentile(latencies, 0.50) * 1e6:>10.1f} "
+                      f"{percentile(latencies, 0.99) * 1e6:>10.1f} {'yes' if not mismatches else f'NO ({mismatches})':>11}")
+            backend.close()
+    if inconsistent:
+        print(f"{inconsistent} item quantities did not match the calls made: updates were lost.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
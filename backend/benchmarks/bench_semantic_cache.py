@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_semantic_cache.py
+"""Replays a recipe query log through the near-duplicate recipe index.
+
+Every query is looked up first; a miss stands in for a RecipeAgent generation and
+is added to the index. Each log line carries an intent label, so a hit is counted
+as correct only if it returned a recipe generated for the same intent.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_semantic_cache [--log PATH] [--max-entries N]
+"""
+
+import argparse
+import os
+import time
+from typing import List, Tuple
+
+from backend.butler_agent_pkg.shared_libraries.ngram_index import NgramIndex
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recipe_query_log.tsv")
+THRESHOLDS = (0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95)
+
+
+def load_query_log(path: str) -> List[Tuple[str, Tuple[str, ...], str]]:
+    """Reads `intent<TAB>dietary_restrictions<TAB>query` lines (comma-separated restrictions)."""
+    entries = []
+    with open(path, encoding="utf-8") as log_file:
+        for line in log_file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            intent, dietary, query = line.rstrip("\n").split("\t")
+            restrictions = tuple(sorted(item.strip() for item in dietary.split(",") if item.strip()))
+            entries.append((intent, restrictions, query))
+    return entries
+
+
+def replay(entries: List[Tuple[str, Tuple[str, ...], str]], threshold: float, max_entries: int) -> dict:
+    index = NgramIndex(max_entries=max_entries, threshold=threshold)
+    correct_hits = wrong_hits = 0
+    started = time.perf_counter()
+    for intent, dietary, query in entries:
+        match = index.lookup(query, partition=dietary)
+        if match is None:
+            index.add(query, intent, partition=dietary) # Simulates generating and caching a new recipe
+        elif match.payload == intent:
+            correct_hits += 1
+        else:
+            wrong_hits += 1
+    elapsed = time.perf_counter() - started
+    hits = correct_hits + wrong_hits
+    return {
+        "threshold": threshold,
+        "hit_rate": hits / len(entries),
+        "precision": (correct_hits / hits) if hits else 1.0,
+        "wrong_hits": wrong_hits,
+        "us_per_query": elapsed / len(entries) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="Query log to replay.")
+    parser.add_argument("--max-entries", type=int, default=512, help="Index capacity.")
+    args = parser.parse_args()
+
+    entries = load_query_log(args.log)
+    # Upper bound: every repeat of an intent (with the same dietary restrictions) is a potential hit.
+    distinct = len({(intent, dietary) for intent, dietary, _ in entries})
+    print(f"Replaying {len(entries)} queries ({distinct} distinct intents, ideal hit rate {1 - distinct / len(entries):.1%})")
+    print(f"{'threshold':>9} {'hit rate':>9} {'precision':>9} {'wrong':>6} {'us/query':>9}")
+    for threshold in THRESHOLDS:
+        result = replay(entries, threshold, args.max_entries)
+        print(f"{result['threshold']:>9.2f} {result['hit_rate']:>9.1%} {result['precision']:>9.1%} "
+              f"{result['wrong_hits']:>6} {result['us_per_query']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
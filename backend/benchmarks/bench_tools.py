@@ -0,0 +1,253 @@
+# backend/benchmarks/bench_tools.py
+"""Micro-benchmarks for the FunctionTools, at inventory and memory sizes well past today's.
+
+Each case times one tool call against data seeded at a given size:
+
+- `inventory.*`: add / remove / check / list in `inventory_tools` with N items per user.
+  Lookups target the last item, the worst case for a linear scan.
+- `memory.*`: `memorize_list_item` (a new item and a duplicate) and `get_memory` on a
+  list of N entries.
+- `recipe.shopping_list`: `check_inventory_and_create_shopping_list` for a 20-ingredient
+  recipe against an N-item inventory.
+- `common.*`: the JSON round-trips in `save_recipe_wrapper` and
+  `generate_shopping_list_for_recipe_wrapper` for a recipe with N ingredients.
+
+The numbers are meant to be stable enough to compare between commits. Each case runs
+enough calls per round to last about `--min-time` seconds, with the GC disabled
+(`timeit`). The best of `--repeat` rounds is reported, alongside the median and spread.
+Logging is set to WARNING so formatting cost stays out of the numbers.
+
+`--save-baseline` stores the results. Later runs compare against the stored baseline
+and flag cases slower by more than `--threshold`. With `--check`, the exit status is 1
+if any case regressed, for CI. Baselines are machine-specific: record and compare on
+the same host.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.bench_tools [--sizes 10,1000,100000] [--only inventory] [--save-baseline] [--check]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LOCAL_BUTLER_API_KEY", "benchmark")
+
+from backend.butler_agent_pkg import common_tools
+from backend.butler_agent_pkg.shared_libraries import constants, types
+from backend.butler_agent_pkg.sub_agents.recipe.tools import check_inventory_and_create_shopping_list
+from backend.butler_agent_pkg.tools import inventory_tools, memory_tool
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tools_baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USER_ID = "bench_user"
+UNITS = ("grams", "ml", "pieces", "kg")
+
+# A case builder seeds its data for one size and returns the call to time.
+CaseBuilder = Callable[[int], Callable[[], Any]]
+
+
+def _tool_context(state: Optional[Dict[str, Any]] = None) -> SimpleNamespace:
+    """Just enough of an ADK ToolContext for the memory tools (in-memory session state)."""
+    return SimpleNamespace(state=state if state is not None else {})
+
+
+def _seed_inventory(size: int) -> Dict[str, Any]:
+    """Fills the bench user's inventory with `size` items and returns the last one."""
+    items = [{"item_name": f"item_{i}", "quantity": 1000.0, "unit": UNITS[i % len(UNITS)]} for i in range(size)]
+    items[-1]["quantity"] = 1e12 # Large enough that repeated removals never empty it
+    inventory_tools.inventory_store.replace(USER_ID, items)
+    return items[-1]
+
+
+def _recipe(ingredient_count: int) -> Dict[str, Any]:
+    return {
+        "name": "Benchmark Stew",
+        "ingredients": [{"name": f"ingredient_{i}", "quantity": i % 7 + 1, "unit": UNITS[i % len(UNITS)]} for i in range(ingredient_count)],
+        "instructions": ["Chop.", "Simmer.", "Serve."],
+    }
+
+
+def inventory_add(size: int) -> Callable[[], Any]:
+    last = _seed_inventory(size)
+    return lambda: inventory_tools.add_item_to_inventory(USER_ID, last["item_name"], 1, last["unit"])
+
+
+def inventory_remove(size: int) -> Callable[[], Any]:
+    last = _seed_inventory(size)
+    return lambda: inventory_tools.remove_item_from_inventory(USER_ID, last["item_name"], 1, last["unit"])
+
+
+def inventory_check(size: int) -> Callable[[], Any]:
+    last = _seed_inventory(size)
+    return lambda: inventory_tools.check_item_in_inventory(USER_ID, last["item_name"])
+
+
+def inventory_check_missing(size: int) -> Callable[[], Any]:
+    _seed_inventory(size)
+    return lambda: inventory_tools.check_item_in_inventory(USER_ID, "saffron")
+
+
+def inventory_list(size: int) -> Callable[[], Any]:
+    _seed_inventory(size)
+    return lambda: inventory_tools.list_inventory_items(USER_ID)
+
+
+def memory_list_add(size: int) -> Callable[[], Any]:
+    base = [{"id": f"recipe-{i}", "name": f"Recipe {i}"} for i in range(size)]
+    context = _tool_context()
+    new_item = json.dumps({"id": "recipe-new", "name": "New Recipe"})
+
+    def call() -> Any:
+        context.state["saved"] = base # Reset, so every call appends to a list of `size` entries
+        return memory_tool.memorize_list_item("saved", new_item, context)
+    return call
+
+
+def memory_list_duplicate(size: int) -> Callable[[], Any]:
+    context = _tool_context({"saved": [{"id": f"recipe-{i}", "name": f"Recipe {i}"} for i in range(size)]})
+    duplicate = json.dumps({"id": f"recipe-{size - 1}", "name": f"Recipe {size - 1}"})
+    return lambda: memory_tool.memorize_list_item("saved", duplicate, context)
+
+
+def memory_get(size: int) -> Callable[[], Any]:
+    context = _tool_context({"saved": [{"id": f"recipe-{i}", "name": f"Recipe {i}"} for i in range(size)]})
+    return lambda: memory_tool.get_memory("saved", context)
+
+
+def recipe_shopping_list(size: int) -> Callable[[], Any]:
+    inventory = [types.Ingredient(name=f"ingredient_{i}", quantity=2, unit=UNITS[i % len(UNITS)]) for i in range(size)]
+    recipe = [types.Ingredient(name=f"ingredient_{i * 3}", quantity=5, unit=UNITS[(i * 3) % len(UNITS)]) for i in range(20)]
+    return lambda: check_inventory_and_create_shopping_list(recipe, inventory, recipe_title="Benchmark Stew")
+
+
+def common_save_recipe(size: int) -> Callable[[], Any]:
+    recipe_json = json.dumps(_recipe(size))
+    saved = [{"id": f"recipe-{i}", "name": f"Recipe {i}"} for i in range(10)]
+    context = _tool_context()
+
+    def call() -> Any:
+        context.state = {constants.SAVED_RECIPES_LIST_KEY: saved} # Fresh session, so state does not grow across calls
+        return common_tools.save_recipe_wrapper(recipe_json, context)
+    return call
+
+
+def common_shopping_list(size: int) -> Callable[[], Any]:
+    context = _tool_context({f"{constants.RECIPE_MEMORY_PREFIX}bench": _recipe(size)})
+    return lambda: common_tools.generate_shopping_list_for_recipe_wrapper("bench", context)
+
+
+CASES: List[Tuple[str, CaseBuilder]] = [
+    ("inventory.add", inventory_add),
+    ("inventory.remove", inventory_remove),
+    ("inventory.check", inventory_check),
+    ("inventory.check_missing", inventory_check_missing),
+    ("inventory.list", inventory_list),
+    ("memory.list_add", memory_list_add),
+    ("memory.list_duplicate", memory_list_duplicate),
+    ("memory.get", memory_get),
+    ("recipe.shopping_list", recipe_shopping_list),
+    ("common.save_recipe", common_save_recipe),
+    ("common.shopping_list", common_shopping_list),
+]
+
+
+def measure(call: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, float]:
+    """Times `call`. Returns the best and median microseconds per call, and the spread between them."""
+    timer = timeit.Timer(call)
+    number, elapsed = timer.autorange() # Also warms up caches and lazy imports
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / elapsed))
+    per_call = [total / number * 1e6 for total in timer.repeat(repeat=repeat, number=number)]
+    best = min(per_call)
+    median = statistics.median(per_call)
+    return {"best_us": best, "median_us": median, "spread": (median - best) / best if best else 0.0, "calls": number}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]], previous: Optional[Dict[str, Any]]) -> None:
+    """Writes the results, keeping cases from an earlier baseline that this run skipped."""
+    cases = dict(previous.get("cases", {})) if previous else {}
+    cases.update({case_id: round(result["best_us"], 3) for case_id, result in results.items()})
+    baseline = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "cases": cases,
+    }
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,100000", help="Comma-separated data sizes (items, list entries or ingredients).")
+    parser.add_argument("--only", default="", help="Run only cases whose name starts with this prefix, e.g. 'inventory' or 'memory.get'.")
+    parser.add_argument("--repeat", type=int, default=7, help="Timing rounds per case.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown against the baseline that counts as a regression (0.2 = 20%%).")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any case regressed.")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    baseline = load_baseline(args.baseline)
+    baseline_cases = baseline.get("cases", {}) if baseline else {}
+    if baseline:
+        print(f"Baseline: {args.baseline} (commit {baseline.get('commit')}, Python {baseline.get('python')})", file=sys.stderr)
+
+    print(f"{'case':<24} {'size':>7} {'best us':>12} {'median us':>12} {'spread':>7} {'baseline us':>12} {'change':>8}")
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: List[str] = []
+    for name, builder in CASES:
+        if not name.startswith(args.only):
+            continue
+        for size in sizes:
+            case_id = f"{name}[{size}]"
+            result = results[case_id] = measure(builder(size), args.repeat, args.min_time)
+            reference = baseline_cases.get(case_id)
+            reference_text = f"{reference:>12.2f}" if reference else f"{'-':>12}"
+            change = f"{result['best_us'] / reference - 1:>+8.1%}" if reference else f"{'-':>8}"
+            flag = ""
+            if reference and result["best_us"] > reference * (1 + args.threshold):
+                regressions.append(case_id)
+                flag = "  REGRESSION"
+            print(f"{name:<24} {size:>7} {result['best_us']:>12.2f} {result['median_us']:>12.2f} {result['spread']:>7.1%} "
+                  f"{reference_text} {change}{flag}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(f"Saved {len(results)} cases to {args.baseline}", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
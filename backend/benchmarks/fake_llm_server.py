@@ -0,0 +1,209 @@
+# backend/benchmarks/fake_llm_server.py
+"""Local stand-in for the Gemini API, for load tests that must not spend quota.
+
+Serves `POST /{version}/models/{model}:generateContent` and `:streamGenerateContent`
+(SSE), the two calls ADK agents make through google-genai. Answers come from a JSON
+script (see `data/fake_llm_script.json`) with per-agent rules. A rule can reply with text,
+a `transfer_to_agent` call or a FunctionTool call. The agent is identified from ADK's
+system instruction ("Your internal name is ..."). Each response is delayed by a latency
+drawn from the agent's configured distribution. `error_rate` injects 503s.
+
+Run it, then point the backend at it:
+    python -m backend.benchmarks.fake_llm_server --port 8089
+    FAKE_LLM_BASE_URL=http://127.0.0.1:8089 DEFAULT_MODEL=fake-gemini uvicorn backend.app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fake_llm_script.json")
+
+_AGENT_NAME_RE = re.compile(r'internal name is "?([A-Za-z_][A-Za-z0-9_]*)"?')
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)(:number)?\}")
+_CONTEXT_PREFIX = "For context:" # ADK rewrites other agents' turns as user messages with this prefix
+
+
+def sample_latency_ms(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Draws one latency from `{"distribution": fixed|uniform|normal|lognormal, ...}`."""
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "uniform":
+        return rng.uniform(spec["low_ms"], spec["high_ms"])
+    if distribution == "normal":
+        return max(0.0, rng.gauss(spec["mean_ms"], spec["stddev_ms"]))
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(spec["median_ms"]), spec.get("sigma", 0.5))
+    return float(spec.get("ms", 0))
+
+
+def _fill(template: Any, groups: Dict[str, str]) -> Any:
+    if isinstance(template, dict):
+        return {key: _fill(value, groups) for key, value in template.items()}
+    if not isinstance(template, str):
+        return template
+    whole = _PLACEHOLDER_RE.fullmatch(template)
+    if whole and whole.group(2): # "{quantity:number}" becomes a number, not a string
+        value = float(groups.get(whole.group(1)) or 0)
+        return int(value) if value.is_integer() else value
+    return _PLACEHOLDER_RE.sub(lambda match: (groups.get(match.group(1)) or "").strip(), template)
+
+
+class FakeLlmScript:
+    """Chooses the scripted reply for a generateContent request body."""
+
+    def __init__(self, script: Dict[str, Any], seed: Optional[int] = None):
+        self.script = script
+        self.rng = random.Random(seed)
+        self.rules = {agent: [dict(rule, _regex=re.compile(rule["match"]) if "match" in rule else None) for rule in rules]
+                      for agent, rules in script.get("agents", {}).items()}
+        self.calls: Dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str, seed: Optional[int] = None) -> "FakeLlmScript":
+        with open(path, encoding="utf-8") as script_file:
+            return cls(json.load(script_file), seed=seed)
+
+    @staticmethod
+    def agent_name(body: Dict[str, Any]) -> str:
+        instruction = body.get("systemInstruction") or body.get("system_instruction") or {}
+        text = " ".join(part.get("text", "") for part in instruction.get("parts", []))
+        match = _AGENT_NAME_RE.search(text)
+        return match.group(1) if match else "default"
+
+    @staticmethod
+    def _declared_functions(body: Dict[str, Any]) -> set:
+        names = set()
+        for tool in body.get("tools") or []:
+            for declaration in tool.get("functionDeclarations") or tool.get("function_declarations") or []:
+                names.add(declaration.get("name"))
+        return names
+
+    @staticmethod
+    def _last_user_text(contents: List[Dict[str, Any]]) -> str:
+        for content in reversed(contents):
+            if content.get("role") != "user":
+                continue
+            texts = [part["text"] for part in content.get("parts", []) if part.get("text")]
+            if texts and not texts[0].startswith(_CONTEXT_PREFIX):
+                return " ".join(texts)
+        return ""
+
+    @staticmethod
+    def _after_tool(contents: List[Dict[str, Any]]) -> bool:
+        if not contents:
+            return False
+        return any("functionResponse" in part or "function_response" in part for part in contents[-1].get("parts", []))
+
+    def reply(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Returns (agent name, response part) for the request."""
+        agent = self.agent_name(body)
+        self.calls[agent] = self.calls.get(agent, 0) + 1
+        contents = body.get("contents") or []
+        user_text = self._last_user_text(contents)
+        after_tool = self._after_tool(contents)
+        declared = self._declared_functions(body)
+        for rule in self.rules.get(agent) or self.rules.get("default", []):
+            if rule.get("after_tool") and not after_tool:
+                continue
+            if not rule.get("after_tool") and after_tool:
+                continue
+            groups: Dict[str, str] = {}
+            if rule["_regex"] is not None:
+                match = rule["_regex"].search(user_text)
+                if not match:
+                    continue
+                groups = match.groupdict()
+            if "call" in rule:
+                if rule["call"]["name"] not in declared:
+                    continue # Never call a tool the agent doesn't have
+                return agent, {"functionCall": {"name": rule["call"]["name"], "args": _fill(rule["call"].get("args", {}), groups)}}
+            return agent, {"text": _fill(rule["text"], groups)}
+        return agent, {"text": "OK."}
+
+    def latency_ms(self, agent: str) -> float:
+        latencies = self.script.get("latency", {})
+        return sample_latency_ms(latencies.get(agent) or latencies.get("default", {}), self.rng)
+
+    def chunk_delay_ms(self) -> float:
+        return sample_latency_ms(self.script.get("latency", {}).get("stream_chunk", {}), self.rng)
+
+    def should_fail(self) -> bool:
+        return self.rng.random() < self.script.get("error_rate", 0.0)
+
+
+def _usage(body: Dict[str, Any], reply_part: Dict[str, Any]) -> Dict[str, int]:
+    # Roughly four characters per token, enough for token accounting in metrics and traces.
+    prompt_tokens = max(1, len(json.dumps(body.get("contents", []))) // 4)
+    candidate_tokens = max(1, len(json.dumps(reply_part)) // 4)
+    return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": candidate_tokens, "totalTokenCount": prompt_tokens + candidate_tokens}
+
+
+def _response(parts: List[Dict[str, Any]], model: str, finish: bool, usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"role": "model", "parts": parts}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    response: Dict[str, Any] = {"candidates": [candidate], "modelVersion": model}
+    if usage:
+        response["usageMetadata"] = usage
+    return response
+
+
+def create_app(script: FakeLlmScript) -> FastAPI:
+    app = FastAPI(title="Fake Gemini API")
+
+    @app.post("/{api_version}/models/{model_action:path}")
+    async def generate(api_version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        body = await request.json()
+        agent, part = script.reply(body)
+        await asyncio.sleep(script.latency_ms(agent) / 1000)
+        if script.should_fail():
+            return JSONResponse(status_code=503, content={"error": {"code": 503, "message": "Fake overload", "status": "UNAVAILABLE"}})
+        usage = _usage(body, part)
+
+        if action != "streamGenerateContent":
+            return _response([part], model, finish=True, usage=usage)
+
+        async def sse():
+            if "text" in part:
+                size = script.script.get("stream_chunk_chars", 24)
+                chunks = [part["text"][i:i + size] for i in range(0, len(part["text"]), size)] or [""]
+                for index, chunk in enumerate(chunks):
+                    last = index == len(chunks) - 1
+                    yield f"data: {json.dumps(_response([{'text': chunk}], model, finish=last, usage=usage if last else None))}\r\n\r\n"
+                    if not last:
+                        await asyncio.sleep(script.chunk_delay_ms() / 1000)
+            else:
+                yield f"data: {json.dumps(_response([part], model, finish=True, usage=usage))}\r\n\r\n"
+
+        return StreamingResponse(sse(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls_by_agent": script.calls}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--script", default=DEFAULT_SCRIPT_PATH, help="JSON response script.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latencies and injected errors.")
+    args = parser.parse_args()
+    uvicorn.run(create_app(FakeLlmScript.load(args.script, seed=args.seed)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
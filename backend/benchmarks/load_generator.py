@@ -0,0 +1,135 @@
+# backend/benchmarks/load_generator.py
+"""Open-loop load generator for POST /chat/ (or /chat/stream).
+
+Requests are started on a fixed schedule at the target rate, whether or not earlier
+ones have finished. A saturated server then shows up as growing latency and a falling
+achieved rate, rather than being hidden by the client slowing down. Each request uses
+one of `--sessions` sessions and a query from the mix. The mix routes to InventoryAgent,
+RecipeAgent and the butler itself. Combine it with `fake_llm_server` to load-test
+without Gemini quota.
+
+Reports achieved throughput, p50/p95/p99 latency and error rates by kind: HTTP status,
+timeout, transport error, or a 200 response carrying an agent `error_message`.
+Pass several rates (`--rps 5,10,20,40`) to step the load and find where the stack saturates.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.load_generator --url http://127.0.0.1:8000 --rps 5,10,20 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+QUERY_MIX = [
+    "add 2 kg of flour",
+    "remove 1 liter of milk",
+    "do I have eggs?",
+    "list my inventory",
+    "suggest a recipe for dinner with eggs",
+    "what can I cook for lunch?",
+    "remember oat milk",
+    "hello there",
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _one_request(client: httpx.AsyncClient, endpoint: str, query: str, session_id: str, timeout: float) -> Optional[str]:
+    """Sends one turn. Returns None on success or the error kind."""
+    payload = {"query": query, "session_id": session_id}
+    try:
+        if endpoint.endswith("/stream"):
+            async with client.stream("POST", endpoint, json=payload, timeout=timeout) as response:
+                if response.status_code != 200:
+                    return f"http_{response.status_code}"
+                event_type = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event_type = line[len("event: "):]
+                    elif line.startswith("data: ") and event_type in ("error", "final"):
+                        data = json.loads(line[len("data: "):])
+                        if event_type == "error" or data.get("error_message"):
+                            return "agent_error"
+            return None
+        response = await client.post(endpoint, json=payload, timeout=timeout)
+        if response.status_code != 200:
+            return f"http_{response.status_code}"
+        return "agent_error" if response.json().get("error_message") else None
+    except httpx.TimeoutException:
+        return "timeout"
+    except httpx.TransportError as e:
+        return f"transport_{type(e).__name__}"
+
+
+async def run_step(url: str, endpoint: str, rps: float, duration: float, sessions: int, timeout: float, seed: int) -> Dict[str, object]:
+    rng = random.Random(seed)
+    session_ids = [f"load-{seed}-{i}" for i in range(sessions)]
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        async def timed(query: str, session_id: str) -> None:
+            started = time.perf_counter()
+            error = await _one_request(client, endpoint, query, session_id, timeout)
+            if error is None:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[error] += 1
+
+        total = int(rps * duration)
+        started = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            delay = started + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(timed(rng.choice(QUERY_MIX), rng.choice(session_ids))))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    failed = sum(errors.values())
+    return {
+        "target_rps": rps,
+        "sent": total,
+        "achieved_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": (percentile(latencies, 0.50) or 0) * 1000,
+        "p95_ms": (percentile(latencies, 0.95) or 0) * 1000,
+        "p99_ms": (percentile(latencies, 0.99) or 0) * 1000,
+        "error_rate": failed / total if total else 0.0,
+        "errors": dict(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL.")
+    parser.add_argument("--endpoint", default="/chat/", choices=["/chat/", "/chat/stream"])
+    parser.add_argument("--rps", default="10", help="Target rate, or a comma-separated list of rates to step through.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per step.")
+    parser.add_argument("--sessions", type=int, default=200, help="Distinct sessions to spread requests over.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'target':>7} {'sent':>6} {'achieved':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  breakdown")
+    for rps in (float(value) for value in args.rps.split(",")):
+        result = asyncio.run(run_step(args.url, args.endpoint, rps, args.duration, args.sessions, args.timeout, args.seed))
+        print(f"{result['target_rps']:>7.1f} {result['sent']:>6} {result['achieved_rps']:>9.1f} {result['p50_ms']:>8.0f} "
+              f"{result['p95_ms']:>8.0f} {result['p99_ms']:>8.0f} {result['error_rate']:>7.1%}  {result['errors'] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
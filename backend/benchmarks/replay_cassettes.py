@@ -0,0 +1,112 @@
+# backend/benchmarks/replay_cassettes.py
+"""Replays recorded conversations against a backend running with CASSETTE_MODE=replay.
+
+Reads the cassettes in `--cassettes` (see `butler_agent_pkg/shared_libraries/cassette.py`)
+and sends each recorded session's user messages to POST /chat/, in their original order.
+Every run uses fresh session ids, so the same cassettes can be replayed against the same
+server again. The server answers model calls from the cassettes, so the measured latency
+is orchestration overhead alone: routing, agent transfers, tools, session state and HTTP.
+It is printed next to the model time the recorded turns spent. Prompt drift reported by
+the server (GET /cassette/stats) is printed at the end, and the exit status is 1 if any
+prompt drifted.
+
+Usage (from the repository root):
+    CASSETTE_MODE=replay CASSETTE_DIR=cassettes uvicorn backend.app.main:app --port 8000 &
+    python -m backend.benchmarks.replay_cassettes --url http://127.0.0.1:8000 --cassettes cassettes
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import httpx
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("LOCAL_BUTLER_API_KEY", "benchmark")
+
+from backend.benchmarks.load_generator import percentile
+from backend.butler_agent_pkg.shared_libraries.cassette import read_cassette
+
+
+def load_sessions(directory: str) -> Dict[str, Tuple[List[str], float]]:
+    """Returns {session id: (user messages in order, recorded model milliseconds)}."""
+    sessions = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+        entries = read_cassette(path)
+        queries = [entry["query"] for entry in sorted(entries, key=lambda entry: entry["time"]) if entry.get("type") == "turn"]
+        model_ms = sum(entry.get("latency_ms", 0) for entry in entries if entry.get("type") == "model")
+        if queries:
+            sessions[entries[0]["session_id"]] = (queries, model_ms)
+    return sessions
+
+
+async def replay(url: str, sessions: Dict[str, Tuple[List[str], float]], concurrency: int, timeout: float) -> Tuple[List[float], Counter, float]:
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    run_tag = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+        async def replay_session(session_id: str, queries: List[str]) -> None:
+            async with semaphore:
+                for query in queries:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post("/chat/", json={"query": query, "session_id": f"{session_id}-replay-{run_tag}"})
+                    except httpx.HTTPError as e:
+                        errors[type(e).__name__] += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors[f"http_{response.status_code}"] += 1
+                    elif response.json().get("error_message"):
+                        errors["agent_error"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(replay_session(session_id, queries) for session_id, (queries, _) in sessions.items()))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL (started with CASSETTE_MODE=replay).")
+    parser.add_argument("--cassettes", default="cassettes", help="Directory of recorded cassettes.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sessions replayed at once; turns within a session stay sequential.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.cassettes)
+    if not sessions:
+        sys.exit(f"No recorded turns in {args.cassettes}.")
+    turns = sum(len(queries) for queries, _ in sessions.values())
+    recorded_model_ms = sum(model_ms for _, model_ms in sessions.values())
+
+    drift_before = httpx.get(f"{args.url}/cassette/stats", timeout=args.timeout).json()["drifted"]
+    latencies, errors, elapsed = asyncio.run(replay(args.url, sessions, args.concurrency, args.timeout))
+    stats = httpx.get(f"{args.url}/cassette/stats", timeout=args.timeout).json()
+    if stats["mode"] != "replay":
+        print(f"Warning: the server is in cassette mode '{stats['mode']}', not 'replay'; latencies include model calls.", file=sys.stderr)
+
+    latencies.sort()
+    print(f"{len(sessions)} sessions, {turns} turns replayed in {elapsed:.1f} s")
+    print(f"  orchestration per turn   p50 {(percentile(latencies, 0.50) or 0) * 1000:7.1f} ms   "
+          f"p95 {(percentile(latencies, 0.95) or 0) * 1000:7.1f} ms   p99 {(percentile(latencies, 0.99) or 0) * 1000:7.1f} ms")
+    print(f"  recorded model time      {recorded_model_ms / turns:7.1f} ms per turn")
+    print(f"  errors                   {dict(errors) or '-'}")
+    drifted = stats["drifted"] - drift_before
+    print(f"  prompt drift             {drifted}")
+    for report in stats["recent_drift"][:drifted]:
+        print(f"    {report['agent']:<16} {report['reason']}  {report.get('message', '')}")
+    if drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,5 @@
 # butler_agent_pkg/__init__.py
-from .agent import root_agent
\ No newline at end of file
+from .shared_libraries import startup_timing
+
+with startup_timing.timed("import"):
+    from .agent import root_agent
@@ -9,38 +9,35 @@ from .config import settings
 from . import butler_prompts
 from .tools import memory_tool
 from .common_tools import butler_common_tools
-from .sub_agents.recipe import recipe_agent
-from .service_concierge_agent import service_concierge_agent # Import the new agent
-from .profile_agent import user_profile_agent # Import UserProfileAgent
-from .task_manager_agent import task_manager_agent # Import TaskManagerAgent
-from .persona_generation_agent import persona_generation_agent # Import PersonaGenerationAgent
-from .inventory_agent import inventory_agent # Import InventoryAgent
-from .dietary_agent import dietary_agent # Import DietaryAgent
-from .shared_libraries import constants
+from .agent_registry import agent_registry
+from .shared_libraries import constants, metrics, startup_timing
+from .shared_libraries.cassette import cassette
+from .shared_libraries.fake_llm import register_fake_llm
+from .shared_libraries.response_cache import response_cache
+from .shared_libraries.tracing import tracer
 from .shared_libraries.types import UserProfile, Ingredient
 
 logger = logging.getLogger(__name__)
 
+register_fake_llm() # No-op unless FAKE_LLM_BASE_URL is set
 
-root_agent = Agent(
-    model=settings.DEFAULT_MODEL,
-    name="ButlerAgent",
-    description="The main orchestrating agent for Local Butler AI. Understands user needs and delegates to specialized sub-agents or handles general queries.",
-    instruction=butler_prompts.ROOT_AGENT_INSTRUCTION,
-    tools=butler_common_tools,
-    sub_agents=[
-        recipe_agent, # Add RecipeAgent as a sub-agent
-        service_concierge_agent, # Add ServiceConciergeAgent as a sub-agent
-        user_profile_agent, # Add UserProfileAgent as a sub-agent
-        task_manager_agent, # Add TaskManagerAgent as a sub-agent
-        persona_generation_agent, # Add PersonaGenerationAgent as a sub-agent
-        inventory_agent, # Add InventoryAgent as a sub-agent
-        dietary_agent # Add DietaryAgent as a sub-agent
-    ],
-    before_agent_callback=memory_tool.initialize_session_state,
-    # enable_reflection=True, # Consider enabling for more complex reasoning if needed
-    # temperature=0.3, # Adjust temperature if needed for creativity vs. precision
-)
+
+with startup_timing.timed("agent:ButlerAgent"):
+    root_agent = Agent(
+        model=settings.DEFAULT_MODEL,
+        name="ButlerAgent",
+        description="The main orchestrating agent for Local Butler AI. Understands user needs and delegates to specialized sub-agents or handles general queries.",
+        instruction=butler_prompts.ROOT_AGENT_INSTRUCTION,
+        tools=butler_common_tools,
+        # Sub-agents are placeholders built on first transfer (see agent_registry.py)
+        sub_agents=agent_registry.lazy_sub_agents(),
+        before_agent_callback=memory_tool.initialize_session_state,
+        **response_cache.model_callbacks("ButlerAgent", state_keys=(constants.USER_PROFILE_KEY,)),
+        # enable_reflection=True, # Consider enabling for more complex reasoning if needed
+        # temperature=0.3, # Adjust temperature if needed for creativity vs. precision
+    )
+
+cassette.instrument(metrics.instrument(tracer.instrument(root_agent)))
 
 logger.info(f"ButlerAgent (root_agent) initialized with model: {settings.DEFAULT_MODEL}")
 logger.info(f"ButlerAgent (root_agent) tools: {[tool.func.__name__ for tool in root_agent.tools]}")
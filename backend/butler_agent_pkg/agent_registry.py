@@ -0,0 +1,169 @@
+# butler_agent_pkg/agent_registry.py
+"""Process-wide registry that builds the ButlerAgent's sub-agents on first use.
+
+Importing every sub-agent module eagerly constructs all of their Agents, FunctionTools and
+callbacks before the first request. That cost dominates scale-from-zero cold starts.
+The root agent is now given lightweight `LazyAgent` placeholders instead. A placeholder
+carries only the name and description used for the transfer instructions. The real agent
+is imported and constructed the first time control is transferred to it. It then replaces
+the placeholder in the tree, so later turns run it directly.
+
+Each sub-agent module is imported and built once per process via `agent_registry`. An ADK
+agent has a single parent, and transfers back to the root resolve through it. So the first
+root to transfer to a sub-agent adopts the built instance, and any other root (`root_agent`
+in agent.py and `butler_agent` in butler_agent.py can both be loaded) gets its own copy.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from .inventory_prompts import INVENTORY_AGENT_DESCRIPTION
+from .shared_libraries import metrics, startup_timing
+from .shared_libraries.cassette import cassette
+from .shared_libraries.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Where to find a sub-agent, plus the description the root needs before it is built."""
+    name: str
+    module: str # Imported relative to this package
+    attribute: str
+    description: str
+
+
+# Descriptions mirror the ones in each agent module (checked when the agent is built).
+SUB_AGENT_SPECS = [
+    AgentSpec("RecipeAgent", ".sub_agents.recipe.agent", "recipe_agent",
+              "A specialized agent for finding or generating recipes. It outputs structured recipe data and a conversational message."),
+    AgentSpec("ServiceConciergeAgent", ".service_concierge_agent", "service_concierge_agent",
+              "Handles requests for services like delivery, appointments, and other errands. Translates user needs into actionable tasks."),
+    AgentSpec("UserProfileAgent", ".profile_agent", "user_profile_agent",
+              "Manages user-specific data, including preferences (dietary, cuisine), interaction history, and other details necessary for personalization."),
+    AgentSpec("TaskManagerAgent", ".task_manager_agent", "task_manager_agent",
+              "Manages the lifecycle of all tasks, including creation, status tracking, updates, and retrieval from the database."),
+    AgentSpec("PersonaGenerationAgent", ".persona_generation_agent", "persona_generation_agent",
+              "Generates and updates a dynamic 'butler persona summary' reflecting user preferences and interaction style, using Gemini and data from the UserProfileAgent."),
+    AgentSpec("InventoryAgent", ".inventory_agent", "inventory_agent", INVENTORY_AGENT_DESCRIPTION),
+    AgentSpec("DietaryAgent", ".dietary_agent", "dietary_agent",
+              "Analyzes dietary needs, restrictions, and preferences. Provides advice on healthy eating, ingredient substitutions, and allergen information."),
+]
+
+
+class AgentRegistry:
+    """Builds each registered agent at most once per process, recording how long it took."""
+
+    def __init__(self, specs: List[AgentSpec]):
+        self._specs: Dict[str, AgentSpec] = {spec.name: spec for spec in specs}
+        self._agents: Dict[str, BaseAgent] = {}
+        self._copies: Dict[Tuple[int, str], BaseAgent] = {} # (id of root, name) -> that root's own instance
+        self._build_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock() # Builds may run in worker threads (see LazyAgent)
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._agents
+
+    def get(self, name: str, parent: Optional[BaseAgent] = None) -> BaseAgent:
+        """Returns the agent, importing and constructing it on first call.
+
+        With `parent`, returns the instance attached to that root: the built one if it is
+        unclaimed or already that root's, otherwise a copy made for that root.
+        """
+        agent = self._agents.get(name) or self._build(name)
+        if parent is None:
+            return agent
+        with self._lock:
+            if agent.parent_agent is None:
+                agent.parent_agent = parent
+            if agent.parent_agent is parent:
+                return agent
+            copy = self._copies.get((id(parent), name))
+            if copy is None:
+                copy = self._copies[(id(parent), name)] = agent.model_copy(update={"parent_agent": parent})
+                logger.info(f"Copied {name} for a second root agent.")
+            return copy
+
+    def _build(self, name: str) -> BaseAgent:
+        with self._lock:
+            if name in self._agents: # Built by another thread while we waited
+                return self._agents[name]
+            spec = self._specs[name]
+            started = time.perf_counter()
+            with startup_timing.timed(f"agent:{name}"):
+                module = importlib.import_module(spec.module, package=__package__)
+                agent = cassette.instrument(metrics.instrument(tracer.instrument(getattr(module, spec.attribute))))
+            elapsed = time.perf_counter() - started
+            if agent.description != spec.description:
+                logger.warning(f"AgentSpec description for '{name}' is out of date with its agent module.")
+            self._build_seconds[name] = elapsed
+            self._agents[name] = agent
+        logger.info(f"Built {name} on first use in {elapsed * 1000:.1f} ms.")
+        return agent
+
+    def preload(self) -> None:
+        """Builds every registered agent now (e.g. on instances kept warm with min-instances)."""
+        for name in self._specs:
+            self.get(name)
+
+    def lazy_sub_agents(self) -> List["LazyAgent"]:
+        """Fresh placeholders for a root agent's `sub_agents` (an agent can have only one parent)."""
+        return [LazyAgent(name=spec.name, description=spec.description) for spec in self._specs.values()]
+
+    def startup_breakdown(self) -> Dict[str, object]:
+        """Startup cost by phase. Phases do not overlap: `import` excludes the settings and the root
+        agent built while importing. Sub-agents not yet used have no construction time."""
+        phases = startup_timing.phases()
+        return {
+            "import_seconds": phases.get("import"),
+            "settings_seconds": phases.get("settings"),
+            "root_agent_seconds": phases.get("agent:ButlerAgent"),
+            "sub_agents": {
+                name: {"built": name in self._agents, "construction_seconds": self._build_seconds.get(name)}
+                for name in self._specs
+            },
+        }
+
+
+class LazyAgent(BaseAgent):
+    """Placeholder sub-agent that builds the real agent through the registry when first run."""
+
+    def _resolve(self, agent: BaseAgent) -> BaseAgent:
+        # Swap this root's instance into the tree so the runner and later transfers find it directly.
+        parent = self.parent_agent
+        if parent is not None:
+            parent.sub_agents = [agent if sub_agent is self else sub_agent for sub_agent in parent.sub_agents]
+        return agent
+
+    async def _build(self) -> BaseAgent:
+        if agent_registry.is_built(self.name):
+            return self._resolve(agent_registry.get(self.name, self.parent_agent))
+        # Importing the agent module blocks, so keep it off the event loop.
+        return self._resolve(await asyncio.to_thread(agent_registry.get, self.name, self.parent_agent))
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        agent = await self._build()
+        async for event in agent.run_async(ctx):
+            yield event
+
+    async def _run_live_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        agent = await self._build()
+        async for event in agent.run_live(ctx):
+            yield event
+
+
+# Process-wide registry shared by every root agent and route.
+agent_registry = AgentRegistry(SUB_AGENT_SPECS)
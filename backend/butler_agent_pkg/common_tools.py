@@ -12,6 +12,7 @@ from .tools import memory_tool
 # from .sub_agents.recipe import tools as recipe_specific_tools # Removed
 from .shared_libraries import types # For type hints
 from .shared_libraries import constants
+from .shared_libraries.log_pipeline import Payload
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ def save_recipe_wrapper(recipe_information_to_save: str, tool_context: ToolConte
     Returns:
         A confirmation message string.
     """
-    logger.info(f"Attempting to save recipe: {recipe_information_to_save[:100]}...")
+    logger.info("Attempting to save recipe: %s", Payload(recipe_information_to_save, 100))
     try:
         recipe_data = json.loads(recipe_information_to_save)
     except json.JSONDecodeError as e:
@@ -101,7 +102,8 @@ def generate_shopping_list_for_recipe_wrapper(recipe_id: str, tool_context: Tool
     """
     logger.info(f"Attempting to generate shopping list for recipe ID: {recipe_id}")
     recipe_memory_key = f"{constants.RECIPE_MEMORY_PREFIX}{recipe_id}"
-    recipe_data_string = butler_get_memory_wrapper(key=recipe_memory_key, tool_context=tool_context)
+    # get_memory returns {key: value}, with stored dicts and lists serialized back to JSON
+    recipe_data_string = butler_get_memory_wrapper(key=recipe_memory_key, tool_context=tool_context).get(recipe_memory_key)
 
     if not recipe_data_string or not isinstance(recipe_data_string, str):
         logger.error(f"Recipe with ID '{recipe_id}' not found or is not a string in memory.")
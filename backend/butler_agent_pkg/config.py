@@ -1,8 +1,11 @@
 # butler_agent_pkg/config.py
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
+from typing import Dict, Optional
 import logging
 
+from .shared_libraries import startup_timing
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,65 @@ class AppSettings(BaseSettings):
     LOCAL_BUTLER_API_KEY: str # Add this line
     DEFAULT_MODEL: str = "gemini-2.0-flash"
     LOG_LEVEL: str = "INFO"
+    LOG_ASYNC: bool = True # Write log records from a background thread (see shared_libraries/log_pipeline.py)
+    LOG_QUEUE_SIZE: int = 10000 # Records beyond this backlog are dropped rather than blocking requests
+    LOG_SAMPLE_RATES: Dict[str, float] = {} # Logger name -> fraction of INFO/DEBUG records kept, e.g. {"butler_agent_pkg.tools.inventory_tools": 0.1}
+
+    # /chat/batch limits
+    CHAT_BATCH_MAX_CONCURRENCY: int = 8 # Upper bound on agent turns in flight per batch request
+    CHAT_BATCH_ITEM_TIMEOUT_SECONDS: float = 120.0
+    CHAT_BATCH_MAX_ITEMS: int = 1000
+
+    # Exact-match model response cache (see shared_libraries/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: float = 6 * 60 * 60
+    RESPONSE_CACHE_DISK_PATH: Optional[str] = None # e.g. "/tmp/local_butler/response_cache.sqlite3"; None keeps the cache in memory only
+
+    # Near-duplicate recipe cache in front of RecipeAgent (see sub_agents/recipe/semantic_cache.py)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.8 # Minimum cosine similarity of the hashed n-gram query vectors
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 512
+
+    # Idempotency-Key replay window for POST /chat/
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+
+    # Persistent session state (see shared_libraries/session_store.py); None keeps sessions in memory only
+    SESSION_STORE_PATH: Optional[str] = None # e.g. "/data/local_butler/sessions.sqlite3"
+    SESSION_STORE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    SESSION_STORE_MAX_BATCH: int = 500 # Flush early once this many values are pending
+
+    # Per-request tracing (see shared_libraries/tracing.py); 0 disables it
+    TRACING_SAMPLE_RATE: float = 0.0 # Fraction of chat turns traced
+    TRACING_JSONL_PATH: Optional[str] = None # e.g. "/tmp/local_butler/traces.jsonl"; one span per line
+    TRACING_OTLP_ENDPOINT: Optional[str] = None # e.g. "http://localhost:4318/v1/traces"; needs opentelemetry-sdk
+
+    # Local stand-in for the Gemini API (see shared_libraries/fake_llm.py); use with DEFAULT_MODEL="fake-gemini"
+    FAKE_LLM_BASE_URL: Optional[str] = None # e.g. "http://127.0.0.1:8089" for backend/benchmarks/fake_llm_server.py
+
+    # Local fast path for simple inventory commands in /chat/ (see app/fast_path.py)
+    FAST_PATH_ENABLED: bool = True
+
+    # Record/replay of model calls (see shared_libraries/cassette.py)
+    CASSETTE_MODE: str = "off" # "off", "record" or "replay"
+    CASSETTE_DIR: str = "cassettes" # One JSON-lines file per recorded session
+    CASSETTE_ON_DRIFT: str = "error" # Unrecorded prompt in replay: "error" fails the call, "live" calls the real model
+
+    # Inventory backend (see tools/inventory_store.py); None keeps inventories in memory only
+    INVENTORY_DB_PATH: Optional[str] = None # e.g. "/data/local_butler/inventory.sqlite3"; SQLite in WAL mode, shared by all workers
+    INVENTORY_DB_POOL_SIZE: int = 4 # Connections kept open to INVENTORY_DB_PATH
+
+    # Change journal for the in-memory inventory backend (see tools/inventory_journal.py); None disables it
+    INVENTORY_JOURNAL_DIR: Optional[str] = None # e.g. "/data/local_butler/inventory_journal"; inventories are recovered from it at startup
+    INVENTORY_SNAPSHOT_EVERY: int = 500 # Journal entries per user between full snapshots
+    INVENTORY_JOURNAL_FSYNC: bool = False # fsync every append: survives power loss, not just process crashes
+
+    # Unit conversion (see shared_libraries/units.py)
+    INGREDIENT_DENSITIES: Dict[str, float] = {} # Grams per ml by ingredient, e.g. {"tahini": 1.07}; extends and overrides the built-in table
+
+    # Sub-agents are built on first transfer (see agent_registry.py); True builds them all at startup instead
+    AGENT_PRELOAD: bool = False
 
     # For Pydantic V2, model_config is used instead of class Config
     model_config = SettingsConfigDict(
@@ -23,7 +85,8 @@ class AppSettings(BaseSettings):
     )
 
 # Load settings
-settings = AppSettings()
+with startup_timing.timed("settings"):
+    settings = AppSettings()
 
 # Log to confirm API key presence (optional, for debugging)
 if settings.GEMINI_API_KEY:
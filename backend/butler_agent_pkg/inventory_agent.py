@@ -10,7 +10,7 @@ from google.adk.agents import Agent
 from google.adk.tools.function_tool import FunctionTool
 
 from .config import settings
-from .inventory_prompts import INVENTORY_AGENT_INSTRUCTION
+from .inventory_prompts import INVENTORY_AGENT_DESCRIPTION, INVENTORY_AGENT_INSTRUCTION
 from .tools import inventory_tools
 
 logger = logging.getLogger(__name__)
@@ -22,14 +22,18 @@ inventory_agent_tools = [
     FunctionTool(func=inventory_tools.remove_item_from_inventory),
     FunctionTool(func=inventory_tools.check_item_in_inventory),
     FunctionTool(func=inventory_tools.list_inventory_items),
+    FunctionTool(func=inventory_tools.add_items_bulk),
+    FunctionTool(func=inventory_tools.remove_items_bulk),
+    FunctionTool(func=inventory_tools.get_expiring_items),
 ]
 
 inventory_agent = Agent(
     model=settings.DEFAULT_MODEL,
     name="InventoryAgent",
-    description="Manages the user's kitchen inventory, including adding, removing, checking, and listing items.",
+    description=INVENTORY_AGENT_DESCRIPTION,
     instruction=INVENTORY_AGENT_INSTRUCTION,
     tools=inventory_agent_tools,
+    # Deliberately not opted into the response cache: its tool calls mutate the inventory.
 )
 
 logger.info(
@@ -0,0 +1,59 @@
+# butler_agent_pkg/shared_libraries/callbacks.py
+"""Helpers shared by the modules that hook ADK agent and model callbacks.
+
+- `prepend_callbacks` / `append_callbacks` chain a callback into an agent's callback
+  list, which ADK accepts as None, one callable or a list. Tracing, metrics and
+  cassettes use them in `instrument()`. Prepending runs the callback before the caches;
+  appending runs it only for calls that no earlier callback answered.
+- `normalized_contents` reduces a model request's contents to what decides its answer.
+  The response cache keys on it, cassettes fingerprint it, and the semantic recipe cache
+  scopes its entries by it.
+"""
+
+import re
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from google.adk.models import LlmRequest
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def as_list(callbacks: Any) -> List[Any]:
+    """An agent's callback attribute as a list."""
+    if callbacks is None:
+        return []
+    return list(callbacks) if isinstance(callbacks, list) else [callbacks]
+
+
+def prepend_callbacks(agent: Any, **callbacks: Any) -> None:
+    """Runs each callback first: `prepend_callbacks(agent, before_agent_callback=f)`."""
+    for attribute, callback in callbacks.items():
+        setattr(agent, attribute, [callback] + as_list(getattr(agent, attribute)))
+
+
+def append_callbacks(agent: Any, **callbacks: Any) -> None:
+    """Runs each callback last, after the agent's existing callbacks of that kind."""
+    for attribute, callback in callbacks.items():
+        setattr(agent, attribute, as_list(getattr(agent, attribute)) + [callback])
+
+
+def normalize_prompt_text(text: str) -> str:
+    """Case-folds and collapses whitespace so trivially different prompts share a key."""
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def normalized_contents(llm_request: "LlmRequest") -> list:
+    """Reduces request contents to role + text / function call / function response parts."""
+    normalized = []
+    for content in llm_request.contents or []:
+        parts = []
+        for part in content.parts or []:
+            if part.text:
+                parts.append(["text", normalize_prompt_text(part.text)])
+            elif part.function_call:
+                parts.append(["call", part.function_call.name, part.function_call.args])
+            elif part.function_response:
+                parts.append(["response", part.function_response.name, part.function_response.response])
+        normalized.append([content.role, parts])
+    return normalized
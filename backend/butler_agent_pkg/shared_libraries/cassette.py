@@ -0,0 +1,289 @@
+# butler_agent_pkg/shared_libraries/cassette.py
+"""Record/replay of model calls ("cassettes"), for deterministic regression runs on real traffic.
+
+With `CASSETTE_MODE=record`, every model call is appended to a per-session JSON-lines
+file in `CASSETTE_DIR`. An entry holds the agent name, a prompt fingerprint, the tool
+calls the model asked for, the full response and its latency. The fingerprint has
+separate hashes for the system instruction, the tool declarations and each message,
+plus a hash over all of them. The user message that started each turn is recorded
+too, so `python -m backend.benchmarks.replay_cassettes` can send the same turns again.
+
+With `CASSETTE_MODE=replay`, each model call is answered from the cassettes by
+(agent, prompt hash), and Gemini is never called. Session ids do not need to match:
+the prompt hash covers the whole conversation so far. A prompt with no recording is
+prompt drift. It is logged and reported by `stats()` (`GET /cassette/stats`), with the
+closest recording and where the prompt first differs. By default the call then fails
+with a `CASSETTE_DRIFT` error rather than serving a stale answer. With
+`CASSETTE_ON_DRIFT=live` the real model is called instead.
+
+Caches answer before the model is called, so their hits are never recorded. Record
+with `RESPONSE_CACHE_ENABLED=false SEMANTIC_CACHE_ENABLED=false`.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.models import LlmResponse
+
+from ..config import settings
+from .log_pipeline import Payload
+from .callbacks import normalized_contents, prepend_callbacks
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+DRIFT_ERROR_CODE = "CASSETTE_DRIFT"
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+_MAX_PENDING = 10000 # Calls that never complete must not grow the table forever
+
+
+def _hash(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_fingerprint(llm_request: Any) -> Dict[str, Any]:
+    """Hashes the parts of a model request that decide its answer. Function-call ids are left
+    out, so a replayed conversation matches its recording."""
+    config = llm_request.config
+    system_instruction = config.system_instruction if config else None
+    tools = [tool.model_dump(mode="json", exclude_none=True) for tool in (config.tools or [])] if config else []
+    fingerprint = {
+        "system": _hash(system_instruction.model_dump(mode="json", exclude_none=True)
+                        if hasattr(system_instruction, "model_dump") else str(system_instruction or "")),
+        "tools": _hash(tools),
+        "messages": [_hash(message) for message in normalized_contents(llm_request)],
+    }
+    fingerprint["prompt_hash"] = _hash([fingerprint["system"], fingerprint["tools"], fingerprint["messages"]])
+    return fingerprint
+
+
+def _tool_calls(llm_response: Any) -> List[Dict[str, Any]]:
+    content = llm_response.content
+    return [{"name": part.function_call.name, "args": part.function_call.args}
+            for part in (content.parts or [] if content else []) if part.function_call]
+
+
+def _message_preview(llm_request: Any, index: int) -> str:
+    contents = llm_request.contents or []
+    if index >= len(contents):
+        return ""
+    content = contents[index]
+    parts = []
+    for part in content.parts or []:
+        if part.text:
+            parts.append(part.text)
+        elif part.function_call:
+            parts.append(f"call {part.function_call.name}({part.function_call.args})")
+        elif part.function_response:
+            parts.append(f"response {part.function_response.name}")
+    return f"{content.role}: {' '.join(parts)}"[:200]
+
+
+def _session_id(callback_context: Any) -> str:
+    return callback_context._invocation_context.session.id
+
+
+class Cassette:
+    """Records model calls to cassette files, or answers them from cassette files. Thread-safe."""
+
+    def __init__(self, mode: str = "off", directory: str = "cassettes", on_drift: str = "error", keep_drift_reports: int = 100):
+        if mode not in MODES:
+            raise ValueError(f"CASSETTE_MODE must be one of {MODES}, got '{mode}'.")
+        if on_drift not in ("error", "live"):
+            raise ValueError(f"CASSETTE_ON_DRIFT must be 'error' or 'live', got '{on_drift}'.")
+        self.mode = mode
+        self.directory = directory
+        self.on_drift = on_drift
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self._seen_invocations: "deque[str]" = deque(maxlen=1000)
+        self._instrumented: set = set()
+        self.recorded = 0
+        self.replayed = 0
+        self.drifted = 0
+        self._drift_reports: "deque[Dict[str, Any]]" = deque(maxlen=keep_drift_reports)
+        # Replay index: (agent, prompt hash) -> recorded entries, and all entries per agent for drift reports
+        self._by_prompt: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._by_agent: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            os.makedirs(directory, exist_ok=True)
+            if settings.RESPONSE_CACHE_ENABLED or settings.SEMANTIC_CACHE_ENABLED:
+                logger.warning("Recording cassettes with response caches enabled: cache hits are not recorded and will drift on replay.")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # --- Cassette files ---
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, _UNSAFE_FILENAME_RE.sub("_", session_id) + ".jsonl")
+
+    def _write(self, session_id: str, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str)
+        with self._lock:
+            with open(self._path(session_id), "a", encoding="utf-8") as cassette_file:
+                cassette_file.write(line + "\n")
+
+    def _load(self) -> None:
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.jsonl")))
+        for entry in (entry for path in paths for entry in read_cassette(path)):
+            if entry.get("type") != "model":
+                continue
+            self._by_prompt.setdefault((entry["agent"], entry["prompt_hash"]), []).append(entry)
+            self._by_agent.setdefault(entry["agent"], []).append(entry)
+        logger.info("Loaded %d recorded model calls from %d cassettes in %s.", sum(map(len, self._by_agent.values())), len(paths), self.directory)
+
+    # --- Replay ---
+    def _lookup(self, agent_name: str, prompt_hash: str) -> Optional[Dict[str, Any]]:
+        """Returns a recorded entry for the prompt. Identical prompts recorded several times are served in turn."""
+        entries = self._by_prompt.get((agent_name, prompt_hash))
+        if not entries:
+            return None
+        with self._lock:
+            index = self._served.get((agent_name, prompt_hash), 0)
+            self._served[(agent_name, prompt_hash)] = index + 1
+        return entries[index % len(entries)]
+
+    def _drift_report(self, agent_name: str, session_id: str, fingerprint: Dict[str, Any], llm_request: Any) -> Dict[str, Any]:
+        """Describes how an unrecorded prompt differs from the closest recording for the same agent."""
+        report: Dict[str, Any] = {"time": time.time(), "agent": agent_name, "session_id": session_id, "prompt_hash": fingerprint["prompt_hash"]}
+        candidates = self._by_agent.get(agent_name)
+        if not candidates:
+            report["reason"] = "no recordings for this agent"
+            return report
+
+        messages = fingerprint["messages"]
+
+        def common_prefix(entry: Dict[str, Any]) -> int:
+            length = 0
+            for recorded, current in zip(entry["messages"], messages):
+                if recorded != current:
+                    break
+                length += 1
+            return length
+
+        closest = max(candidates, key=lambda entry: (entry["system"] == fingerprint["system"], entry["tools"] == fingerprint["tools"], common_prefix(entry)))
+        report["closest"] = {"session_id": closest["session_id"], "prompt_hash": closest["prompt_hash"]}
+        if closest["system"] != fingerprint["system"]:
+            report["reason"] = "system instruction changed"
+        elif closest["tools"] != fingerprint["tools"]:
+            report["reason"] = "tool declarations changed"
+        else:
+            index = common_prefix(closest)
+            report["reason"] = f"conversation differs at message {index}"
+            report["message"] = _message_preview(llm_request, index)
+        return report
+
+    # --- ADK callbacks ---
+    def _before_agent(self, callback_context: Any) -> None:
+        """Records the user message once per turn, when the first (root) agent starts."""
+        invocation_id = callback_context.invocation_id
+        with self._lock:
+            if invocation_id in self._seen_invocations:
+                return None
+            self._seen_invocations.append(invocation_id)
+        user_content = callback_context.user_content
+        query = " ".join(part.text for part in (user_content.parts or []) if part.text) if user_content else ""
+        session_id = _session_id(callback_context)
+        self._write(session_id, {"type": "turn", "time": time.time(), "session_id": session_id, "invocation_id": invocation_id, "query": query})
+        return None
+
+    def _before_model(self, callback_context: Any, llm_request: Any) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        fingerprint = prompt_fingerprint(llm_request)
+        if self.mode == "record":
+            with self._lock:
+                if len(self._pending) >= _MAX_PENDING:
+                    self._pending.clear()
+                self._pending[(callback_context.invocation_id, agent_name)] = (fingerprint, time.perf_counter())
+            return None
+
+        entry = self._lookup(agent_name, fingerprint["prompt_hash"])
+        if entry is not None:
+            self.replayed += 1
+            return LlmResponse.model_validate(entry["response"])
+
+        self.drifted += 1
+        report = self._drift_report(agent_name, _session_id(callback_context), fingerprint, llm_request)
+        self._drift_reports.append(report)
+        logger.warning("Cassette drift for %s (prompt %s): %s", agent_name, fingerprint["prompt_hash"], Payload(report))
+        if self.on_drift == "live":
+            return None
+        return LlmResponse(error_code=DRIFT_ERROR_CODE, error_message=f"No recorded response for this {agent_name} prompt ({report['reason']}).")
+
+    def _after_model(self, callback_context: Any, llm_response: Any) -> None:
+        if llm_response.partial: # Streaming calls report once per chunk; the last one holds the whole response
+            return None
+        agent_name = callback_context.agent_name
+        with self._lock:
+            pending = self._pending.pop((callback_context.invocation_id, agent_name), None)
+        if pending is None:
+            return None
+        fingerprint, started = pending
+        session_id = _session_id(callback_context)
+        self._write(session_id, {
+            "type": "model",
+            "time": time.time(),
+            "session_id": session_id,
+            "invocation_id": callback_context.invocation_id,
+            "agent": agent_name,
+            **fingerprint,
+            "tool_calls": _tool_calls(llm_response),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "response": llm_response.model_dump(mode="json", exclude_none=True),
+        })
+        self.recorded += 1
+        return None
+
+    def instrument(self, agent: Any) -> Any:
+        """Adds the record/replay callbacks to an agent (once). They run before the caches,
+        so a replayed call never reaches a cache or the model."""
+        if not self.enabled or id(agent) in self._instrumented:
+            return agent
+        self._instrumented.add(id(agent))
+        if self.mode == "record":
+            prepend_callbacks(agent, before_agent_callback=self._before_agent)
+        if hasattr(agent, "before_model_callback"): # LlmAgent only
+            prepend_callbacks(agent, before_model_callback=self._before_model)
+            if self.mode == "record":
+                prepend_callbacks(agent, after_model_callback=self._after_model)
+        return agent
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "drifted": self.drifted,
+            "recent_drift": list(reversed(self._drift_reports)),
+        }
+
+
+def read_cassette(path: str) -> List[Dict[str, Any]]:
+    """Reads one cassette file; a truncated last line (crash while recording) is skipped."""
+    entries = []
+    with open(path, encoding="utf-8") as cassette_file:
+        for line in cassette_file:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning("Skipping an unreadable line in cassette %s.", path)
+    return entries
+
+
+# Process-wide cassette; mode "off" (the default) installs no callbacks.
+cassette = Cassette(settings.CASSETTE_MODE, settings.CASSETTE_DIR, settings.CASSETTE_ON_DRIFT)
@@ -0,0 +1,48 @@
+# butler_agent_pkg/shared_libraries/fake_llm.py
+"""Points the agents at a local stand-in for the Gemini API (load testing without quota).
+
+With `FAKE_LLM_BASE_URL` set, `register_fake_llm()` registers a Gemini model class for
+the `fake-*` model names. Its client sends the usual `generateContent` /
+`streamGenerateContent` calls to that base URL instead of Google. Run the stand-in
+with `python -m backend.benchmarks.fake_llm_server` and set `DEFAULT_MODEL=fake-gemini`,
+so every agent uses it. Only the transport changes: requests, tool declarations and
+responses go through the same ADK code paths as in production.
+"""
+
+import logging
+from functools import cached_property
+
+from google.adk.models import Gemini
+from google.adk.models.registry import LLMRegistry
+from google.genai import Client, types
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FakeServerGemini(Gemini):
+    """Gemini model whose API client talks to `FAKE_LLM_BASE_URL`."""
+
+    @staticmethod
+    def supported_models() -> list:
+        return [r"fake-.*"]
+
+    @cached_property
+    def api_client(self) -> Client:
+        return Client(api_key="fake-llm", http_options=types.HttpOptions(base_url=settings.FAKE_LLM_BASE_URL))
+
+
+_registered = False
+
+
+def register_fake_llm() -> bool:
+    """Registers the `fake-*` models if `FAKE_LLM_BASE_URL` is set. Returns whether it did."""
+    global _registered
+    if not settings.FAKE_LLM_BASE_URL:
+        return False
+    if not _registered:
+        LLMRegistry.register(FakeServerGemini)
+        _registered = True
+        logger.warning(f"Fake LLM enabled: 'fake-*' models are served by {settings.FAKE_LLM_BASE_URL}.")
+    return True
@@ -0,0 +1,296 @@
+# butler_agent_pkg/shared_libraries/ingredient_names.py
+"""Loose matching of ingredient names: plurals, synonyms, brands and typos.
+
+`canonical_name()` maps a name to one spelling per ingredient:
+
+    "Tomatoes" -> "tomato"      "Heinz Baked Beans" -> "baked bean"
+    "scallions" -> "green onion"   "Organic large eggs" -> "egg"
+
+It case-folds and drops punctuation, removes brand names and packaging words
+(`BRANDS`, `DESCRIPTORS`), singularizes every word, then looks the phrase up in
+`SYNONYMS`. The brand, descriptor and synonym tables are canonicalized once at import,
+so the per-name work is a few dict lookups, and results are kept in an LRU cache.
+
+`NameIndex` resolves a query against a set of stored names (one user's pantry):
+
+1. an exact canonical match, a dict lookup;
+2. otherwise, for typos, candidates whose last word (the head noun: "tomato" in "roma
+   tomato") is within `WORD_SIMILARITY` of the query's, by trigram Dice similarity. An
+   inverted index from trigram to head word finds them without scanning every name.
+   Every other word on either side must match a word on the other, or be a variety word
+   (`VARIETIES`: "roma", "russet", "baby", ...) that doesn't change the ingredient. So
+   "tomatoes" finds "Roma tomatoes" but not "tomato paste", whose head noun is "paste".
+   Nor does it find "sun dried tomatoes": "butter" never resolves to "peanut butter",
+   "milk" to "coconut milk" or "sugar" to "brown sugar".
+
+Resolutions are cached per index until its names change.
+"""
+
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+WORD_SIMILARITY = 0.6 # Trigram Dice similarity for two words to count as a typo of each other
+
+BRANDS = (
+    "heinz", "kikkoman", "barilla", "kraft", "nestle", "hellmanns", "philadelphia", "lurpak", "president",
+    "kerrygold", "kelloggs", "quaker", "uncle bens", "knorr", "maggi", "oxo", "bisto", "mccormick", "tabasco",
+    "lee kum kee", "old el paso", "dolmio", "bertolli", "filippo berio", "hovis", "warburtons", "anchor", "cathedral city",
+    "great value", "kirkland", "kirkland signature", "trader joes", "tesco", "sainsburys", "asda", "aldi", "lidl",
+)
+DESCRIPTORS = (
+    "organic", "fresh", "freshly", "free range", "extra virgin", "store bought", "homemade", "home made",
+    "large", "medium", "small", "jumbo", "premium", "finest", "value", "original", "classic",
+)
+# Modifiers that name a variety or state of the same ingredient; only these may differ between a query and its match.
+VARIETIES = frozenset({
+    "roma", "cherry", "plum", "grape", "heirloom", "beefsteak", "vine", "ripened", "ripe", "raw", "whole", "baby",
+    "russet", "yukon", "gold", "maris", "piper", "king", "edward", "granny", "smith", "gala", "fuji", "honeycrisp",
+    "pink", "lady", "bramley", "braeburn", "navel", "medjool", "salted", "unsalted", "skinless", "boneless",
+})
+# Spelling -> canonical spelling; keys are canonicalized at import like any name.
+SYNONYMS = {
+    "scallion": "green onion", "spring onion": "green onion", "salad onion": "green onion",
+    "coriander leaf": "cilantro", "coriander leaves": "cilantro", "fresh coriander": "cilantro",
+    "aubergine": "eggplant", "courgette": "zucchini", "capsicum": "bell pepper", "sweet pepper": "bell pepper",
+    "rocket": "arugula", "garbanzo": "chickpea", "garbanzo bean": "chickpea", "chick pea": "chickpea",
+    "icing sugar": "powdered sugar", "confectioners sugar": "powdered sugar",
+    "plain flour": "all purpose flour", "ap flour": "all purpose flour", "cornflour": "cornstarch", "corn starch": "cornstarch",
+    "double cream": "heavy cream", "heavy whipping cream": "heavy cream", "single cream": "light cream",
+    "prawn": "shrimp", "minced beef": "ground beef", "beef mince": "ground beef", "mince": "ground beef",
+    "beetroot": "beet", "swede": "rutabaga", "mangetout": "snow pea", "bicarbonate of soda": "baking soda",
+    "bicarb": "baking soda", "caster sugar": "superfine sugar", "soya sauce": "soy sauce", "shoyu": "soy sauce",
+}
+
+_IRREGULAR = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife", "potatoes": "potato",
+              "tomatoes": "tomato", "mangoes": "mango", "geese": "goose", "teeth": "tooth", "mice": "mouse"}
+_INVARIANT = frozenset({"molasses", "hummus", "couscous", "asparagus", "swiss", "citrus", "grits", "series", "species",
+                        "bass", "watercress", "cress", "brussels", "octopus", "lemongrass", "jus"})
+
+
+def singular(word: str) -> str:
+    """A lower-case English noun in the singular: "berries" -> "berry", "loaves" -> "loaf"."""
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if len(word) <= 3 or word in _INVARIANT or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y" # "berries" -> "berry"
+    if word.endswith(("ches", "shes", "sses", "xes", "zes", "oes")):
+        return word[:-2] # "peaches" -> "peach"
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def _tokens(name: str) -> List[str]:
+    return _TOKEN_RE.findall(name.casefold().replace("'", "").replace("’", ""))
+
+
+def _strip_phrases(words: List[str], phrases: FrozenSet[Tuple[str, ...]], longest: int) -> List[str]:
+    """Removes every occurrence of the given word sequences, longest first."""
+    kept, index = [], 0
+    while index < len(words):
+        for size in range(min(longest, len(words) - index), 0, -1):
+            if tuple(words[index:index + size]) in phrases:
+                index += size
+                break
+        else:
+            kept.append(words[index])
+            index += 1
+    return kept
+
+
+def _phrase_table(phrases) -> Tuple[FrozenSet[Tuple[str, ...]], int]:
+    table = frozenset(tuple(_tokens(phrase)) for phrase in phrases)
+    return table, max(len(phrase) for phrase in table)
+
+
+_BRANDS, _LONGEST_BRAND = _phrase_table(BRANDS)
+_DESCRIPTORS, _LONGEST_DESCRIPTOR = _phrase_table(DESCRIPTORS)
+
+
+def _stemmed(name: str) -> str:
+    words = _tokens(name)
+    stripped = _strip_phrases(_strip_phrases(words, _BRANDS, _LONGEST_BRAND), _DESCRIPTORS, _LONGEST_DESCRIPTOR)
+    return " ".join(singular(word) for word in (stripped or words)) # A name that is all descriptors stays as it is
+
+
+_SYNONYMS = {_stemmed(spelling): _stemmed(canonical) for spelling, canonical in SYNONYMS.items()}
+
+
+@lru_cache(maxsize=4096)
+def canonical_name(name: str) -> str:
+    """The canonical spelling of an ingredient name; equal for plurals, synonyms and branded variants."""
+    stemmed = _stemmed(name)
+    return _SYNONYMS.get(stemmed, stemmed)
+
+
+@lru_cache(maxsize=4096)
+def _trigrams(word: str) -> FrozenSet[str]:
+    padded = f" {word} "
+    return frozenset(padded[start:start + 3] for start in range(len(padded) - 2))
+
+
+def word_similarity(word: str, other: str) -> float:
+    """Trigram Dice similarity of two words: 1.0 if equal, 0.0 if they share no trigram. Words of
+    three letters or fewer only match exactly, since one typo changes most of their trigrams."""
+    if word == other:
+        return 1.0
+    if len(word) <= 3 or len(other) <= 3:
+        return 0.0
+    grams, other_grams = _trigrams(word), _trigrams(other)
+    return 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+
+
+class NameIndex:
+    """Stored names by canonical form, with a trigram index over head nouns for typos.
+
+    Not thread-safe: callers serialize access (the inventory backends hold the user's lock).
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self._names: Dict[str, Dict[str, None]] = {} # canonical -> stored names (insertion-ordered)
+        self._order: Dict[str, int] = {} # canonical -> when it was first added, for ties
+        self._by_head: Dict[str, Set[str]] = {} # head word -> canonicals ending in it
+        self._postings: Dict[str, Set[str]] = {} # trigram -> head words containing it
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._added = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str) -> None:
+        canonical = canonical_name(name)
+        names = self._names.get(canonical)
+        if names is None:
+            names = self._names[canonical] = {}
+            self._order[canonical] = self._added
+            self._added += 1
+            head = canonical.rsplit(" ", 1)[-1]
+            if head not in self._by_head:
+                self._by_head[head] = set()
+                for gram in _trigrams(head):
+                    self._postings.setdefault(gram, set()).add(head)
+            self._by_head[head].add(canonical)
+        names[name] = None
+        self._cache.clear()
+
+    def discard(self, name: str) -> None:
+        canonical = canonical_name(name)
+        names = self._names.get(canonical)
+        if names is None or name not in names:
+            return
+        del names[name]
+        self._cache.clear()
+        if names:
+            return
+        del self._names[canonical], self._order[canonical]
+        head = canonical.rsplit(" ", 1)[-1]
+        self._by_head[head].discard(canonical)
+        if not self._by_head[head]:
+            del self._by_head[head]
+            for gram in _trigrams(head):
+                self._postings[gram].discard(head)
+                if not self._postings[gram]:
+                    del self._postings[gram]
+
+    def resolve(self, query: str) -> Optional[str]:
+        """The stored name `query` most likely means, or None. Stored names sharing a canonical
+        form resolve to the one added first."""
+        if query in self._cache:
+            self._cache.move_to_end(query)
+            return self._cache[query]
+        canonical = self._resolve_canonical(canonical_name(query))
+        resolved = next(iter(self._names[canonical])) if canonical is not None else None
+        self._cache[query] = resolved
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return resolved
+
+    def _resolve_canonical(self, canonical: str) -> Optional[str]:
+        if canonical in self._names:
+            return canonical
+        if not canonical:
+            return None
+        words = canonical.split()
+        head = words[-1]
+        heads = {head: 1.0} if head in self._by_head else {}
+        if len(head) > 3:
+            shared: Dict[str, int] = {}
+            for gram in _trigrams(head):
+                for candidate in self._postings.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            head_grams = len(_trigrams(head))
+            for candidate, count in shared.items():
+                similarity = 2 * count / (head_grams + len(_trigrams(candidate)))
+                if similarity >= WORD_SIMILARITY and len(candidate) > 3:
+                    heads[candidate] = max(heads.get(candidate, 0.0), similarity)
+
+        best: Optional[Tuple[int, float, int]] = None
+        best_canonical = None
+        for candidate_head, head_similarity in heads.items():
+            for candidate in self._by_head[candidate_head]:
+                matched = _match_modifiers(words[:-1], candidate.split()[:-1])
+                if matched is None:
+                    continue
+                unmatched, similarity = matched
+                score = (unmatched, -(head_similarity + similarity), self._order[candidate])
+                if best is None or score < best:
+                    best, best_canonical = score, candidate
+        return best_canonical
+
+
+def _match_modifiers(modifiers: List[str], candidate_modifiers: List[str]) -> Optional[Tuple[int, float]]:
+    """(words left unmatched, summed similarity of the matched ones), or None if a word on either side
+    matches nothing on the other and is not a variety word."""
+    unmatched, total = 0, 0.0
+    for words, others in ((modifiers, candidate_modifiers), (candidate_modifiers, modifiers)):
+        for word in words:
+            similarity = max((word_similarity(word, other) for other in others), default=0.0)
+            if similarity >= WORD_SIMILARITY:
+                total += similarity
+            elif word in VARIETIES:
+                unmatched += 1
+            else:
+                return None
+    return unmatched, total
+
+
+# Self-check and timing: python -m backend.butler_agent_pkg.shared_libraries.ingredient_names
+if __name__ == "__main__":
+    import random
+    import time
+
+    for name, expected in (("Tomatoes", "tomato"), ("Heinz Baked Beans", "baked bean"), ("scallions", "green onion"),
+                           ("Organic large eggs", "egg"), ("Extra Virgin Olive Oil", "olive oil"),
+                           ("confectioner's sugar", "powdered sugar"), ("Berries", "berry"), ("molasses", "molasses")):
+        assert canonical_name(name) == expected, (name, canonical_name(name))
+
+    pantry = NameIndex()
+    for name in ("Tomato", "tomato paste", "chicken breast", "green onions", "broccoli", "milk", "Roma tomatoes", "parsley",
+                 "peanut butter", "coconut milk", "sweet potatoes", "brown sugar", "garlic powder", "russet potatoes"):
+        pantry.add(name)
+    for query, expected in (("tomatoes", "Tomato"), ("Roma tomato", "Roma tomatoes"), ("cherry tomatoes", "Tomato"),
+                            ("scallion", "green onions"), ("brocoli", "broccoli"), ("parsly", "parsley"),
+                            ("chiken breast", "chicken breast"), ("potatoes", "russet potatoes"), ("milk", "milk"),
+                            ("silk", None), ("paste", None), ("onion", None), ("butter", None), ("buter", None),
+                            ("sugar", None), ("powder", None), ("sun dried tomatoes", None)):
+        assert pantry.resolve(query) == expected, (query, pantry.resolve(query))
+    print("Canonical names and resolutions as expected.")
+
+    rng = random.Random(0)
+    syllables = ["ba", "ri", "ko", "ta", "mel", "san", "por", "li", "che", "dra", "vo", "nu"]
+    big = NameIndex()
+    names = [" ".join("".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(rng.randint(1, 3))) for _ in range(5000)]
+    for name in names:
+        big.add(name)
+    queries = [name[:-1] + "x" if len(name) > 5 else name for name in rng.sample(names, 1000)] # One typo each
+    started = time.perf_counter()
+    resolved = sum(1 for query in queries if big._resolve_canonical(canonical_name(query)) is not None)
+    elapsed = time.perf_counter() - started
+    print(f"{len(big)} names: {resolved}/{len(queries)} typo queries resolved, {elapsed / len(queries) * 1e6:.0f} us per uncached lookup")
@@ -0,0 +1,173 @@
+# butler_agent_pkg/shared_libraries/log_pipeline.py
+"""Low-overhead logging for the request path.
+
+- Deferred formatting: call sites pass `%s` arguments instead of f-strings, so nothing is
+  formatted when the level is off or the record is sampled out. Wrap large values in
+  `Payload` to cap the rendered size; it renders with `reprlib`, which stops walking a
+  structure once the cap is reached.
+- Per-logger sampling: `SamplingFilter` keeps 1 in N INFO/DEBUG records per message
+  template (the first one always passes). Warnings and errors are never sampled.
+- Queue-backed output: `configure_logging` moves the root handlers behind a bounded queue
+  drained by a background thread, so stream and file I/O never block a request. When the
+  queue is full, records are dropped and counted instead of blocking.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import reprlib
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_PAYLOAD_MAX_CHARS = 200
+
+
+class _PayloadRepr(reprlib.Repr):
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.maxstring = max_chars
+        self.maxother = max_chars
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = 10
+        self.maxdict = 10
+        self.maxlevel = 4
+
+    def repr_instance(self, obj: Any, level: int) -> str:
+        fields = getattr(obj, "__dict__", None)
+        if fields is not None and hasattr(obj, "model_dump"): # Pydantic models: show fields without a full repr
+            return f"{type(obj).__name__}({self.repr1(fields, level - 1)})"
+        return super().repr_instance(obj, level)
+
+
+class Payload:
+    """Log argument rendered lazily and capped at `max_chars`, e.g. `logger.info("Inventory: %s", Payload(items))`."""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int = DEFAULT_PAYLOAD_MAX_CHARS):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, str):
+            rendered = value if len(value) <= self.max_chars else f"{value[:self.max_chars]}... ({len(value)} chars)"
+        else:
+            rendered = _PayloadRepr(self.max_chars).repr(value)
+        if len(rendered) > self.max_chars + 32:
+            rendered = rendered[:self.max_chars] + "..."
+        return rendered
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every `every_n`-th INFO/DEBUG record per message template; WARNING and above always pass."""
+
+    MAX_TEMPLATES = 1024 # Bounds the counter table if call sites log unformatted, ever-changing strings
+
+    def __init__(self, every_n: int):
+        super().__init__()
+        self.every_n = max(1, every_n)
+        self._counts: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every_n == 1:
+            return True
+        key = (record.msg, record.levelno) if isinstance(record.msg, str) else id(type(record.msg))
+        with self._lock:
+            if key not in self._counts and len(self._counts) >= self.MAX_TEMPLATES:
+                self._counts.clear()
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+            if count % self.every_n == 0:
+                return True
+            self.suppressed += 1
+            return False
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Merges the message on the calling thread (arguments may be mutated later) and leaves
+    the rest of the formatting (timestamps, tracebacks) and all I/O to the listener."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[_DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_sampling_filters: Dict[str, SamplingFilter] = {}
+
+
+def configure_logging(
+    level: str = "INFO",
+    async_output: bool = True,
+    queue_size: int = 10000,
+    sample_rates: Optional[Dict[str, float]] = None,
+) -> None:
+    """Sets the root level, installs per-logger sampling and (optionally) the queue-backed handler.
+
+    `sample_rates` maps logger names to the fraction of INFO/DEBUG records to keep (e.g.
+    `{"butler_agent_pkg.tools.inventory_tools": 0.1}`). Safe to call more than once.
+    """
+    global _queue_handler, _listener
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+
+    for name, sampling_filter in _sampling_filters.items():
+        logging.getLogger(name).removeFilter(sampling_filter)
+    _sampling_filters.clear()
+    for name, rate in (sample_rates or {}).items():
+        if 0 < rate < 1:
+            sampling_filter = SamplingFilter(round(1 / rate))
+            logging.getLogger(name).addFilter(sampling_filter)
+            _sampling_filters[name] = sampling_filter
+
+    if not async_output or _listener is not None:
+        return
+    if not root.handlers:
+        logging.basicConfig(level=level.upper())
+    output_handlers = list(root.handlers)
+    for handler in output_handlers:
+        root.removeHandler(handler)
+    _queue_handler = _DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    root.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *output_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Drains the queue and puts the original handlers back on the root logger."""
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    _listener.stop() # Processes every record still queued
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _queue_handler, _listener = None, None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "async_output": _listener is not None,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": {name: sampling_filter.suppressed for name, sampling_filter in _sampling_filters.items()},
+    }
@@ -0,0 +1,303 @@
+# butler_agent_pkg/shared_libraries/metrics.py
+"""Operational metrics in Prometheus text format.
+
+Counters, gauges and histograms are sharded per thread: every thread updates its own
+dict, with no lock and no contention on the request path. A scrape sums the shards.
+In CPython, copying a dict is atomic under the GIL, so a scrape never sees a torn shard.
+
+`instrument()` adds ADK callbacks that time every agent turn, tool call and model
+call, and count model tokens. `observe_turn()` counts chat turns by whether any model
+call was made. The HTTP-level metrics are recorded by middleware in `main.py`.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .callbacks import append_callbacks, prepend_callbacks
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class _ThreadShards:
+    """Per-thread dicts of running totals. Only the shard list itself is guarded, once per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[Any, float]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Any, float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def add(self, key: Any, amount: float) -> None:
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def totals(self) -> Dict[Any, float]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        totals: Dict[Any, float] = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _ThreadShards()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.totals().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values.add(labels, amount)
+
+
+class Gauge(_Metric):
+    """Gauge moved by inc/dec (e.g. in-flight requests)."""
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values.add(labels, amount)
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values.add(labels, -amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose value is read at scrape time, e.g. the number of sessions held by a service."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_format_value(self.read())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._values._shard()
+        bucket_key = (labels, bisect.bisect_left(self.buckets, value)) # Index len(buckets) means +Inf only
+        shard[bucket_key] = shard.get(bucket_key, 0) + 1
+        sum_key = (labels, "sum")
+        shard[sum_key] = shard.get(sum_key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        totals = self._values.totals()
+        for labels in sorted({labels for labels, _ in totals}):
+            cumulative = 0
+            for index, bound in enumerate(self.buckets + (float("inf"),)):
+                cumulative += totals.get((labels, index), 0)
+                le_label = 'le="%s"' % ("+Inf" if bound == float("inf") else bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(totals.get((labels, 'sum'), 0))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def callback_gauge(self, name: str, documentation: str, read: Callable[[], float]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, read))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "local_butler_http_request_duration_seconds", "HTTP request latency (streamed responses until the last chunk).", ("route", "method", "status"))
+HTTP_IN_FLIGHT = registry.gauge("local_butler_http_requests_in_flight", "HTTP requests currently being served.")
+AGENT_TURN_SECONDS = registry.histogram("local_butler_agent_turn_duration_seconds", "Duration of each agent activation.", ("agent",))
+TOOL_CALLS = registry.counter("local_butler_tool_calls_total", "FunctionTool invocations.", ("tool", "status"))
+TOOL_CALL_SECONDS = registry.histogram(
+    "local_butler_tool_call_duration_seconds", "FunctionTool latency.", ("tool",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+MODEL_CALLS = registry.counter("local_butler_model_calls_total", "Model calls (cache hits excluded).", ("agent", "model", "status"))
+MODEL_CALL_SECONDS = registry.histogram("local_butler_model_call_duration_seconds", "Model call latency.", ("agent",))
+MODEL_TOKENS = registry.counter("local_butler_model_tokens_total", "Tokens used by model calls.", ("agent", "type"))
+CHAT_TURNS = registry.counter(
+    "local_butler_chat_turns_total", "Chat turns by path (fast_path or agent) and whether any model call was made.", ("path", "model_called"))
+
+
+def _turns_without_model_ratio() -> float:
+    totals = CHAT_TURNS._values.totals()
+    turns = sum(totals.values())
+    return sum(count for (_, model_called), count in totals.items() if model_called == "false") / turns if turns else 0.0
+
+
+registry.callback_gauge(
+    "local_butler_chat_turns_without_model_ratio", "Fraction of chat turns served without any model call (fast path and cache hits).",
+    _turns_without_model_ratio)
+
+# Model calls made during the current chat turn; a one-element list so tasks spawned by the turn share it
+_turn_model_calls: "contextvars.ContextVar[Optional[List[int]]]" = contextvars.ContextVar("turn_model_calls", default=None)
+
+
+@contextmanager
+def observe_turn(path: str) -> Iterator[None]:
+    """Counts one chat turn in CHAT_TURNS, labelled by whether a model call was made inside it."""
+    model_calls = [0]
+    token = _turn_model_calls.set(model_calls)
+    try:
+        yield
+    finally:
+        try:
+            _turn_model_calls.reset(token)
+        except ValueError: # Async generator closed from another context
+            _turn_model_calls.set(None)
+        CHAT_TURNS.inc(path, "true" if model_calls[0] else "false")
+
+
+# --- ADK callbacks; all return None so they never alter the turn ---
+_MAX_OPEN_TIMERS = 10000 # Calls that never complete (a raising tool) must not grow the table forever
+_started: Dict[Any, Tuple[float, Any]] = {} # key -> (perf_counter at start, detail such as the model name)
+
+
+def _start(key: Any, detail: Any = None) -> None:
+    if len(_started) >= _MAX_OPEN_TIMERS:
+        _started.clear()
+    _started[key] = (time.perf_counter(), detail)
+
+
+def _stop(key: Any) -> Optional[Tuple[float, Any]]:
+    """Returns (elapsed seconds, detail) for a started timer, or None."""
+    started = _started.pop(key, None)
+    return None if started is None else (time.perf_counter() - started[0], started[1])
+
+
+def _before_agent(callback_context: Any) -> None:
+    _start(("agent", callback_context.invocation_id, callback_context.agent_name))
+    return None
+
+
+def _after_agent(callback_context: Any) -> None:
+    timer = _stop(("agent", callback_context.invocation_id, callback_context.agent_name))
+    if timer is not None:
+        AGENT_TURN_SECONDS.observe(timer[0], callback_context.agent_name)
+    return None
+
+
+def _before_model(callback_context: Any, llm_request: Any) -> None:
+    _start(("model", callback_context.invocation_id, callback_context.agent_name), llm_request.model)
+    model_calls = _turn_model_calls.get()
+    if model_calls is not None:
+        model_calls[0] += 1
+    return None
+
+
+def _after_model(callback_context: Any, llm_response: Any) -> None:
+    if llm_response.partial: # Streaming calls report once per chunk; the last one completes the call
+        return None
+    agent_name = callback_context.agent_name
+    timer = _stop(("model", callback_context.invocation_id, agent_name))
+    if timer is None:
+        return None
+    elapsed, model = timer
+    MODEL_CALLS.inc(agent_name, model or "unknown", "error" if llm_response.error_code else "ok")
+    MODEL_CALL_SECONDS.observe(elapsed, agent_name)
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        MODEL_TOKENS.inc(agent_name, "prompt", amount=usage.prompt_token_count or 0)
+        MODEL_TOKENS.inc(agent_name, "candidates", amount=usage.candidates_token_count or 0)
+    return None
+
+
+def _before_tool(tool: Any, args: Dict[str, Any], tool_context: Any) -> None:
+    _start(("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name))
+    return None
+
+
+def _after_tool(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> None:
+    timer = _stop(("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name))
+    if timer is not None:
+        failed = isinstance(tool_response, dict) and tool_response.get("status") == "error"
+        TOOL_CALLS.inc(tool.name, "error" if failed else "ok")
+        TOOL_CALL_SECONDS.observe(timer[0], tool.name)
+    return None
+
+
+_instrumented: set = set()
+
+
+def instrument(agent: Any) -> Any:
+    """Adds the metrics callbacks to an agent (once). The model timer starts after the cache
+    callbacks, so cache hits are not counted as model calls."""
+    if id(agent) in _instrumented:
+        return agent
+    _instrumented.add(id(agent))
+    prepend_callbacks(agent, before_agent_callback=_before_agent, after_agent_callback=_after_agent)
+    if hasattr(agent, "before_model_callback"): # LlmAgent only
+        append_callbacks(agent, before_model_callback=_before_model)
+        prepend_callbacks(agent, after_model_callback=_after_model, before_tool_callback=_before_tool, after_tool_callback=_after_tool)
+    return agent
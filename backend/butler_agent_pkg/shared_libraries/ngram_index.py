@@ -0,0 +1,162 @@
+# butler_agent_pkg/shared_libraries/ngram_index.py
+"""Local near-duplicate text index based on hashed character n-grams.
+
+Queries are vectorized without any network embedding service: each content word is
+padded and split into character n-grams, which are hashed into a fixed number of
+buckets. Cosine similarity between these sparse vectors tolerates word order,
+filler words ("recipe", "please") and small spelling differences.
+"""
+
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional, Set
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Filler words that carry no meaning for recipe lookups.
+STOPWORDS = frozenset({
+    "a", "an", "and", "any", "can", "could", "dish", "do", "for", "find", "give", "have", "how", "i", "idea",
+    "ideas", "in", "is", "it", "like", "make", "me", "meal", "my", "of", "on", "please", "recipe", "recipes",
+    "some", "something", "suggest", "the", "to", "want", "what", "with", "would", "you",
+})
+
+SparseVector = Dict[int, float]
+
+
+def vectorize(text: str, ngram_size: int = 3, num_buckets: int = 1 << 18) -> SparseVector:
+    """Returns an L2-normalized sparse vector of hashed character n-grams."""
+    counts: Dict[int, float] = {}
+    for token in _TOKEN_RE.findall(text.casefold()):
+        if token in STOPWORDS:
+            continue
+        padded = f" {token} "
+        for start in range(max(1, len(padded) - ngram_size + 1)):
+            # crc32 is stable across processes, unlike the salted built-in hash()
+            bucket = zlib.crc32(padded[start:start + ngram_size].encode("utf-8")) % num_buckets
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    if norm == 0:
+        return {}
+    return {bucket: value / norm for bucket, value in counts.items()}
+
+
+@dataclass
+class IndexMatch:
+    """A stored entry and its similarity to the query."""
+    entry_id: int
+    similarity: float
+    text: str
+    payload: Any
+
+
+@dataclass
+class _Entry:
+    text: str
+    vector: SparseVector
+    partition: Hashable
+    payload: Any
+    buckets: Set[int] = field(default_factory=set)
+
+
+class NgramIndex:
+    """A bounded, thread-safe similarity index with LRU eviction.
+
+    Entries live in partitions (e.g. a user's dietary restrictions); a lookup only
+    considers entries in the same partition. An inverted index from n-gram bucket to
+    entry ids keeps lookups proportional to the overlapping entries, not the index size.
+    """
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.8, ngram_size: int = 3):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ngram_size = ngram_size
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._postings: Dict[Hashable, Dict[int, Set[int]]] = {} # partition -> bucket -> entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, text: str, payload: Any, partition: Hashable = None) -> Optional[int]:
+        """Stores `payload` under `text`. Returns the entry id, or None if the text has no content words."""
+        vector = vectorize(text, self.ngram_size)
+        if not vector:
+            return None
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            entry = _Entry(text=text, vector=vector, partition=partition, payload=payload, buckets=set(vector))
+            self._entries[entry_id] = entry
+            postings = self._postings.setdefault(partition, {})
+            for bucket in entry.buckets:
+                postings.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest_locked()
+            return entry_id
+
+    def lookup(self, text: str, partition: Hashable = None, threshold: Optional[float] = None) -> Optional[IndexMatch]:
+        """Returns the most similar entry in `partition` if its cosine similarity reaches the threshold."""
+        threshold = self.threshold if threshold is None else threshold
+        vector = vectorize(text, self.ngram_size)
+        with self._lock:
+            best = self._best_match_locked(vector, partition)
+            if best is None or best.similarity < threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.entry_id)
+            self.hits += 1
+            return best
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "threshold": self.threshold,
+            }
+
+    def _best_match_locked(self, vector: SparseVector, partition: Hashable) -> Optional[IndexMatch]:
+        postings = self._postings.get(partition)
+        if not vector or not postings:
+            return None
+        scores: Dict[int, float] = {}
+        for bucket, weight in vector.items():
+            for entry_id in postings.get(bucket, ()):
+                scores[entry_id] = scores.get(entry_id, 0.0) + weight * self._entries[entry_id].vector[bucket]
+        if not scores:
+            return None
+        entry_id = max(scores, key=scores.__getitem__)
+        entry = self._entries[entry_id]
+        return IndexMatch(entry_id=entry_id, similarity=scores[entry_id], text=entry.text, payload=entry.payload)
+
+    def _evict_oldest_locked(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        postings = self._postings.get(entry.partition, {})
+        for bucket in entry.buckets:
+            ids = postings.get(bucket)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del postings[bucket]
+        if not postings:
+            self._postings.pop(entry.partition, None)
+        self.evictions += 1
+
+
+def similarity(text_a: str, text_b: str, ngram_size: int = 3) -> float:
+    """Cosine similarity of two texts (handy for tuning the threshold)."""
+    vector_a, vector_b = vectorize(text_a, ngram_size), vectorize(text_b, ngram_size)
+    return sum(weight * vector_b.get(bucket, 0.0) for bucket, weight in vector_a.items())
+
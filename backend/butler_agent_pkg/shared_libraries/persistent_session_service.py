@@ -0,0 +1,76 @@
+# butler_agent_pkg/shared_libraries/persistent_session_service.py
+"""ADK session service that persists state deltas to the SessionStateStore."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService, Session
+
+from .session_store import MISSING, SessionStateStore
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentSessionService(InMemorySessionService):
+    """In-memory sessions whose state survives restarts and is shared between workers.
+
+    Every state delta appended to a session is queued on the write-behind store.
+    After a restart, a known session is recreated on first access with all its stored
+    state, so callbacks, instruction templates and cache keys see it like before. A
+    session already in memory first takes in the values other workers stored since this
+    worker last read it. Store reads run in a worker thread: they can wait on a flush.
+    """
+
+    def __init__(self, store: SessionStateStore):
+        super().__init__()
+        self.store = store
+        self._last_rows: Dict[Tuple[str, str, str], int] = {} # Session -> last store rowid taken in
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        self.store.register_session(app_name, user_id, session.id)
+        if state:
+            self.store.enqueue(app_name, user_id, session.id, state)
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Any = None) -> Optional[Session]:
+        session = await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+        key = (app_name, user_id, session_id)
+        if session is None:
+            if not await asyncio.to_thread(self.store.has_session, app_name, user_id, session_id):
+                return None
+            state, self._last_rows[key] = await asyncio.to_thread(self.store.load_session, app_name, user_id, session_id)
+            await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+            logger.info(f"Restored persisted session '{session_id}' for user '{user_id}' with {len(state)} state values.")
+        else:
+            changes, self._last_rows[key] = await asyncio.to_thread(
+                self.store.changes_since, app_name, user_id, session_id, self._last_rows.get(key, 0)
+            )
+            changes = {name: value for name, value in changes.items() if session.state.get(name, MISSING) != value} # Not its own writes
+            if not changes:
+                return session
+            # Applied like any state change, but not queued again: these values are already stored
+            await super().append_event(session=session, event=Event(author="user", actions=EventActions(state_delta=changes)))
+            logger.info(f"Session '{session_id}' took in {len(changes)} state values stored by another worker.")
+        # Read back through get_session, which merges the app: and user: state into the session
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._last_rows.pop((app_name, user_id, session_id), None)
+        await asyncio.to_thread(self.store.delete_session, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if not event.partial and event.actions and event.actions.state_delta:
+            self.store.enqueue(session.app_name, session.user_id, session.id, event.actions.state_delta)
+        return event
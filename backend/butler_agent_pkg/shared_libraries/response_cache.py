@@ -0,0 +1,212 @@
+# butler_agent_pkg/shared_libraries/response_cache.py
+"""Exact-match cache for agent model calls.
+
+Hooks into ADK's `before_model_callback` / `after_model_callback`: a hit returns the
+stored `LlmResponse` and skips the Gemini call entirely. Entries are keyed by agent
+name, model, a normalized form of the request contents, the agent instruction and a
+hash of the session-state keys the agent depends on, so requests that only differ
+by session id share an entry.
+
+Caching is opt-in per agent via `model_callbacks()`. Agents whose tools mutate
+external state (InventoryAgent) must not be cached.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from ..config import settings
+from .callbacks import normalized_contents
+
+logger = logging.getLogger(__name__)
+
+# Agents whose turns have side effects outside the session; caching them could skip writes.
+NEVER_CACHE_AGENTS = frozenset({"InventoryAgent"})
+# Model calls awaiting their response. A call that raises or is cancelled never reaches
+# after_model_callback, so the oldest entries are dropped beyond this many.
+MAX_PENDING_CALLS = 1024
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def build_cache_key(
+    agent_name: str,
+    model: str,
+    llm_request: LlmRequest,
+    state: Any,
+    state_keys: Iterable[str],
+) -> str:
+    """Builds a stable SHA-256 key for a model call. `state` is the session state (anything with `.get`)."""
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    key_material = {
+        "agent": agent_name,
+        "model": model,
+        "instruction": str(system_instruction or ""),
+        "contents": normalized_contents(llm_request),
+        "state": {key: state.get(key) for key in state_keys},
+    }
+    encoded = json.dumps(key_material, sort_keys=True, default=_jsonable)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU with TTL plus an optional SQLite tier that survives restarts.
+
+    Values are serialized `LlmResponse` JSON strings. All methods are thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[Tuple[str, str], str]" = OrderedDict() # (invocation_id, agent_name) -> key awaiting a response
+        self._stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._agent_stats: Dict[str, Dict[str, int]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(disk_path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(disk_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+        logger.info(f"Response cache disk tier opened at '{disk_path}'.")
+
+    # --- Core get/put ---
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expired"] += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    self._insert_locked(key, row[0], row[1]) # Promote to memory
+                    return row[0]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._insert_locked(key, value, expires_at)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._db.commit()
+
+    def _insert_locked(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, overall and per agent."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": (self._stats["hits"] / lookups) if lookups else 0.0,
+                "agents": {name: dict(counters) for name, counters in self._agent_stats.items()},
+            }
+
+    def _count(self, agent_name: str, counter: str) -> None:
+        with self._lock:
+            counters = self._agent_stats.setdefault(agent_name, {"hits": 0, "misses": 0})
+            counters[counter] += 1
+
+    # --- ADK callbacks ---
+    def model_callbacks(self, agent_name: str, state_keys: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Returns `before_model_callback` / `after_model_callback` kwargs that opt an agent into caching.
+
+        `state_keys` lists the session-state keys whose values change the agent's answer
+        (e.g. the user profile for RecipeAgent); they become part of the cache key.
+        """
+        if agent_name in NEVER_CACHE_AGENTS:
+            raise ValueError(f"Agent '{agent_name}' performs mutations and must not use the response cache.")
+
+        def before_model_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return None
+            key = build_cache_key(
+                agent_name,
+                llm_request.model or settings.DEFAULT_MODEL,
+                llm_request,
+                callback_context.state,
+                state_keys,
+            )
+            cached = self.get(key)
+            if cached is not None:
+                self._count(agent_name, "hits")
+                logger.info(f"Response cache hit for {agent_name} (key {key[:12]}).")
+                return LlmResponse.model_validate_json(cached)
+            self._count(agent_name, "misses")
+            with self._lock:
+                self._pending[(callback_context.invocation_id, agent_name)] = key
+                self._pending.move_to_end((callback_context.invocation_id, agent_name))
+                while len(self._pending) > MAX_PENDING_CALLS:
+                    self._pending.popitem(last=False)
+            return None
+
+        def after_model_callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+            if llm_response.partial:
+                return None # Only complete responses are cached
+            with self._lock:
+                key = self._pending.pop((callback_context.invocation_id, agent_name), None)
+            if key is None or llm_response.error_code or not llm_response.content:
+                return None
+            self.put(key, llm_response.model_dump_json(exclude_none=True))
+            return None
+
+        return {"before_model_callback": before_model_callback, "after_model_callback": after_model_callback}
+
+
+# Process-wide cache shared by all opted-in agents
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    disk_path=settings.RESPONSE_CACHE_DISK_PATH,
+)
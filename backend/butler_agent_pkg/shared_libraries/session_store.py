@@ -0,0 +1,330 @@
+# butler_agent_pkg/shared_libraries/session_store.py
+"""Durable, write-behind storage for session state (SQLite in WAL mode).
+
+Session state (user_profile, chat_history, recipe_detail_*, shopping_list_*) normally
+lives only in the in-process ADK session and is lost when the instance recycles.
+`SessionStateStore` persists the state deltas written by the memory tools:
+
+- Writes are queued in memory (latest value per key wins) and flushed in one
+  transaction by a background thread, so the request path never waits on disk.
+- A session recreated after a restart gets all its values back at once
+  (`load_session`, called by `PersistentSessionService.get_session`). Pending writes
+  are visible to it.
+- Several workers can share one database. A worker holding a session in memory picks
+  up the values other workers flushed since it last looked (`changes_since`, on every
+  `get_session`). Each write gets a new SQLite rowid, larger than any before it, so
+  "since" is the last rowid seen. Concurrent turns of one session on two workers
+  still race: the later flush of a key wins.
+- Each flush is a single SQLite transaction, so a crash mid-flush leaves either the
+  previous or the new batch, never a mix. Writes still queued at the crash (at most
+  one flush interval) are lost.
+
+Key scoping follows ADK conventions: `app:` keys are shared per app, `user:` keys per
+user, `temp:` keys are never persisted.
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from ..config import settings
+from . import types as shared_types
+
+logger = logging.getLogger(__name__)
+
+MISSING = object() # Returned by reads when a key was never stored
+
+_MODEL_TAG = "__pydantic_model__"
+
+ScopedKey = Tuple[str, str, str, str] # (app_name, user_id, session_id, key)
+
+
+def _encode(value: Any) -> str:
+    def default(obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            return {_MODEL_TAG: type(obj).__name__, "data": obj.model_dump(mode="json")}
+        return str(obj)
+    return json.dumps(value, default=default)
+
+
+def _decode(encoded: str) -> Any:
+    def object_hook(obj: Dict[str, Any]) -> Any:
+        model_name = obj.get(_MODEL_TAG)
+        model_class = getattr(shared_types, model_name, None) if isinstance(model_name, str) else None
+        if isinstance(model_class, type) and issubclass(model_class, BaseModel):
+            return model_class.model_validate(obj["data"])
+        return obj
+    return json.loads(encoded, object_hook=object_hook)
+
+
+def scope_key(app_name: str, user_id: str, session_id: str, key: str) -> Optional[ScopedKey]:
+    """Maps a state key to its storage scope, or None for keys that must not be persisted."""
+    if key.startswith("temp:"):
+        return None
+    if key.startswith("app:"):
+        return (app_name, "", "", key)
+    if key.startswith("user:"):
+        return (app_name, user_id, "", key)
+    return (app_name, user_id, session_id, key)
+
+
+class SessionStateStore:
+    """Write-behind SQLite store for per-session state values."""
+
+    def __init__(self, db_path: str, flush_interval_seconds: float = 0.5, max_batch: int = 500, read_cache_size: int = 4096):
+        self.db_path = db_path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch = max_batch
+        self.read_cache_size = read_cache_size
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # Durable across process crashes in WAL mode
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            " app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL, key TEXT NOT NULL,"
+            " value TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (app_name, user_id, session_id, key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (app_name, user_id, session_id))"
+        )
+        self._db_lock = threading.Lock()
+
+        self._pending: Dict[ScopedKey, str] = {} # Encoded values waiting to be flushed
+        self._pending_sessions: Set[Tuple[str, str, str]] = set()
+        self._pending_lock = threading.Lock()
+        self._read_cache: "OrderedDict[ScopedKey, Optional[str]]" = OrderedDict() # None caches a miss
+
+        self.flushes = 0
+        self.flushed_values = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="session-state-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        logger.info(f"Session state store opened at '{db_path}' (flush every {flush_interval_seconds}s).")
+
+    # --- Writes (memory only on the caller's path) ---
+    def register_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._pending_lock:
+            self._pending_sessions.add((app_name, user_id, session_id))
+
+    def enqueue(self, app_name: str, user_id: str, session_id: str, delta: Dict[str, Any]) -> None:
+        """Queues a state delta. Values are serialized now, so later in-place mutations don't leak in."""
+        encoded = {}
+        for key, value in delta.items():
+            scoped = scope_key(app_name, user_id, session_id, key)
+            if scoped is not None:
+                encoded[scoped] = _encode(value)
+        if not encoded:
+            return
+        with self._pending_lock:
+            self._pending_sessions.add((app_name, user_id, session_id))
+            self._pending.update(encoded)
+            for scoped, value in encoded.items():
+                self._cache_locked(scoped, value)
+            backlog = len(self._pending)
+        if backlog >= self.max_batch:
+            self._wake.set()
+
+    # --- Reads ---
+    def get(self, app_name: str, user_id: str, session_id: str, key: str) -> Any:
+        """Returns the stored value for one key, or MISSING."""
+        scoped = scope_key(app_name, user_id, session_id, key)
+        if scoped is None:
+            return MISSING
+        with self._pending_lock:
+            if scoped in self._read_cache:
+                self._read_cache.move_to_end(scoped)
+                encoded = self._read_cache[scoped]
+                return MISSING if encoded is None else _decode(encoded)
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?", scoped
+            ).fetchone()
+        with self._pending_lock:
+            # A write may have landed while we were reading the database; it wins.
+            if scoped in self._pending:
+                return _decode(self._pending[scoped])
+            self._cache_locked(scoped, row[0] if row else None)
+        return _decode(row[0]) if row else MISSING
+
+    def _session_rows(self, app_name: str, user_id: str, session_id: str, since: int) -> Tuple[Dict[str, str], int]:
+        """Encoded values the session sees (its own keys, its user's `user:` keys and the `app:` keys) written
+        after rowid `since`, and the last rowid among them (or `since`)."""
+        # One primary-key lookup per scope; only the session's own rows are read, whatever `since` is
+        scopes = ((user_id, session_id), (user_id, ""), ("", ""))
+        with self._db_lock:
+            rows = self._conn.execute(
+                " UNION ALL ".join(["SELECT rowid, key, value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ? AND rowid > ?"] * 3)
+                + " ORDER BY 1",
+                [value for scope_user, scope_session in scopes for value in (app_name, scope_user, scope_session, since)],
+            ).fetchall()
+        return {key: value for _, key, value in rows}, (rows[-1][0] if rows else since)
+
+    def load_session(self, app_name: str, user_id: str, session_id: str) -> Tuple[Dict[str, Any], int]:
+        """Every stored value the session sees, by key, and the rowid to pass to `changes_since` next."""
+        encoded, last_row = self._session_rows(app_name, user_id, session_id, 0)
+        scopes = ((user_id, session_id), (user_id, ""), ("", ""))
+        with self._pending_lock:
+            for scoped, value in self._pending.items():
+                if scoped[0] == app_name and scoped[1:3] in scopes:
+                    encoded[scoped[3]] = value # Not flushed yet: newer than the database
+        return {key: _decode(value) for key, value in encoded.items()}, last_row
+
+    def changes_since(self, app_name: str, user_id: str, session_id: str, since: int) -> Tuple[Dict[str, Any], int]:
+        """Values written to the database after rowid `since` (by any worker), except keys this process has
+        newer pending writes for, and the rowid to pass next time."""
+        encoded, last_row = self._session_rows(app_name, user_id, session_id, since)
+        with self._pending_lock:
+            for key in list(encoded):
+                if scope_key(app_name, user_id, session_id, key) in self._pending:
+                    del encoded[key]
+        return {key: _decode(value) for key, value in encoded.items()}, last_row
+
+    def has_session(self, app_name: str, user_id: str, session_id: str) -> bool:
+        with self._pending_lock:
+            if (app_name, user_id, session_id) in self._pending_sessions:
+                return True
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", (app_name, user_id, session_id)
+            ).fetchone()
+        return row is not None
+
+    def delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        self.flush()
+        with self._pending_lock:
+            for scoped in [k for k in self._read_cache if k[:3] == (app_name, user_id, session_id)]:
+                del self._read_cache[scoped]
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", (app_name, user_id, session_id))
+            self._conn.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", (app_name, user_id, session_id))
+            self._conn.execute("COMMIT")
+
+    def _cache_locked(self, scoped: ScopedKey, encoded: Optional[str]) -> None:
+        self._read_cache[scoped] = encoded
+        self._read_cache.move_to_end(scoped)
+        while len(self._read_cache) > self.read_cache_size:
+            self._read_cache.popitem(last=False)
+
+    # --- Flushing ---
+    def flush(self) -> int:
+        """Writes all pending values in one transaction. Returns the number of values written."""
+        with self._pending_lock:
+            batch, self._pending = self._pending, {}
+            sessions, self._pending_sessions = self._pending_sessions, set()
+        if not batch and not sessions:
+            return 0
+        now = time.time()
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO sessions (app_name, user_id, session_id, created_at) VALUES (?, ?, ?, ?)",
+                        [(*session, now) for session in sessions],
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO session_state (app_name, user_id, session_id, key, value, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(*scoped, value, now) for scoped, value in batch.items()],
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.error(f"Session state flush failed, will retry: {e}", exc_info=True)
+            with self._pending_lock:
+                for scoped, value in batch.items():
+                    self._pending.setdefault(scoped, value) # Newer writes made during the flush win
+                self._pending_sessions |= sessions
+            return 0
+        self.flushes += 1
+        self.flushed_values += len(batch)
+        return len(batch)
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stops the flush thread after a final flush."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {"pending_values": pending, "flushes": self.flushes, "flushed_values": self.flushed_values}
+
+
+# Process-wide store; None keeps session state in memory only (the default).
+session_state_store: Optional[SessionStateStore] = (
+    SessionStateStore(
+        settings.SESSION_STORE_PATH,
+        flush_interval_seconds=settings.SESSION_STORE_FLUSH_INTERVAL_SECONDS,
+        max_batch=settings.SESSION_STORE_MAX_BATCH,
+    )
+    if settings.SESSION_STORE_PATH
+    else None
+)
+
+
+# Crash-recovery check: SIGKILLs a writer process mid-flush and verifies every batch landed atomically.
+if __name__ == "__main__":
+    import multiprocessing
+    import os
+    import random
+    import signal
+    import tempfile
+
+    KEYS_PER_BATCH = 200
+
+    def writer(db_path: str) -> None:
+        store = SessionStateStore(db_path, flush_interval_seconds=0.001)
+        batch_number = 0
+        while True:
+            batch_number += 1
+            delta = {f"recipe_detail_{i}": {"batch": batch_number, "payload": "x" * 200} for i in range(KEYS_PER_BATCH)}
+            store.enqueue("local_butler", "user_1", "session_1", delta)
+            store.flush()
+
+    for trial in range(10):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "sessions.sqlite3")
+            process = multiprocessing.get_context("fork").Process(target=writer, args=(db_path,))
+            process.start()
+            time.sleep(random.uniform(0.2, 0.6))
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+            recovered = SessionStateStore(db_path)
+            with recovered._db_lock:
+                assert recovered._conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+                keys = [row[0] for row in recovered._conn.execute("SELECT key FROM session_state")]
+            batches = {recovered.get("local_butler", "user_1", "session_1", key)["batch"] for key in keys}
+            assert len(keys) in (0, KEYS_PER_BATCH), f"Partial batch: {len(keys)} keys"
+            assert len(batches) <= 1, f"Mixed batches after crash: {sorted(batches)}"
+            assert recovered.has_session("local_butler", "user_1", "session_1") or not keys
+            recovered.close()
+            print(f"Trial {trial + 1}: killed mid-write, recovered {len(keys)} keys from batch {batches or '-'}; database intact")
+    print("Recovery check passed.")
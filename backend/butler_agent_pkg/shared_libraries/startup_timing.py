@@ -0,0 +1,43 @@
+# butler_agent_pkg/shared_libraries/startup_timing.py
+"""Wall-clock timings of the startup phases (import, settings, agent construction).
+
+Phases nest: importing the package loads the settings and builds the root agent. A
+`timed` block records only its own time, without the `timed` blocks nested in it, so
+the phases add up to the total instead of counting the same seconds twice.
+
+Kept free of heavy imports so `config.py` can use it before anything else loads.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+_phases: Dict[str, float] = {}
+_lock = threading.Lock()
+_local = threading.local() # Per thread: seconds spent in nested blocks, one entry per open `timed` block
+
+
+def record(phase: str, seconds: float) -> None:
+    with _lock:
+        _phases[phase] = _phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Adds the duration of the `with` block, minus the `timed` blocks nested in it, to `phase`."""
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record(phase, elapsed - stack.pop())
+        if stack:
+            stack[-1] += elapsed
+
+
+def phases() -> Dict[str, float]:
+    with _lock:
+        return dict(_phases)
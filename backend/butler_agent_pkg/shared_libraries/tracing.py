@@ -0,0 +1,362 @@
+# butler_agent_pkg/shared_libraries/tracing.py
+"""Per-request traces of agent activations, transfers, tool calls and model calls.
+
+A sampled chat turn gets one trace. Its root span covers the whole turn, and child spans
+cover:
+
+- `agent`:    each agent activation (ButlerAgent, then RecipeAgent after a transfer, ...)
+- `model`:    each model call, with prompt/candidate/total token counts
+- `transfer`: each `transfer_to_agent` call
+- `tool`:     each FunctionTool invocation (`memorize`, `add_item_to_inventory`, ...)
+
+Spans are recorded from ADK agent/model/tool callbacks installed by `instrument()`.
+Finished traces are written as JSON lines (one span per line) and, if configured, sent
+to an OTLP collector. The OTLP exporter needs the optional `opentelemetry-sdk` and
+`opentelemetry-exporter-otlp-proto-http` packages. Export runs on a background thread.
+
+When a turn is not sampled, each callback costs one context-variable read.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..config import settings
+from .callbacks import append_callbacks, prepend_callbacks
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOOL_NAME = "transfer_to_agent"
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "kind", "agent", "start_ns", "end_ns", "status", "attributes")
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], agent: Optional[str] = None, **attributes: Any):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.agent = agent
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.attributes: Dict[str, Any] = attributes
+
+    def end(self, status: Optional[str] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if status:
+                self.status = status
+
+    def to_dict(self, trace_id: str) -> Dict[str, Any]:
+        return {
+            "trace_id": trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans of one turn. Agent spans form a stack because transfers nest agent runs."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, "request", None, **attributes)
+        self.spans: List[Span] = [self.root]
+        self._agent_stack: List[Span] = []
+        self._open: Dict[Any, Span] = {} # Model and tool spans by (kind, agent, call id)
+
+    def _parent_for(self, agent_name: Optional[str]) -> Span:
+        for span in reversed(self._agent_stack):
+            if span.agent == agent_name:
+                return span
+        return self._agent_stack[-1] if self._agent_stack else self.root
+
+    def start_span(self, name: str, kind: str, agent: Optional[str], **attributes: Any) -> Span:
+        span = Span(name, kind, self._parent_for(agent).span_id, agent=agent, **attributes)
+        self.spans.append(span)
+        return span
+
+    # --- Agent activations ---
+    def enter_agent(self, agent_name: str) -> None:
+        parent = self._agent_stack[-1] if self._agent_stack else self.root
+        span = Span(agent_name, "agent", parent.span_id, agent=agent_name)
+        self.spans.append(span)
+        self._agent_stack.append(span)
+
+    def exit_agent(self, agent_name: str) -> None:
+        for index in range(len(self._agent_stack) - 1, -1, -1):
+            if self._agent_stack[index].agent == agent_name:
+                span = self._agent_stack.pop(index)
+                self._close_children(span.span_id)
+                span.end()
+                return
+
+    # --- Model and tool calls ---
+    def open_call(self, key: Any, name: str, kind: str, agent: Optional[str], **attributes: Any) -> None:
+        self._open[key] = self.start_span(name, kind, agent, **attributes)
+
+    def close_call(self, key: Any, status: Optional[str] = None, **attributes: Any) -> Optional[Span]:
+        span = self._open.pop(key, None)
+        if span is not None:
+            span.attributes.update(attributes)
+            span.end(status)
+        return span
+
+    def _close_children(self, parent_id: str) -> None:
+        # Calls that never completed (a cache short-circuit, a raising tool) end with their agent.
+        for key in [key for key, span in self._open.items() if span.parent_id == parent_id]:
+            self._open.pop(key).end("unfinished")
+
+    def finish(self, status: Optional[str] = None) -> None:
+        for span in self._open.values():
+            span.end("unfinished")
+        self._open.clear()
+        for span in reversed(self._agent_stack):
+            span.end("unfinished")
+        self._agent_stack.clear()
+        token_totals: Dict[str, int] = {}
+        for span in self.spans:
+            for key in ("prompt_tokens", "candidate_tokens", "total_tokens"):
+                if key in span.attributes:
+                    token_totals[key] = token_totals.get(key, 0) + (span.attributes[key] or 0)
+        self.root.attributes.update(token_totals)
+        self.root.end(status)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [span.to_dict(self.trace_id) for span in self.spans]
+
+
+_current_trace: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar("local_butler_trace", default=None)
+
+
+def _usage_attributes(llm_response: Any) -> Dict[str, Any]:
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "candidate_tokens": usage.candidates_token_count,
+        "total_tokens": usage.total_token_count,
+    }
+
+
+# --- ADK callbacks (installed by Tracer.instrument); all return None so they never alter the turn ---
+def _before_agent(callback_context: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.enter_agent(callback_context.agent_name)
+    return None
+
+
+def _after_agent(callback_context: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.exit_agent(callback_context.agent_name)
+    return None
+
+
+def _before_model(callback_context: Any, llm_request: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        agent_name = callback_context.agent_name
+        trace.open_call(("model", agent_name), f"model:{llm_request.model}", "model", agent_name, model=llm_request.model)
+    return None
+
+
+def _after_model(callback_context: Any, llm_response: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None and not llm_response.partial: # Streaming calls report once per chunk; the last one closes the span
+        trace.close_call(
+            ("model", callback_context.agent_name),
+            status="error" if llm_response.error_code else None,
+            **_usage_attributes(llm_response),
+        )
+    return None
+
+
+def _before_tool(tool: Any, args: Dict[str, Any], tool_context: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        agent_name = tool_context.agent_name
+        key = ("tool", agent_name, tool_context.function_call_id or tool.name)
+        if tool.name == TRANSFER_TOOL_NAME:
+            trace.open_call(key, f"transfer:{agent_name}->{args.get('agent_name')}", "transfer", agent_name,
+                            from_agent=agent_name, to_agent=args.get("agent_name"))
+        else:
+            trace.open_call(key, f"tool:{tool.name}", "tool", agent_name, tool=tool.name)
+    return None
+
+
+def _after_tool(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        failed = isinstance(tool_response, dict) and tool_response.get("status") == "error"
+        trace.close_call(("tool", tool_context.agent_name, tool_context.function_call_id or tool.name), status="error" if failed else None)
+    return None
+
+
+class _OtlpForwarder:
+    """Re-creates finished spans with the OpenTelemetry SDK and hands them to its OTLP exporter."""
+
+    def __init__(self, endpoint: str):
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.trace import Status, StatusCode
+
+        self._otel_trace = otel_trace
+        self._status = {"ok": Status(StatusCode.OK), "error": Status(StatusCode.ERROR), "unfinished": Status(StatusCode.ERROR, "unfinished")}
+        self._provider = TracerProvider(resource=Resource.create({"service.name": "local-butler-backend"}))
+        self._provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        self._tracer = self._provider.get_tracer(__name__)
+
+    def export(self, trace: Trace) -> None:
+        otel_spans: Dict[str, Any] = {}
+        for span in trace.spans: # Parents always precede their children
+            parent = otel_spans.get(span.parent_id)
+            context = self._otel_trace.set_span_in_context(parent) if parent is not None else None
+            attributes = {key: value for key, value in span.attributes.items() if isinstance(value, (str, int, float, bool))}
+            attributes.update({"local_butler.trace_id": trace.trace_id, "local_butler.kind": span.kind})
+            otel_span = self._tracer.start_span(span.name, context=context, start_time=span.start_ns, attributes=attributes)
+            otel_span.set_status(self._status[span.status])
+            otel_spans[span.span_id] = otel_span
+        for span in reversed(trace.spans):
+            otel_spans[span.span_id].end(end_time=span.end_ns or span.start_ns)
+
+    def shutdown(self) -> None:
+        self._provider.shutdown()
+
+
+class Tracer:
+    """Samples turns, records their spans and exports finished traces off the request path."""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        jsonl_path: Optional[str] = None,
+        otlp_endpoint: Optional[str] = None,
+        keep_recent: int = 100,
+    ):
+        self.sample_rate = sample_rate
+        self.jsonl_path = jsonl_path
+        self._recent: "deque[Trace]" = deque(maxlen=keep_recent)
+        self._instrumented: set = set()
+        self.sampled = 0
+        self.unsampled = 0
+        self._otlp: Optional[_OtlpForwarder] = None
+        if otlp_endpoint:
+            try:
+                self._otlp = _OtlpForwarder(otlp_endpoint)
+            except ImportError:
+                logger.warning("TRACING_OTLP_ENDPOINT is set but the OpenTelemetry SDK/OTLP exporter is not installed; exporting to JSON lines only.")
+        self._export_queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=1000)
+        self._exporter: Optional[threading.Thread] = None
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes: Any) -> Iterator[Optional[Trace]]:
+        """Starts a trace for one turn if it is sampled. Yields the trace, or None."""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            self.unsampled += 1
+            yield None
+            return
+        self.sampled += 1
+        trace = Trace(name, **attributes)
+        token = _current_trace.set(trace)
+        status = None
+        try:
+            yield trace
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            try:
+                _current_trace.reset(token)
+            except ValueError: # Async generator closed from another context
+                _current_trace.set(None)
+            trace.finish(status)
+            self._recent.append(trace)
+            self._enqueue_export(trace)
+
+    def instrument(self, agent: Any) -> Any:
+        """Adds the tracing callbacks to an agent (once). Model and tool callbacks are ordered so
+        tracing never sees a call that a cache answered, and always sees the final response."""
+        if id(agent) in self._instrumented:
+            return agent
+        self._instrumented.add(id(agent))
+        prepend_callbacks(agent, before_agent_callback=_before_agent, after_agent_callback=_after_agent)
+        if hasattr(agent, "before_model_callback"): # LlmAgent only
+            append_callbacks(agent, before_model_callback=_before_model)
+            prepend_callbacks(agent, after_model_callback=_after_model, before_tool_callback=_before_tool, after_tool_callback=_after_tool)
+        return agent
+
+    # --- Export ---
+    def _enqueue_export(self, trace: Trace) -> None:
+        if not self.jsonl_path and self._otlp is None:
+            return
+        if self._exporter is None:
+            self._exporter = threading.Thread(target=self._export_loop, name="trace-export", daemon=True)
+            self._exporter.start()
+            atexit.register(self.close)
+        try:
+            self._export_queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning(f"Trace export queue full; dropping trace {trace.trace_id}.")
+
+    def _export_loop(self) -> None:
+        while True:
+            trace = self._export_queue.get()
+            if trace is None:
+                return
+            try:
+                if self.jsonl_path:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as trace_file:
+                        trace_file.writelines(json.dumps(span, default=str) + "\n" for span in trace.to_dicts())
+                if self._otlp is not None:
+                    self._otlp.export(trace)
+            except Exception as e:
+                logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+
+    def close(self) -> None:
+        """Exports the traces still queued."""
+        if self._exporter is not None and self._exporter.is_alive():
+            self._export_queue.put(None)
+            self._exporter.join(timeout=5)
+        if self._otlp is not None:
+            self._otlp.shutdown()
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """The most recent finished traces, newest first."""
+        if limit <= 0:
+            return []
+        return [{"trace_id": trace.trace_id, "spans": trace.to_dicts()} for trace in list(self._recent)[-limit:][::-1]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sample_rate": self.sample_rate, "sampled": self.sampled, "unsampled": self.unsampled}
+
+
+# Process-wide tracer; TRACING_SAMPLE_RATE=0 (the default) disables tracing.
+tracer = Tracer(
+    sample_rate=settings.TRACING_SAMPLE_RATE,
+    jsonl_path=settings.TRACING_JSONL_PATH,
+    otlp_endpoint=settings.TRACING_OTLP_ENDPOINT,
+)
@@ -0,0 +1,166 @@
+# butler_agent_pkg/shared_libraries/units.py
+"""Unit conversion for ingredient quantities.
+
+Every unit string is parsed into a dimension and a factor to that dimension's base unit:
+
+- mass, in grams: g, kg, mg, oz, lb and their spellings;
+- volume, in millilitres: ml, cl, dl, l, tsp, tbsp, cup, fl oz, pint, quart, gallon;
+- count, in pieces: "", piece(s), pcs, each, whole, dozen (12);
+- any other unit (clove, head, bag, can) is its own dimension, singularized, so
+  "cloves" and "clove" match each other and nothing else.
+
+All spellings are expanded into one table at import, so parsing is a dict lookup
+(after case-folding and collapsing whitespace). Quantities of one dimension compare
+and combine after one multiplication. Volume and mass also combine for ingredients with
+a known density (grams per millilitre): `DEFAULT_DENSITIES`, extended or overridden by
+settings.INGREDIENT_DENSITIES. For those, the dimension is mass: 100 ml of soy sauce
+and 3 tbsp of it are both a weight in grams.
+
+`converter` is the process-wide `UnitConverter`; the inventory backends key items by
+`converter.key()` and the shopping-list matcher subtracts `converter.measure()` amounts.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+from .ingredient_names import singular
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+# Digits kept after converting between units, so 0.1 kg - 50 g is 0.05 kg, not 0.05000000000000001
+_PRECISION = 6
+
+
+def _spellings(names: Iterable[str], factor: float, plurals: bool = True) -> Dict[str, float]:
+    table = {}
+    for name in names:
+        table[name] = factor
+        if plurals:
+            table[name + "s"] = factor
+    return table
+
+
+_MASS_UNITS = {
+    **_spellings(("g", "gr", "gram", "gramme"), 1.0),
+    **_spellings(("kg", "kilo", "kilogram", "kilogramme"), 1000.0),
+    **_spellings(("mg", "milligram", "milligramme"), 0.001),
+    **_spellings(("oz", "ounce"), 28.349523125),
+    **_spellings(("lb", "pound"), 453.59237),
+}
+_VOLUME_UNITS = {
+    **_spellings(("ml", "milliliter", "millilitre"), 1.0),
+    **_spellings(("cl", "centiliter", "centilitre"), 10.0),
+    **_spellings(("dl", "deciliter", "decilitre"), 100.0),
+    **_spellings(("l", "liter", "litre"), 1000.0),
+    **_spellings(("tsp", "teaspoon"), 4.92892159375),
+    **_spellings(("tbsp", "tbs", "tablespoon"), 14.78676478125),
+    **_spellings(("cup",), 236.5882365),
+    **_spellings(("fl oz", "fluid ounce", "fl. oz"), 29.5735295625),
+    **_spellings(("pint", "pt"), 473.176473),
+    **_spellings(("quart", "qt"), 946.352946),
+    **_spellings(("gallon", "gal"), 3785.411784),
+}
+_COUNT_UNITS = {
+    **_spellings(("", "x", "each", "ea", "whole"), 1.0, plurals=False),
+    **_spellings(("piece", "pc", "unit", "item"), 1.0),
+    **_spellings(("dozen",), 12.0),
+}
+
+# Grams per millilitre, by ingredient name.
+DEFAULT_DENSITIES: Dict[str, float] = {
+    "water": 1.0, "milk": 1.03, "cream": 1.0, "yogurt": 1.03, "buttermilk": 1.03,
+    "soy sauce": 1.2, "vinegar": 1.01, "lemon juice": 1.03, "stock": 1.0, "broth": 1.0,
+    "oil": 0.92, "olive oil": 0.91, "vegetable oil": 0.92, "butter": 0.96,
+    "honey": 1.42, "maple syrup": 1.32,
+    "flour": 0.53, "sugar": 0.85, "brown sugar": 0.93, "powdered sugar": 0.56, "salt": 1.2,
+    "rice": 0.85, "oats": 0.41, "cocoa powder": 0.42,
+}
+
+
+def round_quantity(quantity: float) -> float:
+    """Drops float noise from unit arithmetic; ints stay ints."""
+    return round(quantity, _PRECISION) if isinstance(quantity, float) else quantity
+
+
+@dataclass(frozen=True)
+class Unit:
+    """A parsed unit: `factor` base units of `dimension` per one of it."""
+    dimension: str
+    factor: float
+
+
+class IncompatibleUnits(ValueError):
+    """The two quantities measure different things, e.g. grams and pieces."""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower().rstrip(".")
+
+
+@lru_cache(maxsize=1024)
+def parse_unit(unit: str) -> Unit:
+    """Dimension and base factor of a unit string; an unknown unit is a dimension of its own."""
+    unit = _normalize(unit or "")
+    for dimension, table in ((MASS, _MASS_UNITS), (VOLUME, _VOLUME_UNITS), (COUNT, _COUNT_UNITS)):
+        factor = table.get(unit)
+        if factor is not None:
+            return Unit(dimension, factor)
+    # "cloves" -> "clove", "bunches" -> "bunch", "loaves" -> "loaf"
+    return Unit(" ".join(singular(word) for word in unit.split(" ")), 1.0)
+
+
+class UnitConverter:
+    """Converts quantities between units, across mass and volume for ingredients with a known density."""
+
+    def __init__(self, densities: Optional[Dict[str, float]] = None):
+        self._densities = {_normalize(name): density for name, density in {**DEFAULT_DENSITIES, **(densities or {})}.items()}
+        # Names come from users and the model, so the cache is bounded
+        self._cached_density = lru_cache(maxsize=4096)(self._find_density)
+
+    def density(self, ingredient: str) -> Optional[float]:
+        """Grams per millilitre, matching the name or its ending ("extra virgin olive oil" -> "olive oil")."""
+        return self._cached_density(_normalize(ingredient or ""))
+
+    def _find_density(self, name: str) -> Optional[float]:
+        words = name.split()
+        return next(
+            (self._densities[" ".join(words[start:])] for start in range(len(words)) if " ".join(words[start:]) in self._densities),
+            None,
+        )
+
+    def _resolve(self, unit: str, ingredient: str) -> Unit:
+        parsed = parse_unit(unit)
+        if parsed.dimension == VOLUME:
+            density = self.density(ingredient)
+            if density is not None:
+                return Unit(MASS, parsed.factor * density)
+        return parsed
+
+    def key(self, unit: str, ingredient: str = "") -> str:
+        """The dimension quantities of `ingredient` in `unit` are compared in; equal keys can be combined."""
+        return self._resolve(unit, ingredient).dimension
+
+    def measure(self, quantity: float, unit: str, ingredient: str = "") -> Tuple[str, float]:
+        """(key, amount in the key's base unit)."""
+        resolved = self._resolve(unit, ingredient)
+        return resolved.dimension, quantity * resolved.factor
+
+    def from_base(self, amount: float, unit: str, ingredient: str = "") -> float:
+        """A base amount (as from `measure`) expressed in `unit`."""
+        return round(amount / self._resolve(unit, ingredient).factor, _PRECISION)
+
+    def convert(self, quantity: float, from_unit: str, to_unit: str, ingredient: str = "") -> float:
+        """`quantity` in `from_unit` expressed in `to_unit`. Raises IncompatibleUnits across dimensions."""
+        source, target = self._resolve(from_unit, ingredient), self._resolve(to_unit, ingredient)
+        if source.dimension != target.dimension:
+            raise IncompatibleUnits(f"Cannot convert {from_unit!r} to {to_unit!r}" + (f" for {ingredient}." if ingredient else "."))
+        if source.factor == target.factor:
+            return quantity # Same unit, maybe spelled differently: keep ints as ints
+        return round(quantity * source.factor / target.factor, _PRECISION)
+
+
+converter = UnitConverter(settings.INGREDIENT_DENSITIES)
@@ -9,9 +9,13 @@ from google.adk.tools import ToolContext # Added for tool_context type hint
 
 from ...config import settings
 from ...shared_libraries import types # types.py now has RecipeAndShoppingListOutput
+from ...shared_libraries import constants
+from ...shared_libraries.response_cache import response_cache
+from ...tools import inventory_tools
 from ...tools import memory_tool # Import the whole module
 from . import prompts # Import prompts from the same package
 from . import tools as recipe_specific_tools # Import our new tools module
+from .semantic_cache import semantic_recipe_cache
 
 logger = logging.getLogger(__name__)
 
@@ -67,9 +71,14 @@ def check_inventory_and_create_shopping_list_wrapper(recipe_ingredients_data: st
         recipe_title=recipe_title
     )
 
+# Exact-match cache first; on a miss, the near-duplicate cache may still serve a recipe.
+# Recipes depend on the user's dietary preferences, so the profile is part of both cache keys.
+_exact_cache_callbacks = response_cache.model_callbacks("RecipeAgent", state_keys=(constants.USER_PROFILE_KEY,))
+
 # RecipeAgent tools - pass functions directly
 recipe_agent_tools = [
     get_memory_wrapper,
+    inventory_tools.get_expiring_items, # For use-it-up recipes: what in the kitchen should be cooked first
     # check_inventory_and_create_shopping_list_wrapper is no longer directly used by RecipeAgent's primary flow
     # It can be called by ButlerAgent directly if a shopping list is needed for an existing recipe.
     # Add other tools if RecipeAgent needs them, e.g., a specialized food API tool
@@ -81,6 +90,8 @@ recipe_agent = Agent(
     description="A specialized agent for finding or generating recipes. It outputs structured recipe data and a conversational message.",
     instruction=prompts.RECIPE_AGENT_INSTRUCTION,
     tools=recipe_agent_tools,
+    before_model_callback=[_exact_cache_callbacks["before_model_callback"], semantic_recipe_cache.before_model_callback],
+    after_model_callback=[_exact_cache_callbacks["after_model_callback"], semantic_recipe_cache.after_model_callback],
     # The agent's prompt instructs the LLM to return a specific JSON structure with 'recipeOutput' and 'conversationalText' keys.
     # This entire JSON string is expected to be the agent's output.
 )
@@ -0,0 +1,207 @@
+# butler_agent_pkg/sub_agents/recipe/semantic_cache.py
+"""Near-duplicate recipe cache in front of RecipeAgent.
+
+The exact-match response cache misses paraphrases such as "quick chicken pasta" vs
+"chicken pasta recipe, quick please". This cache vectorizes the user's query locally
+(see `shared_libraries/ngram_index.py`) and, when a previous query is similar enough
+and the user's dietary restrictions are the same, replays the model response that
+carried that query's `recipe_details_json` instead of generating a new recipe.
+
+A query only matches entries from the same context: the same user, the same
+dietary restrictions and the same conversation before the query (a hash of the
+normalized request contents up to the last user message). So a clarification reply
+such as "yes please" never picks up a recipe from another conversation. Queries the
+n-gram similarity cannot judge bypass the cache entirely:
+
+- low-content queries, with fewer than `MIN_CONTENT_CHARS` letters in meaningful words
+  ("yes please", "the spicy one");
+- negations ("chicken pasta without chicken" is 0.87 similar to "chicken pasta");
+- inventory-dependent requests ("what should I use up?"), and any turn in which
+  RecipeAgent called an inventory tool, since the answer depends on today's stock.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from ...config import settings
+from ...shared_libraries import constants
+from ...shared_libraries.callbacks import normalized_contents
+from ...shared_libraries.log_pipeline import Payload
+from ...shared_libraries.ngram_index import STOPWORDS, NgramIndex
+
+logger = logging.getLogger(__name__)
+
+RECIPE_JSON_KEY = "recipe_details_json"
+_MAX_TRACKED_INVOCATIONS = 1024
+
+MIN_CONTENT_CHARS = 6
+INVENTORY_TOOLS = frozenset({"get_expiring_items"})
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_FILLER_WORDS = STOPWORDS | frozenset({
+    "yes", "yeah", "yep", "no", "nope", "ok", "okay", "sure", "thanks", "thank", "great", "good", "fine",
+    "that", "this", "one", "another", "more", "again", "else", "other", "sounds", "let's", "lets", "go",
+})
+_NEGATION_RE = re.compile(r"\b(without|no|not|non|none|except|minus|instead|skip|avoid|exclude|excluding|hold the|"
+                          r"don'?t|doesn'?t|isn'?t|free)\b")
+_INVENTORY_RE = re.compile(r"\b(use up|using up|use what|expir\w*|best before|leftovers?|what i have|what i've got|i have|i've got|"
+                           r"my (fridge|pantry|kitchen|inventory|cupboard)|going off|go bad|goes bad|going bad)\b")
+Partition = Tuple[str, Tuple[str, ...]] # (context scope, dietary signature)
+
+
+def dietary_signature(user_profile: Any) -> Tuple[str, ...]:
+    """Normalizes `UserProfile.preferences['dietary_restrictions']` into a hashable partition key."""
+    if user_profile is None:
+        return ()
+    preferences = user_profile.get("preferences", {}) if isinstance(user_profile, dict) else getattr(user_profile, "preferences", {})
+    restrictions = (preferences or {}).get("dietary_restrictions") or []
+    if isinstance(restrictions, str):
+        restrictions = [restrictions]
+    return tuple(sorted({str(item).strip().casefold() for item in restrictions if str(item).strip()}))
+
+
+def cache_bypass_reason(query: str) -> Optional[str]:
+    """Why a query must not be answered from (or stored in) the cache, or None if it can be."""
+    text = query.casefold()
+    if sum(len(word) for word in _WORD_RE.findall(text) if word not in _FILLER_WORDS) < MIN_CONTENT_CHARS:
+        return "low-content query"
+    if _NEGATION_RE.search(text):
+        return "negation"
+    if _INVENTORY_RE.search(text):
+        return "inventory-dependent query"
+    return None
+
+
+def context_scope(user_id: str, llm_request: LlmRequest) -> str:
+    """Hash of the user and the conversation before their last message: entries only match within it."""
+    contents = normalized_contents(llm_request)
+    last_user_message = max(
+        (index for index, (role, parts) in enumerate(contents) if role == "user" and any(part[0] == "text" for part in parts)),
+        default=len(contents),
+    )
+    scope = json.dumps([user_id, contents[:last_user_message]], sort_keys=True, default=str)
+    return hashlib.sha256(scope.encode("utf-8")).hexdigest()[:32]
+
+
+def _called_inventory_tool(llm_request: LlmRequest) -> bool:
+    return any(part.function_response and part.function_response.name in INVENTORY_TOOLS
+               for content in llm_request.contents or [] for part in content.parts or [])
+
+
+def _find_recipe_json(value: Any) -> Optional[str]:
+    """Searches function-call args (possibly nested) for a `recipe_details_json` string."""
+    if isinstance(value, dict):
+        found = value.get(RECIPE_JSON_KEY)
+        if isinstance(found, str) and found.strip():
+            return found
+        for nested in value.values():
+            found = _find_recipe_json(nested)
+            if found:
+                return found
+    return None
+
+
+def extract_recipe_json(llm_response: LlmResponse) -> Optional[str]:
+    """Returns the recipe payload carried by a RecipeAgent response, if any."""
+    if not llm_response.content or not llm_response.content.parts:
+        return None
+    for part in llm_response.content.parts:
+        if part.function_call and part.function_call.args:
+            found = _find_recipe_json(part.function_call.args)
+            if found:
+                return found
+        if part.text and part.text.lstrip().startswith("{"):
+            try:
+                parsed = json.loads(part.text)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                found = _find_recipe_json(parsed)
+                if found:
+                    return found
+                if "ingredients" in parsed:
+                    return part.text
+    return None
+
+
+class SemanticRecipeCache:
+    """ADK model callbacks that serve cached recipes for near-duplicate queries."""
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.8):
+        self.index = NgramIndex(max_entries=max_entries, threshold=threshold)
+        # invocation_id -> (query, partition) awaiting a recipe, or None once handled
+        self._invocations: "OrderedDict[str, Optional[Tuple[str, Partition]]]" = OrderedDict()
+        self.bypassed = 0
+
+    def _track(self, invocation_id: str, value: Optional[Tuple[str, Partition]]) -> None:
+        self._invocations[invocation_id] = value
+        while len(self._invocations) > _MAX_TRACKED_INVOCATIONS:
+            self._invocations.popitem(last=False)
+
+    def before_model_callback(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not settings.SEMANTIC_CACHE_ENABLED:
+            return None
+        invocation_id = callback_context.invocation_id
+        # Only the first model call of a RecipeAgent activation starts from the raw user query.
+        if invocation_id in self._invocations:
+            if self._invocations[invocation_id] is not None and _called_inventory_tool(llm_request):
+                self._track(invocation_id, None) # The recipe will depend on the inventory: don't store it
+            return None
+        user_content = callback_context.user_content
+        query = " ".join(part.text for part in (user_content.parts or []) if part.text) if user_content else ""
+        if not query.strip():
+            self._track(invocation_id, None)
+            return None
+        reason = cache_bypass_reason(query)
+        if reason is not None:
+            self._track(invocation_id, None)
+            self.bypassed += 1
+            logger.info("Semantic recipe cache bypassed (%s) for query '%s'", reason, Payload(query, 80))
+            return None
+
+        partition = (
+            context_scope(callback_context._invocation_context.session.user_id, llm_request),
+            dietary_signature(callback_context.state.get(constants.USER_PROFILE_KEY)),
+        )
+        match = self.index.lookup(query, partition=partition)
+        if match is None:
+            self._track(invocation_id, (query, partition))
+            return None
+
+        self._track(invocation_id, None)
+        logger.info("Semantic recipe cache hit (similarity %.2f) for query '%s' via '%s'", match.similarity, Payload(query, 80), Payload(match.text, 80))
+        return LlmResponse.model_validate_json(match.payload["response_json"])
+
+    def after_model_callback(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        pending = self._invocations.get(callback_context.invocation_id)
+        if pending is None:
+            return None
+        recipe_json = extract_recipe_json(llm_response)
+        if recipe_json is None:
+            return None # e.g. a get_memory call or a clarifying question; keep waiting for the recipe
+        query, partition = pending
+        self.index.add(
+            query,
+            {"recipe_details_json": recipe_json, "response_json": llm_response.model_dump_json(exclude_none=True)},
+            partition=partition,
+        )
+        self._track(callback_context.invocation_id, None)
+        logger.info("Semantic recipe cache stored recipe for query '%s'", Payload(query, 80))
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.index.stats(), "bypassed": self.bypassed}
+
+
+semantic_recipe_cache = SemanticRecipeCache(
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+)
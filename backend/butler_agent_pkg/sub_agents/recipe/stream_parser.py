@@ -0,0 +1,356 @@
+# butler_agent_pkg/sub_agents/recipe/stream_parser.py
+"""Incremental (partial) JSON parsing for streamed RecipeAgent output.
+
+RecipeAgent produces `recipe_details_json` as one large JSON object. These parsers
+consume it chunk by chunk, in any split (including mid-string, mid-escape and
+mid-UTF-8 sequence), and report each value as soon as it is complete, so a client
+can render the recipe name and ingredient list while instructions are still
+being generated.
+"""
+
+import codecs
+import copy
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+JSONPath = Tuple[Union[str, int], ...]
+
+_NUMBER_RE = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_LITERALS = {"true": True, "false": False, "null": None}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Parser expectations between tokens
+_EXPECT_VALUE = "value"
+_EXPECT_VALUE_OR_CLOSE = "value_or_close" # Right after '['
+_EXPECT_KEY_OR_CLOSE = "key_or_close" # Right after '{'
+_EXPECT_KEY = "key" # After ',' inside an object
+_EXPECT_COLON = "colon"
+_EXPECT_COMMA_OR_CLOSE = "comma_or_close"
+_EXPECT_END = "end"
+
+
+class JSONStreamError(ValueError):
+    """Raised internally when the streamed payload is not valid JSON."""
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    __slots__ = ("container", "is_object", "path", "key")
+
+    def __init__(self, container: Union[Dict[str, Any], List[Any]], path: JSONPath):
+        self.container = container
+        self.is_object = isinstance(container, dict)
+        self.path = path
+        self.key: Optional[str] = None # Pending key for the next object member
+
+
+class IncrementalJSONParser:
+    """A push parser that reports `(path, value)` for every JSON value once it is complete.
+
+    Containers are reported when their closing bracket arrives; the root value is reported
+    with the empty path `()`. Input after the root value is ignored. When `skip_prefix` is
+    set, any text before the first '{' or '[' is skipped (e.g. prose or a ```json fence).
+    """
+
+    def __init__(self, skip_prefix: bool = False):
+        self.skip_prefix = skip_prefix
+        self.root: Any = None
+        self.done = False
+        self.error: Optional[str] = None
+        self.offset = 0 # Number of characters consumed so far
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._stack: List[_Frame] = []
+        self._expect = _EXPECT_VALUE
+        self._started = False
+        self._token: Optional[str] = None # None, "string", "number" or "literal"
+        self._buf: List[str] = []
+        self._string_is_key = False
+        self._escape = False
+        self._unicode_hex: Optional[str] = None
+        self._events: List[Tuple[JSONPath, Any]] = []
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Tuple[JSONPath, Any]]:
+        """Consumes a chunk and returns the values completed by it."""
+        if self.done or self.error:
+            return []
+        try:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            for ch in text:
+                self._consume(ch)
+                self.offset += 1
+                if self.done:
+                    break
+        except (JSONStreamError, UnicodeDecodeError) as e:
+            self.error = str(e)
+            logger.warning(f"Stopped parsing streamed JSON at offset {self.offset}: {e}")
+        return self._drain()
+
+    def close(self) -> List[Tuple[JSONPath, Any]]:
+        """Signals end of input. Completes a trailing root number; otherwise leaves `done` False."""
+        if self.done or self.error:
+            return self._drain()
+        try:
+            self._decoder.decode(b"", final=True)
+            if self._token == "number" and not self._stack:
+                self._finish_number()
+        except (JSONStreamError, UnicodeDecodeError) as e:
+            self.error = str(e)
+        return self._drain()
+
+    def snapshot(self) -> Any:
+        """Returns a deep copy of everything parsed so far (open containers included)."""
+        return copy.deepcopy(self.root)
+
+    def _drain(self) -> List[Tuple[JSONPath, Any]]:
+        events, self._events = self._events, []
+        return events
+
+    def _fail(self, message: str) -> None:
+        raise JSONStreamError(f"{message} at offset {self.offset}")
+
+    def _consume(self, ch: str) -> None:
+        token = self._token
+        if token == "string":
+            self._consume_string(ch)
+            return
+        if token == "number":
+            if ch in _NUMBER_CHARS:
+                self._buf.append(ch)
+                return
+            self._finish_number() # The delimiter is then handled below
+        elif token == "literal":
+            self._buf.append(ch)
+            word = "".join(self._buf)
+            if word in _LITERALS:
+                self._token = None
+                self._complete_value(_LITERALS[word])
+            elif not any(literal.startswith(word) for literal in _LITERALS):
+                self._fail(f"Invalid literal '{word}'")
+            return
+
+        if ch in " \t\r\n":
+            return
+        expect = self._expect
+        if not self._started and self.skip_prefix and ch not in "{[":
+            return
+
+        if ch == "{" or ch == "[":
+            if expect not in (_EXPECT_VALUE, _EXPECT_VALUE_OR_CLOSE):
+                self._fail(f"Unexpected '{ch}'")
+            self._open_container({} if ch == "{" else [])
+        elif ch == "}" or ch == "]":
+            top = self._stack[-1] if self._stack else None
+            if top is None or top.is_object != (ch == "}"):
+                self._fail(f"Unexpected '{ch}'")
+            allowed = (_EXPECT_KEY_OR_CLOSE, _EXPECT_COMMA_OR_CLOSE) if top.is_object else (_EXPECT_VALUE_OR_CLOSE, _EXPECT_COMMA_OR_CLOSE)
+            if expect not in allowed:
+                self._fail(f"Unexpected '{ch}'")
+            self._stack.pop()
+            self._after_value(top.path, top.container)
+        elif ch == ",":
+            if expect != _EXPECT_COMMA_OR_CLOSE:
+                self._fail("Unexpected ','")
+            self._expect = _EXPECT_KEY if self._stack[-1].is_object else _EXPECT_VALUE
+        elif ch == ":":
+            if expect != _EXPECT_COLON:
+                self._fail("Unexpected ':'")
+            self._expect = _EXPECT_VALUE
+        elif ch == '"':
+            if expect in (_EXPECT_KEY_OR_CLOSE, _EXPECT_KEY):
+                self._string_is_key = True
+            elif expect in (_EXPECT_VALUE, _EXPECT_VALUE_OR_CLOSE):
+                self._string_is_key = False
+            else:
+                self._fail("Unexpected string")
+            self._start_token("string")
+        elif ch == "-" or ch.isdigit():
+            if expect not in (_EXPECT_VALUE, _EXPECT_VALUE_OR_CLOSE):
+                self._fail("Unexpected number")
+            self._start_token("number")
+            self._buf.append(ch)
+        elif ch in "tfn":
+            if expect not in (_EXPECT_VALUE, _EXPECT_VALUE_OR_CLOSE):
+                self._fail("Unexpected literal")
+            self._start_token("literal")
+            self._buf.append(ch)
+        else:
+            self._fail(f"Unexpected character {ch!r}")
+
+    def _consume_string(self, ch: str) -> None:
+        if self._unicode_hex is not None:
+            if ch not in "0123456789abcdefABCDEF":
+                self._fail("Invalid \\u escape")
+            self._unicode_hex += ch
+            if len(self._unicode_hex) == 4:
+                self._buf.append(chr(int(self._unicode_hex, 16)))
+                self._unicode_hex = None
+        elif self._escape:
+            self._escape = False
+            if ch == "u":
+                self._unicode_hex = ""
+            elif ch in _ESCAPES:
+                self._buf.append(_ESCAPES[ch])
+            else:
+                self._fail(f"Invalid escape '\\{ch}'")
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            # Recombine any surrogate pairs produced by \\uXXXX escapes.
+            value = "".join(self._buf).encode("utf-16", "surrogatepass").decode("utf-16")
+            self._token = None
+            if self._string_is_key:
+                self._stack[-1].key = value
+                self._expect = _EXPECT_COLON
+            else:
+                self._complete_value(value)
+        elif ch < " ":
+            self._fail("Control character in string")
+        else:
+            self._buf.append(ch)
+
+    def _start_token(self, token: str) -> None:
+        self._started = True
+        self._token = token
+        self._buf = []
+
+    def _finish_number(self) -> None:
+        text = "".join(self._buf)
+        self._token = None
+        if not _NUMBER_RE.fullmatch(text):
+            self._fail(f"Invalid number '{text}'")
+        is_integer = not any(c in text for c in ".eE")
+        self._complete_value(int(text) if is_integer else float(text))
+
+    def _child_path(self) -> JSONPath:
+        top = self._stack[-1]
+        return top.path + ((top.key,) if top.is_object else (len(top.container),))
+
+    def _attach(self, value: Any) -> JSONPath:
+        """Stores a value in its parent (or as root) and returns its path."""
+        if not self._stack:
+            self.root = value
+            return ()
+        path = self._child_path()
+        top = self._stack[-1]
+        if top.is_object:
+            top.container[top.key] = value
+        else:
+            top.container.append(value)
+        return path
+
+    def _open_container(self, container: Union[Dict[str, Any], List[Any]]) -> None:
+        self._started = True
+        # Attach immediately so snapshot() shows partially received containers.
+        path = self._attach(container)
+        self._stack.append(_Frame(container, path))
+        self._expect = _EXPECT_KEY_OR_CLOSE if isinstance(container, dict) else _EXPECT_VALUE_OR_CLOSE
+
+    def _complete_value(self, value: Any) -> None:
+        self._after_value(self._attach(value), value)
+
+    def _after_value(self, path: JSONPath, value: Any) -> None:
+        self._events.append((path, value))
+        if self._stack:
+            self._expect = _EXPECT_COMMA_OR_CLOSE
+        else:
+            self._expect = _EXPECT_END
+            self.done = True
+
+
+class RecipeStreamParser:
+    """Turns a streamed `recipe_details_json` payload into render-ready events.
+
+    Events are dicts with a `type` of:
+    - `name_ready`:        {"value": <recipe name>}
+    - `ingredient_ready`:  {"index": N, "value": {name, quantity, unit}}
+    - `instruction_ready`: {"index": N, "value": <step text>}
+    - `field_ready`:       {"key": <e.g. prepTime>, "value": ...} for other top-level fields
+    - `recipe_complete`:   {"value": <full recipe dict>}
+    - `error`:             {"message": ..., "partial": <recipe parsed so far>} for a malformed payload
+    - `truncated`:         {"partial": <recipe parsed so far>} if the stream ends early (from `close`)
+    """
+
+    NAME_KEYS = ("name", "title")
+    LIST_EVENTS = {"ingredients": "ingredient_ready", "instructions": "instruction_ready"}
+
+    def __init__(self):
+        # Models often wrap JSON in prose or ```json fences, so skip anything before the object.
+        self._parser = IncrementalJSONParser(skip_prefix=True)
+        self._error_reported = False
+
+    @property
+    def done(self) -> bool:
+        return self._parser.done
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Dict[str, Any]]:
+        return self._to_events(self._parser.feed(chunk))
+
+    def close(self) -> List[Dict[str, Any]]:
+        events = self._to_events(self._parser.close())
+        if not self._parser.done and not self._parser.error:
+            events.append({"type": "truncated", "partial": self._parser.snapshot()})
+        return events
+
+    def _to_events(self, completed: List[Tuple[JSONPath, Any]]) -> List[Dict[str, Any]]:
+        events: List[Dict[str, Any]] = []
+        for path, value in completed:
+            event = self._event_for(path, value)
+            if event:
+                events.append(event)
+        if self._parser.error and not self._error_reported:
+            self._error_reported = True
+            events.append({"type": "error", "message": self._parser.error, "partial": self._parser.snapshot()})
+        return events
+
+    def _event_for(self, path: JSONPath, value: Any) -> Optional[Dict[str, Any]]:
+        if path == ():
+            return {"type": "recipe_complete", "value": value} if isinstance(value, dict) else None
+        if len(path) == 1:
+            key = path[0]
+            if key in self.LIST_EVENTS:
+                return None # Already reported item by item
+            if key in self.NAME_KEYS:
+                return {"type": "name_ready", "value": value}
+            return {"type": "field_ready", "key": key, "value": value}
+        if len(path) == 2 and path[0] in self.LIST_EVENTS:
+            return {"type": self.LIST_EVENTS[path[0]], "index": path[1], "value": value}
+        return None
+
+
+# Replays recorded payloads split at every boundary (for testing purposes)
+if __name__ == "__main__":
+    recorded_payloads = [
+        '{"name": "Quick Chicken Pasta", "ingredients": [{"name": "Chicken Breast", "quantity": 2, "unit": "pieces"}, '
+        '{"name": "Pasta", "quantity": 250.5, "unit": "grams"}], "instructions": ["Boil the pasta.", '
+        '"Cook the chicken \\"golden\\".", "Combine \\u00e9l\\u00e8ve \\ud83c\\udf5d"], "prepTime": "10 minutes", '
+        '"cookTime": "20 minutes", "servings": "2", "vegetarian": false, "notes": null}',
+        '```json\n{"title": "Crème brûlée 🍮", "ingredients": [], "instructions": ["Chill.\\nServe."], "servings": 4e0}\n```',
+    ]
+
+    def replay(chunks):
+        parser = RecipeStreamParser()
+        events = []
+        for chunk in chunks:
+            events.extend(parser.feed(chunk))
+        events.extend(parser.close())
+        return events
+
+    for payload in recorded_payloads:
+        data = payload.encode("utf-8")
+        expected = replay([data])
+        assert expected[-1]["type"] == "recipe_complete", expected
+        for split in range(len(data) + 1):
+            assert replay([data[:split], data[split:]]) == expected, f"Mismatch when split at byte {split}"
+        assert replay([data[i:i + 1] for i in range(len(data))]) == expected, "Mismatch when fed byte by byte"
+        print(f"OK: {len(expected)} events, {len(data) + 1} split points")
+        for event in expected[:-1]:
+            print(f"  - {event}")
+
+    truncated = recorded_payloads[0][:150]
+    print("\nTruncated tail:", replay([truncated])[-1])
+    print("Malformed tail:", replay(['{"name": "Toast", "ingredients": [{"name": "Bread",, }]}'])[-1])
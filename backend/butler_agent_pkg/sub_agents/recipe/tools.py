@@ -2,9 +2,11 @@
 """Tools for the RecipeAgent, including inventory checking."""
 
 import logging
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from ...shared_libraries import types
+from ...shared_libraries.ingredient_names import NameIndex, canonical_name
+from ...shared_libraries.units import converter
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,10 @@ def check_inventory_and_create_shopping_list(
     """
     Compares ingredients required for a recipe against the user's current inventory
     and generates a shopping list for missing items or insufficient quantities.
+    Quantities are compared after unit conversion (see shared_libraries/units.py); a
+    shortfall is listed in the recipe's unit. Names are matched loosely (see
+    shared_libraries/ingredient_names.py): "tomatoes" in a recipe uses "Tomato" in the
+    inventory, and "scallions" uses "green onions".
 
     Args:
         recipe_ingredients: A list of Ingredient objects required for the recipe.
@@ -26,50 +32,40 @@ def check_inventory_and_create_shopping_list(
         A ShoppingList object.
     """
     shopping_list_items: List[types.ShoppingListItem] = []
-    
-    # Create a dictionary for easier lookup of inventory items by normalized name
-    # For simplicity, we'll assume quantity aggregation for items with the same name and unit in inventory
-    inventory_map: Dict[str, types.Ingredient] = {}
+
+    # Available amount per (canonical name, unit dimension), in the dimension's base unit
+    # (grams, ml or pieces), so "100 ml" of soy sauce covers "3 tbsp" and "g", "grams" and "kg" add up.
+    available: Dict[Tuple[str, str], float] = {}
+    names = NameIndex()
+    # The converter looks densities up by the name as written ("oats", not the canonical "oat"),
+    # like the inventory backends do. One spelling per canonical name keeps both sides in one dimension.
+    density_names: Dict[str, str] = {}
     for item in user_inventory_ingredients:
-        # Normalize name (lowercase, strip whitespace) for comparison
-        normalized_name = item.name.lower().strip()
-        unit_str = item.unit.lower().strip() if item.unit else "_unitless_"
-        key = f"{normalized_name}_{unit_str}" # Consider unit in key for more accuracy
-        
-        if key in inventory_map:
-            # Aggregate quantities if item with same name and unit already exists
-            inventory_map[key].quantity += item.quantity
-        else:
-            # Make a copy to avoid modifying the original inventory list objects if they are mutable
-            inventory_map[key] = types.Ingredient(**item.model_dump()) 
+        name_key = canonical_name(item.name)
+        names.add(name_key)
+        density_name = density_names.setdefault(name_key, item.name)
+        dimension, amount = converter.measure(item.quantity, item.unit, density_name)
+        available[(name_key, dimension)] = available.get((name_key, dimension), 0.0) + amount
 
     for req_ingredient in recipe_ingredients:
-        normalized_req_name = req_ingredient.name.lower().strip()
-        req_unit_str = req_ingredient.unit.lower().strip() if req_ingredient.unit else "_unitless_"
-        req_key = f"{normalized_req_name}_{req_unit_str}"
-        
-        needed_quantity = req_ingredient.quantity
-        
-        if req_key in inventory_map:
-            inventory_item = inventory_map[req_key]
-            # Simple subtraction, assumes units are compatible if keys match
-            if inventory_item.quantity >= needed_quantity:
-                needed_quantity = 0
-                inventory_item.quantity -= req_ingredient.quantity # Reduce available inventory for this session/check
-            else:
-                needed_quantity -= inventory_item.quantity
-                inventory_item.quantity = 0 # All of this inventory item used up
-        
+        name_key = names.resolve(req_ingredient.name) or canonical_name(req_ingredient.name)
+        density_name = density_names.get(name_key, req_ingredient.name)
+        dimension, needed = converter.measure(req_ingredient.quantity, req_ingredient.unit, density_name)
+        used = min(needed, available.get((name_key, dimension), 0.0))
+        if used:
+            available[(name_key, dimension)] -= used # Reduce available inventory for this session/check
+        needed_quantity = converter.from_base(needed - used, req_ingredient.unit, density_name)
+
         if needed_quantity > 0:
             shopping_list_items.append(
                 types.ShoppingListItem(
                     name=req_ingredient.name, # Use original name for shopping list
-                    quantity=needed_quantity,
+                    quantity=needed_quantity, # In the recipe's unit
                     unit=req_ingredient.unit,
                     notes=req_ingredient.notes
                 )
             )
-            
+
     logger.info(f"Generated shopping list with {len(shopping_list_items)} items for recipe: {recipe_title}")
     return types.ShoppingList(items=shopping_list_items, recipe_title=recipe_title)
 
@@ -82,14 +78,16 @@ if __name__ == '__main__':
         types.Ingredient(name="Soy Sauce", quantity=3, unit="tbsp"),
         types.Ingredient(name="Garlic", quantity=2, unit="cloves"),
         types.Ingredient(name="Olive Oil", quantity=1, unit="tbsp"),
+        types.Ingredient(name="Tomatoes", quantity=3, unit="pieces"),
     ]
 
     # Sample user inventory
     user_inv = [
-        types.Ingredient(name="broccoli", quantity=0.5, unit="head"), # Note: lowercase, partial quantity
-        types.Ingredient(name="Soy Sauce", quantity=100, unit="ml"), # Different unit, will be treated as missing for now
+        types.Ingredient(name="brocolli", quantity=0.5, unit="head"), # Note: misspelled, partial quantity
+        types.Ingredient(name="Soy Sauce", quantity=100, unit="ml"), # Different unit, converted: covers 3 tbsp (~44 ml)
         types.Ingredient(name="Garlic", quantity=5, unit="cloves"),
         types.Ingredient(name="Onion", quantity=3, unit="pieces"),
+        types.Ingredient(name="Tomato", quantity=4, unit="pieces"), # Recipe says "tomatoes"
     ]
 
     print("Recipe Ingredients:")
@@ -102,5 +100,5 @@ if __name__ == '__main__':
     
     print("\nShopping List Result:")
     print(shopping_list_result.model_dump_json(indent=2))
-    # Expected: Chicken Breast, 0.5 head Broccoli, Soy Sauce (if units don't match), Olive Oil
-    # Garlic should not be on the list as user has 5 cloves and recipe needs 2.
+    # Expected: Chicken Breast, 0.5 head Broccoli, Olive Oil
+    # Garlic should not be on the list as user has 5 cloves and recipe needs 2; nor Tomatoes (4 "Tomato" in stock).
@@ -0,0 +1,69 @@
+# butler_agent_pkg/tools/inventory_expiry.py
+"""Per-user index of best-before dates for the in-memory inventory backend.
+
+Items may carry an optional `expires_on` date (ISO "YYYY-MM-DD", so string order is date
+order). `ExpiryIndex` keeps one user's dated items in a binary min-heap keyed by that date:
+
+- setting or changing a date is a heap push, O(log n);
+- removing an item (used up, deleted) is O(1): its heap entry is only marked stale, by
+  dropping the item from `_current`, and skipped when a query reaches it;
+- `until(last_day)` returns the items expiring on or before `last_day`, soonest first,
+  without scanning or popping the heap. It walks the heap array from the root with a
+  small frontier heap of candidates, so finding k items costs O(k log k), not O(n).
+
+Stale entries are rebuilt away once they outnumber the live ones, so the heap stays
+within twice the number of dated items.
+"""
+
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+
+_MIN_COMPACT_SIZE = 64
+
+
+class ExpiryIndex:
+    """Dated items of one user, by expiry date. Not thread-safe: the backend calls it under the user's lock."""
+
+    def __init__(self):
+        self._heap: List[Tuple[str, Hashable]] = [] # (expires_on, item key), some stale
+        self._current: Dict[Hashable, str] = {} # item key -> its expires_on now
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def set(self, key: Hashable, expires_on: Optional[str]) -> None:
+        """Sets (or with None, clears) an item's expiry date."""
+        previous = self._current.get(key)
+        if previous == expires_on:
+            return
+        if previous is not None:
+            self._stale += 1
+        if expires_on is None:
+            del self._current[key]
+        else:
+            self._current[key] = expires_on
+            heapq.heappush(self._heap, (expires_on, key))
+        if self._stale > len(self._current) and self._stale >= _MIN_COMPACT_SIZE:
+            self._heap = [(expires_on, key) for key, expires_on in self._current.items()]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def discard(self, key: Hashable) -> None:
+        self.set(key, None)
+
+    def until(self, last_day: str) -> List[Hashable]:
+        """Keys of the items expiring on or before `last_day`, soonest first."""
+        heap, found, seen = self._heap, [], set()
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            (expires_on, key), index = heapq.heappop(frontier)
+            if expires_on > last_day:
+                break # Everything left in the frontier, and below it, expires later
+            if self._current.get(key) == expires_on and key not in seen:
+                seen.add(key)
+                found.append(key)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return found
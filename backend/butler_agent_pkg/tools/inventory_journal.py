@@ -0,0 +1,175 @@
+# butler_agent_pkg/tools/inventory_journal.py
+"""Append-only change journal for the in-memory inventory backend, with periodic snapshots.
+
+Enabled with INVENTORY_JOURNAL_DIR. Inventories stay in memory for reads. Every change is
+also appended to its user's journal as one compact JSON array per line:
+
+    [seq, time, "add", item_name, quantity, unit]      (then expires_on, if the add gave one)
+    [seq, time, "remove", item_name, quantity, unit]   (a remove that used the item up included)
+    [seq, time, "delete", item_name, unit]
+    [seq, time, "replace", [items]]
+
+`seq` counts each user's changes from 1. A change costs one short append, however large
+the inventory. Every `snapshot_every` entries, the user's whole inventory is written to a
+snapshot file (atomically: temporary file, then rename) together with its seq and the
+journal's byte offset at that point. Startup loads each snapshot and replays only the
+journal after that offset. A torn last line, from a crash mid-append, is dropped and
+truncated away.
+
+The journal is never rewritten, so it is also the inventory's history:
+`changes_since(user_id, seq)` returns what changed after `seq`, for client sync and
+analytics. Since the last snapshot, that is a short read from its offset. Older history
+is a scan from the start of the file.
+
+Appends for one user must be serialized by the caller. The backend calls them under
+the user's lock, so the journal order is the order the changes were applied in.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+Entry = List[Any] # [seq, time, op, ...]
+
+
+def _file_stem(user_id: str) -> str:
+    """A readable, collision-free file name for a user id."""
+    digest = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:12]
+    return f"{_UNSAFE_FILENAME_RE.sub('_', user_id)[:64]}-{digest}"
+
+
+def entry_to_dict(entry: Entry) -> Dict[str, Any]:
+    """The journal's compact array as a readable dict, for API responses."""
+    seq, at, op = entry[0], entry[1], entry[2]
+    change: Dict[str, Any] = {"seq": seq, "time": at, "op": op}
+    if op in ("add", "remove"):
+        change.update(item_name=entry[3], quantity=entry[4], unit=entry[5])
+        if len(entry) > 6:
+            change["expires_on"] = entry[6]
+    elif op == "delete":
+        change.update(item_name=entry[3], unit=entry[4])
+    elif op == "replace":
+        change["items"] = entry[3]
+    return change
+
+
+class InventoryJournal:
+    """Per-user journal and snapshot files in one directory."""
+
+    def __init__(self, directory: str, snapshot_every: int = 500, fsync: bool = False):
+        self.directory = directory
+        self.snapshot_every = max(1, snapshot_every)
+        self.fsync = fsync
+        self._seq: Dict[str, int] = {}
+        self._snapshot_seq: Dict[str, int] = {}
+        self._snapshot_offset: Dict[str, int] = {}
+        self.appended = 0
+        self.snapshots = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _journal_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, _file_stem(user_id) + ".journal")
+
+    def _snapshot_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, _file_stem(user_id) + ".snapshot.json")
+
+    def seq(self, user_id: str) -> int:
+        """The user's last journaled seq; 0 if nothing was journaled."""
+        return self._seq.get(user_id, 0)
+
+    # --- Writing ---
+    def append(self, user_id: str, changes: List[List[Any]], items: Iterator[Dict[str, Any]]) -> None:
+        """Journals `changes` ([op, ...args] each) in one write. `items` is the inventory after them,
+        consumed only when a snapshot is due."""
+        if not changes:
+            return
+        if user_id not in self._seq:
+            self._write_snapshot(user_id, 0, 0, []) # Names the user's files; recovery starts from it
+        seq = self._seq[user_id]
+        now = round(time.time(), 3)
+        lines = []
+        for change in changes:
+            seq += 1
+            lines.append(json.dumps([seq, now, *change], separators=(",", ":")))
+        with open(self._journal_path(user_id), "a", encoding="utf-8") as journal_file:
+            journal_file.write("\n".join(lines) + "\n")
+            journal_file.flush()
+            if self.fsync:
+                os.fsync(journal_file.fileno())
+            offset = journal_file.tell()
+        self._seq[user_id] = seq
+        self.appended += len(changes)
+        if seq - self._snapshot_seq[user_id] >= self.snapshot_every:
+            self._write_snapshot(user_id, seq, offset, [dict(item) for item in items])
+
+    def _write_snapshot(self, user_id: str, seq: int, offset: int, items: List[Dict[str, Any]]) -> None:
+        path = self._snapshot_path(user_id)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump({"user_id": user_id, "seq": seq, "offset": offset, "time": time.time(), "items": items},
+                      snapshot_file, separators=(",", ":"))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, path)
+        self._seq.setdefault(user_id, seq)
+        self._snapshot_seq[user_id] = seq
+        self._snapshot_offset[user_id] = offset
+        self.snapshots += 1
+
+    # --- Reading ---
+    def _read(self, user_id: str, offset: int) -> Iterator[Tuple[Entry, int]]:
+        """Yields (entry, offset after it) from `offset`, stopping at a torn or unreadable line."""
+        path = self._journal_path(user_id)
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as journal_file:
+            journal_file.seek(offset)
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    return
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return
+                offset += len(line)
+                yield entry, offset
+
+    def recover(self) -> Iterator[Tuple[str, List[Dict[str, Any]], List[Entry]]]:
+        """Yields (user_id, snapshot items, journal entries after the snapshot) for every journaled user."""
+        for snapshot_path in sorted(glob.glob(os.path.join(self.directory, "*.snapshot.json"))):
+            with open(snapshot_path, encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            user_id = snapshot["user_id"]
+            tail, end = [], snapshot["offset"]
+            for entry, end in self._read(user_id, snapshot["offset"]):
+                tail.append(entry)
+            journal_path = self._journal_path(user_id)
+            if os.path.exists(journal_path) and os.path.getsize(journal_path) > end:
+                logger.warning("Dropping a torn entry at the end of the inventory journal of %s.", user_id)
+                os.truncate(journal_path, end)
+            self._seq[user_id] = tail[-1][0] if tail else snapshot["seq"]
+            self._snapshot_seq[user_id] = snapshot["seq"]
+            self._snapshot_offset[user_id] = snapshot["offset"]
+            yield user_id, snapshot["items"], tail
+
+    def changes_since(self, user_id: str, since: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Up to `limit` changes with seq > `since`, oldest first."""
+        offset = self._snapshot_offset.get(user_id, 0) if since >= self._snapshot_seq.get(user_id, 0) else 0
+        changes = []
+        for entry, _ in self._read(user_id, offset):
+            if entry[0] > since:
+                changes.append(entry_to_dict(entry))
+                if len(changes) >= limit:
+                    break
+        return changes
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": self.directory, "users": len(self._seq), "appended": self.appended, "snapshots": self.snapshots}
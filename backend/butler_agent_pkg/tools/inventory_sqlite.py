@@ -0,0 +1,348 @@
+# butler_agent_pkg/tools/inventory_sqlite.py
+"""SQLite inventory backend (WAL mode), enabled with INVENTORY_DB_PATH.
+
+One database file can be shared by every worker process on the host, and inventories
+survive restarts. In WAL mode readers never block the writer or each other. Writes are
+serialized by SQLite itself.
+
+- Connections come from a fixed pool, opened once. Each keeps its own compiled-statement
+  cache, and the statements below are module constants, so each is prepared once per
+  connection and then reused.
+- A unique index on (user_id, name_key, unit_key) makes add, remove and exact lookups
+  index seeks. The keys are `item_key()`: the normalized name and the unit's dimension.
+  The stored spelling and unit are the ones first added, as in the in-memory backend.
+  Opening the database re-keys rows stored under other keys (raw unit strings before
+  the unit engine, or a dimension changed by INGREDIENT_DENSITIES), merging rows that
+  now share a key. It reads every row once; local inventories are small.
+- add, remove and delete read and write inside one `BEGIN IMMEDIATE` transaction; so
+  does a whole add_many or remove_many batch. The write lock is taken up front, so two
+  concurrent removals can't both see the same quantity. Writers in this process also
+  queue on a `threading.Lock` first. Otherwise they would collide on the database lock
+  and wait in SQLite's busy handler, which sleeps in steps of several milliseconds.
+- `quantity` has no declared type, so SQLite keeps ints as ints and floats as floats.
+  Quantities and messages come out exactly as from the in-memory backend.
+- Each user's version lives in `inventory_users` and is checked (for `expected_version`)
+  and incremented inside the writing transaction, so compare-and-swap holds across
+  processes too. The in-process write lock is shared by all users: SQLite has one
+  writer at a time anyway.
+- Item ids are AUTOINCREMENT and listing orders by id, so an item that is removed and
+  added again goes to the end, as in the in-memory backend.
+- `expires_on` is an ISO date or NULL. A partial index on (user_id, expires_on) covers
+  only dated items, so `expiring()` is an index range scan, already in date order.
+- `find_by_name` tries the exact name first, an index seek. Failing that, it resolves the
+  name loosely against a `NameIndex` of the user's names (shared_libraries/ingredient_names.py).
+  That index is built from the database on first use, kept for the `NAME_INDEX_USERS` most
+  recent users, and rebuilt when the user's version has moved on since.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .inventory_store import (
+    EMPTY,
+    INSUFFICIENT,
+    KEY_FORMAT_VERSION,
+    NOT_FOUND,
+    REMOVED,
+    USED_UP,
+    AddEntry,
+    BatchEntry,
+    InventoryBackend,
+    InventoryItem,
+    ItemKey,
+    VersionConflict,
+    earliest,
+    item_key,
+    normalize,
+    remaining_after,
+)
+from ..shared_libraries.ingredient_names import NameIndex
+from ..shared_libraries.units import converter, round_quantity
+
+logger = logging.getLogger(__name__)
+
+NAME_INDEX_USERS = 256
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS inventory_users (user_id TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS inventory_items ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, name_key TEXT NOT NULL, unit_key TEXT NOT NULL,"
+    " item_name TEXT NOT NULL, unit TEXT NOT NULL, quantity NOT NULL, expires_on TEXT)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS inventory_items_key ON inventory_items (user_id, name_key, unit_key)",
+)
+_EXPIRY_INDEX = ("CREATE INDEX IF NOT EXISTS inventory_items_expiry ON inventory_items (user_id, expires_on)"
+                 " WHERE expires_on IS NOT NULL")
+_COLUMNS = "id, item_name, quantity, unit, expires_on"
+
+_HAS_USER = "SELECT 1 FROM inventory_users WHERE user_id = ?"
+_ADD_USER = "INSERT OR IGNORE INTO inventory_users (user_id) VALUES (?)"
+_VERSION = "SELECT version FROM inventory_users WHERE user_id = ?"
+_BUMP_VERSION = "UPDATE inventory_users SET version = version + 1 WHERE user_id = ?"
+_COUNT = "SELECT COUNT(*) FROM inventory_items WHERE user_id = ?"
+_GET = f"SELECT {_COLUMNS} FROM inventory_items WHERE user_id = ? AND name_key = ? AND unit_key = ?"
+_FIND_BY_NAME = f"SELECT {_COLUMNS} FROM inventory_items WHERE user_id = ? AND name_key = ? ORDER BY id LIMIT 1"
+_NAMES = "SELECT name_key FROM inventory_items WHERE user_id = ? GROUP BY name_key ORDER BY MIN(id)"
+_LIST = f"SELECT {_COLUMNS} FROM inventory_items WHERE user_id = ? ORDER BY id"
+_EXPIRING = f"SELECT {_COLUMNS} FROM inventory_items WHERE user_id = ? AND expires_on <= ? ORDER BY expires_on, id"
+_INSERT = ("INSERT INTO inventory_items (user_id, name_key, unit_key, item_name, unit, quantity, expires_on)"
+           " VALUES (?, ?, ?, ?, ?, ?, ?)")
+_SET_QUANTITY = "UPDATE inventory_items SET quantity = ? WHERE id = ?"
+_SET_QUANTITY_AND_EXPIRY = "UPDATE inventory_items SET quantity = ?, expires_on = ? WHERE id = ?"
+_DELETE = "DELETE FROM inventory_items WHERE id = ?"
+_DELETE_USER_ITEMS = "DELETE FROM inventory_items WHERE user_id = ?"
+_ALL_ROWS = "SELECT id, user_id, name_key, unit_key, item_name, unit, quantity, expires_on FROM inventory_items ORDER BY id"
+_SET_KEY = "UPDATE inventory_items SET unit_key = ? WHERE id = ?"
+_SET_ROW = "UPDATE inventory_items SET name_key = ?, unit_key = ?, quantity = ?, expires_on = ? WHERE id = ?"
+
+
+def _item(row: Optional[tuple]) -> Optional[InventoryItem]:
+    if row is None:
+        return None
+    item = {"item_name": row[1], "quantity": row[2], "unit": row[3]}
+    if row[4] is not None:
+        item["expires_on"] = row[4]
+    return item
+
+
+class SqliteInventoryBackend(InventoryBackend):
+    """Inventories in a SQLite database, through a pool of `pool_size` connections."""
+
+    def __init__(self, db_path: str, pool_size: int = 4, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._names: "OrderedDict[str, Tuple[int, NameIndex]]" = OrderedDict() # user -> (version, index)
+        self._names_lock = threading.Lock()
+        for _ in range(max(1, pool_size)):
+            conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL") # Durable across process crashes in WAL mode
+            conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._pool.put(conn)
+        with self._transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            if "version" not in {column[1] for column in conn.execute("PRAGMA table_info(inventory_users)")}:
+                conn.execute("ALTER TABLE inventory_users ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "expires_on" not in {column[1] for column in conn.execute("PRAGMA table_info(inventory_items)")}:
+                conn.execute("ALTER TABLE inventory_items ADD COLUMN expires_on TEXT")
+            conn.execute(_EXPIRY_INDEX)
+            if conn.execute("PRAGMA user_version").fetchone()[0] != KEY_FORMAT_VERSION:
+                self._rekey(conn)
+                conn.execute(f"PRAGMA user_version={KEY_FORMAT_VERSION}")
+        logger.info(f"SQLite inventory backend opened at '{db_path}' ({pool_size} connections).")
+
+    @staticmethod
+    def _rekey(conn: sqlite3.Connection) -> None:
+        """Moves rows to their current `item_key()`, merging rows that now share one into the oldest.
+
+        Scans every row, so it only runs when the database's `user_version` is not KEY_FORMAT_VERSION.
+        """
+        survivors: Dict[Tuple[str, str, str], list] = {} # (user_id, *key) -> [id, unit, quantity, expires_on, changed]
+        merged_away = []
+        for row_id, user_id, name_key, unit_key, item_name, unit, quantity, expires_on in conn.execute(_ALL_ROWS).fetchall():
+            key = item_key(item_name, unit)
+            survivor = survivors.get((user_id, *key))
+            if survivor is None:
+                survivors[(user_id, *key)] = [row_id, unit, quantity, expires_on, key != (name_key, unit_key)]
+                continue
+            survivor[2] = round_quantity(survivor[2] + converter.convert(quantity, unit, survivor[1], key[0]))
+            survivor[3] = earliest(survivor[3], expires_on)
+            survivor[4] = True
+            merged_away.append(row_id)
+        changed = [(key, survivor) for key, survivor in survivors.items() if survivor[4]]
+        if not changed:
+            return
+        conn.executemany(_DELETE, [(row_id,) for row_id in merged_away])
+        # Park the keys first, so no row takes a key another row has not moved away from yet
+        conn.executemany(_SET_KEY, [(f"\0{survivor[0]}", survivor[0]) for _, survivor in changed])
+        conn.executemany(_SET_ROW, [(key[1], key[2], survivor[2], survivor[3], survivor[0]) for key, survivor in changed])
+        logger.info(f"Re-keyed {len(changed)} inventory items to unit dimensions, merging {len(merged_away)} rows into them.")
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock, self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def has_user(self, user_id: str) -> bool:
+        with self._connection() as conn:
+            return conn.execute(_HAS_USER, (user_id,)).fetchone() is not None
+
+    def version(self, user_id: str) -> int:
+        with self._connection() as conn:
+            return self._version(conn, user_id)
+
+    def count(self, user_id: str) -> int:
+        with self._connection() as conn:
+            return conn.execute(_COUNT, (user_id,)).fetchone()[0]
+
+    def get(self, user_id: str, item_name: str, unit: str) -> Optional[InventoryItem]:
+        with self._connection() as conn:
+            return _item(conn.execute(_GET, (user_id, *item_key(item_name, unit))).fetchone())
+
+    def find_by_name(self, user_id: str, item_name: str) -> Optional[InventoryItem]:
+        with self._connection() as conn:
+            row = conn.execute(_FIND_BY_NAME, (user_id, normalize(item_name))).fetchone()
+            if row is None:
+                resolved = self._resolve_name(conn, user_id, item_name)
+                if resolved is not None:
+                    row = conn.execute(_FIND_BY_NAME, (user_id, resolved)).fetchone()
+            return _item(row)
+
+    def _resolve_name(self, conn: sqlite3.Connection, user_id: str, item_name: str) -> Optional[str]:
+        # The version is read before the names: a write in between only makes the index newer than its label
+        version = self._version(conn, user_id)
+        with self._names_lock:
+            cached = self._names.get(user_id)
+            if cached is None or cached[0] != version:
+                index = NameIndex()
+                for (name_key,) in conn.execute(_NAMES, (user_id,)):
+                    index.add(name_key)
+                cached = self._names[user_id] = (version, index)
+            self._names.move_to_end(user_id)
+            if len(self._names) > NAME_INDEX_USERS:
+                self._names.popitem(last=False)
+            return cached[1].resolve(item_name)
+
+    def list_items(self, user_id: str) -> List[InventoryItem]:
+        with self._connection() as conn:
+            return [_item(row) for row in conn.execute(_LIST, (user_id,))]
+
+    def snapshot(self, user_id: str) -> Tuple[int, List[InventoryItem]]:
+        with self._connection() as conn:
+            conn.execute("BEGIN") # One read transaction: the version and the items come from the same snapshot
+            try:
+                return self._version(conn, user_id), [_item(row) for row in conn.execute(_LIST, (user_id,))]
+            finally:
+                conn.execute("COMMIT")
+
+    def expiring(self, user_id: str, last_day: str) -> List[InventoryItem]:
+        with self._connection() as conn:
+            return [_item(row) for row in conn.execute(_EXPIRING, (user_id, last_day))]
+
+    def add(self, user_id: str, item_name: str, quantity: float, unit: str,
+            expected_version: Optional[int] = None, expires_on: Optional[str] = None) -> Tuple[InventoryItem, bool]:
+        return self.add_many(user_id, [(item_name, quantity, unit, expires_on)], expected_version)[0]
+
+    def remove(self, user_id: str, item_name: str, quantity: float, unit: str,
+               expected_version: Optional[int] = None) -> Tuple[str, Optional[InventoryItem]]:
+        return self.remove_many(user_id, [(item_name, quantity, unit)], expected_version)[0]
+
+    def add_many(self, user_id: str, entries: List[AddEntry],
+                 expected_version: Optional[int] = None) -> List[Tuple[InventoryItem, bool]]:
+        with self._transaction() as conn:
+            self._check_version(conn, user_id, expected_version)
+            conn.execute(_ADD_USER, (user_id,))
+            results = [self._add(conn, user_id, item_name, quantity, unit, expires_on)
+                       for item_name, quantity, unit, expires_on in entries]
+            conn.execute(_BUMP_VERSION, (user_id,))
+            return results
+
+    def remove_many(self, user_id: str, entries: List[BatchEntry],
+                    expected_version: Optional[int] = None) -> List[Tuple[str, Optional[InventoryItem]]]:
+        with self._transaction() as conn:
+            self._check_version(conn, user_id, expected_version)
+            results = [self._remove(conn, user_id, item_name, quantity, unit) for item_name, quantity, unit in entries]
+            if any(outcome in (REMOVED, USED_UP) for outcome, _ in results):
+                conn.execute(_BUMP_VERSION, (user_id,))
+            return results
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection, user_id: str) -> int:
+        row = conn.execute(_VERSION, (user_id,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def _check_version(self, conn: sqlite3.Connection, user_id: str, expected_version: Optional[int]) -> None:
+        if expected_version is not None:
+            actual = self._version(conn, user_id)
+            if actual != expected_version:
+                raise VersionConflict(user_id, expected_version, actual)
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, user_id: str, item_name: str, quantity: float, unit: str,
+             expires_on: Optional[str]) -> Tuple[InventoryItem, bool]:
+        name_key, unit_key = item_key(item_name, unit)
+        row = conn.execute(_GET, (user_id, name_key, unit_key)).fetchone()
+        if row is not None:
+            item = _item(row)
+            item["quantity"] = round_quantity(item["quantity"] + converter.convert(quantity, unit, item["unit"], name_key))
+            if expires_on is not None:
+                item["expires_on"] = earliest(item.get("expires_on"), expires_on)
+            conn.execute(_SET_QUANTITY_AND_EXPIRY, (item["quantity"], item.get("expires_on"), row[0]))
+            return item, False
+        conn.execute(_INSERT, (user_id, name_key, unit_key, item_name, unit, quantity, expires_on))
+        item = {"item_name": item_name, "quantity": quantity, "unit": unit}
+        if expires_on is not None:
+            item["expires_on"] = expires_on
+        return item, True
+
+    @staticmethod
+    def _remove(conn: sqlite3.Connection, user_id: str, item_name: str, quantity: float, unit: str) -> Tuple[str, Optional[InventoryItem]]:
+        row = conn.execute(_GET, (user_id, *item_key(item_name, unit))).fetchone()
+        if row is None:
+            return (NOT_FOUND if conn.execute(_COUNT, (user_id,)).fetchone()[0] else EMPTY), None
+        item = _item(row)
+        left = remaining_after(item["quantity"], converter.convert(quantity, unit, item["unit"], item_name))
+        if left is None:
+            return INSUFFICIENT, item
+        if left:
+            item["quantity"] = left
+            conn.execute(_SET_QUANTITY, (item["quantity"], row[0]))
+            return REMOVED, item
+        conn.execute(_DELETE, (row[0],))
+        return USED_UP, item
+
+    def delete(self, user_id: str, item_name: str, unit: str, expected_version: Optional[int] = None) -> Optional[InventoryItem]:
+        with self._transaction() as conn:
+            self._check_version(conn, user_id, expected_version)
+            row = conn.execute(_GET, (user_id, *item_key(item_name, unit))).fetchone()
+            if row is not None:
+                conn.execute(_DELETE, (row[0],))
+                conn.execute(_BUMP_VERSION, (user_id,))
+            return _item(row)
+
+    def replace(self, user_id: str, items: List[InventoryItem]) -> None:
+        merged: Dict[ItemKey, InventoryItem] = {}
+        for item in items:
+            key = item_key(item["item_name"], item["unit"])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(item)
+            else:
+                existing["quantity"] = round_quantity(
+                    existing["quantity"] + converter.convert(item["quantity"], item["unit"], existing["unit"], key[0]))
+                existing["expires_on"] = earliest(existing.get("expires_on"), item.get("expires_on"))
+        with self._transaction() as conn:
+            conn.execute(_ADD_USER, (user_id,))
+            conn.execute(_BUMP_VERSION, (user_id,))
+            conn.execute(_DELETE_USER_ITEMS, (user_id,))
+            conn.executemany(_INSERT, [
+                (user_id, *key, item["item_name"], item["unit"], item["quantity"], item.get("expires_on"))
+                for key, item in merged.items()
+            ])
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
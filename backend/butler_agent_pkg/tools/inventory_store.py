@@ -0,0 +1,519 @@
+# butler_agent_pkg/tools/inventory_store.py
+"""Inventory backends behind the inventory tools.
+
+`InventoryBackend` is the interface the tools use. Items are plain dicts
+(`{"item_name", "quantity", "unit"}`), as the tools have always returned them, plus
+`"expires_on"` (ISO date) for items given a best-before date.
+Every read-modify-write (add, remove) is a single backend call, so a backend can make
+it atomic. There are two implementations:
+
+- `InMemoryInventoryBackend` (the default): per-user hash indexes in this process.
+- `SqliteInventoryBackend` (`inventory_sqlite.py`): a SQLite database in WAL mode,
+  shared by every worker on the host and kept across restarts.
+
+The in-memory backend has two indexes per user:
+
+- by `item_key()`, the normalized name and the unit's dimension: add, remove and exact
+  lookups are O(1);
+- by normalized name alone: `check_item_in_inventory` is O(1). When an item is stored
+  in several dimensions (flour in kg and in cups), the one added first is returned.
+
+A name with no exact match is resolved loosely (shared_libraries/ingredient_names.py):
+"tomatoes" finds "Tomato", "scallion" finds "green onions", "brocoli" finds "broccoli".
+The in-memory backend keeps a per-user `NameIndex` of its names for this, updated as
+names come and go.
+
+Units are resolved by the unit engine (shared_libraries/units.py): "2 kg" and "500 g" of
+flour are the same item, and so are "100 ml" and "3 tbsp" of soy sauce (by density).
+An item keeps the unit it was first added in; other quantities are converted to it.
+
+Both are insertion-ordered dicts, so listing keeps the order items were first added.
+A removed item that is added again goes to the end. Keys are normalized once, on the
+way in, so no per-row `.lower()` calls are needed. Dated items are also in a per-user
+`ExpiryIndex` (inventory_expiry.py), a min-heap that answers `expiring()` without a scan.
+
+An item holds one quantity and so one date: adding a dated quantity to an item keeps
+the earlier of the two dates, since the older stock goes bad first. Removing part of an
+item keeps its date.
+
+Concurrency: each user's inventory has a version that every change increments. Mutations
+take an optional `expected_version` and raise `VersionConflict` if the inventory changed
+since the caller read it (compare-and-swap). A caller that decides what to write from
+what it read, such as "remove all of it" or a client editing a list it fetched earlier,
+uses this instead of holding a lock across the read. `retry_on_conflict` re-runs such
+a read-decide-write step a bounded number of times. The in-memory backend locks per
+user, over `LOCK_STRIPES` striped locks, so busy households don't serialize everyone else.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from ..shared_libraries.ingredient_names import NameIndex
+from ..shared_libraries.units import converter, round_quantity
+from .inventory_expiry import ExpiryIndex
+
+if TYPE_CHECKING:
+    from .inventory_journal import InventoryJournal
+
+InventoryItem = Dict[str, Any]
+ItemKey = Tuple[str, str]
+BatchEntry = Tuple[str, float, str] # (item_name, quantity, unit)
+AddEntry = Tuple[str, float, str, Optional[str]] # (item_name, quantity, unit, expires_on)
+T = TypeVar("T")
+
+# Outcomes of InventoryBackend.remove
+REMOVED = "removed" # Quantity reduced, some left
+USED_UP = "used_up" # Exactly the stored quantity removed; the item is gone
+INSUFFICIENT = "insufficient" # Less stored than requested; nothing changed
+NOT_FOUND = "not_found"
+EMPTY = "empty" # The user has no items at all
+
+LOCK_STRIPES = 64
+MAX_CONFLICT_RETRIES = 5
+# Bump whenever item_key() maps an existing (name, unit) to a different key, so stores re-key their rows
+KEY_FORMAT_VERSION = 1
+
+
+class VersionConflict(Exception):
+    """The user's inventory changed after the caller read it; nothing was written."""
+
+    def __init__(self, user_id: str, expected: int, actual: int):
+        super().__init__(f"Inventory of {user_id} is at version {actual}, not {expected}.")
+        self.user_id = user_id
+        self.expected = expected
+        self.actual = actual
+
+
+def normalize(text: str) -> str:
+    """Case-folds and collapses whitespace: 'Olive  Oil ' and 'olive oil' are the same item."""
+    return " ".join(text.split()).lower()
+
+
+def item_key(item_name: str, unit: str) -> ItemKey:
+    """(normalized name, unit dimension): quantities with the same key combine after conversion."""
+    name_key = normalize(item_name)
+    return name_key, converter.key(unit, name_key)
+
+
+def remaining_after(stored: float, amount: float) -> Optional[float]:
+    """What is left of `stored` after taking `amount`: None if that is more than there is, 0 if
+    it is all of it (up to float rounding from unit conversion)."""
+    left = round_quantity(stored - amount)
+    if abs(left) <= 1e-9 * max(1.0, abs(stored)):
+        return 0
+    return left if left > 0 else None
+
+
+def earliest(expires_on: Optional[str], other: Optional[str]) -> Optional[str]:
+    """The earlier of two optional ISO dates; None only if both are."""
+    if expires_on is None or other is None:
+        return expires_on or other
+    return min(expires_on, other)
+
+
+class InventoryBackend(ABC):
+    """Per-user inventories. Implementations are thread-safe."""
+
+    @abstractmethod
+    def has_user(self, user_id: str) -> bool:
+        """Whether the user ever had an inventory (it may be empty now)."""
+
+    @abstractmethod
+    def version(self, user_id: str) -> int:
+        """Incremented by every change to the user's inventory; 0 for a user never written."""
+
+    @abstractmethod
+    def count(self, user_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, user_id: str, item_name: str, unit: str) -> Optional[InventoryItem]:
+        ...
+
+    @abstractmethod
+    def find_by_name(self, user_id: str, item_name: str) -> Optional[InventoryItem]:
+        """Returns the first-added item with this name, in any unit; without one, the item the name
+        most likely means (a plural, synonym, branded variant or typo of its name)."""
+
+    @abstractmethod
+    def list_items(self, user_id: str) -> List[InventoryItem]:
+        """The user's items in insertion order. Callers must not modify the list."""
+
+    @abstractmethod
+    def snapshot(self, user_id: str) -> Tuple[int, List[InventoryItem]]:
+        """(version, copies of the items) as of one instant."""
+
+    @abstractmethod
+    def expiring(self, user_id: str, last_day: str) -> List[InventoryItem]:
+        """Copies of the items whose `expires_on` is on or before `last_day` (ISO date), soonest first."""
+
+    # Mutations raise VersionConflict when `expected_version` is given and isn't current.
+    @abstractmethod
+    def add(self, user_id: str, item_name: str, quantity: float, unit: str,
+            expected_version: Optional[int] = None, expires_on: Optional[str] = None) -> Tuple[InventoryItem, bool]:
+        """Adds to an existing (name, unit) item or creates it, keeping the earlier expiry date.
+        Returns (a copy of the item, created)."""
+
+    @abstractmethod
+    def remove(self, user_id: str, item_name: str, quantity: float, unit: str,
+               expected_version: Optional[int] = None) -> Tuple[str, Optional[InventoryItem]]:
+        """Removes a quantity, deleting the item when it is used up exactly. Returns (outcome, a copy of the
+        item): as it is after the call, or as it was before it for USED_UP and INSUFFICIENT."""
+
+    @abstractmethod
+    def add_many(self, user_id: str, entries: List[AddEntry],
+                 expected_version: Optional[int] = None) -> List[Tuple[InventoryItem, bool]]:
+        """`add` for each entry, in order, as one atomic step: no other call sees part of the batch."""
+
+    @abstractmethod
+    def remove_many(self, user_id: str, entries: List[BatchEntry],
+                    expected_version: Optional[int] = None) -> List[Tuple[str, Optional[InventoryItem]]]:
+        """`remove` for each entry, in order, as one atomic step. An entry that fails doesn't stop the rest."""
+
+    @abstractmethod
+    def delete(self, user_id: str, item_name: str, unit: str, expected_version: Optional[int] = None) -> Optional[InventoryItem]:
+        """Removes the (name, unit) item entirely. Returns it, or None if it was not there."""
+
+    @abstractmethod
+    def replace(self, user_id: str, items: List[InventoryItem]) -> None:
+        """Sets a user's whole inventory (seeding, imports). Items with the same (name, unit) are merged."""
+
+    def close(self) -> None:
+        pass
+
+
+def retry_on_conflict(backend: InventoryBackend, user_id: str, attempt: Callable[[int], T],
+                      max_retries: int = MAX_CONFLICT_RETRIES) -> T:
+    """Runs `attempt(version)` until it doesn't raise VersionConflict, at most 1 + `max_retries` times.
+
+    `attempt` reads what it needs, then passes `version` as `expected_version` to its write.
+    The last VersionConflict is raised if every attempt lost the race.
+    """
+    for retry in range(max_retries + 1):
+        try:
+            return attempt(backend.version(user_id))
+        except VersionConflict:
+            if retry == max_retries:
+                raise
+    raise AssertionError("unreachable")
+
+
+class InMemoryInventoryBackend(InventoryBackend):
+    """Inventories held in this process, locked per user (striped); each operation takes microseconds.
+
+    With a `journal` (see inventory_journal.py), the inventories it holds are recovered at
+    construction and every later change is appended to it. Each change is one journal entry,
+    so a user's version is their journal seq and carries over restarts.
+    """
+
+    def __init__(self, initial: Optional[Dict[str, List[InventoryItem]]] = None, lock_stripes: int = LOCK_STRIPES,
+                 journal: Optional["InventoryJournal"] = None):
+        self._items: Dict[str, Dict[ItemKey, InventoryItem]] = {}
+        self._by_name: Dict[str, Dict[str, Dict[str, InventoryItem]]] = {} # user -> name -> unit -> item
+        self._listing: Dict[str, List[InventoryItem]] = {} # Cached list_items() results, dropped when items come or go
+        self._versions: Dict[str, int] = {}
+        self._expiry: Dict[str, ExpiryIndex] = {}
+        self._names: Dict[str, NameIndex] = {} # user -> loose index over the keys of _by_name
+        self._locks = [threading.RLock() for _ in range(max(1, lock_stripes))]
+        self._journal: Optional["InventoryJournal"] = None
+        self._journal_batches: Dict[str, List[List[Any]]] = {} # Changes of an add_many/remove_many in progress
+        if journal is not None:
+            for user_id, items, tail in journal.recover():
+                self.replace(user_id, items)
+                for entry in tail:
+                    self._replay(user_id, entry)
+                # Replaying counted only the snapshot and its tail; continue from the journaled version
+                self._versions[user_id] = journal.seq(user_id)
+            self._journal = journal
+        for user_id, items in (initial or {}).items():
+            self.replace(user_id, items)
+
+    def _lock(self, user_id: str) -> threading.RLock:
+        return self._locks[hash(user_id) % len(self._locks)]
+
+    def _check_version(self, user_id: str, expected_version: Optional[int]) -> None:
+        if expected_version is not None and self._versions.get(user_id, 0) != expected_version:
+            raise VersionConflict(user_id, expected_version, self._versions.get(user_id, 0))
+
+    def _changed(self, user_id: str, change: List[Any]) -> None:
+        """Called under the user's lock after each change: bumps the version and journals it."""
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        if self._journal is None:
+            return
+        batch = self._journal_batches.get(user_id)
+        if batch is not None:
+            batch.append(change)
+        else:
+            self._journal.append(user_id, [change], self._items.get(user_id, {}).values())
+
+    @contextmanager
+    def _journal_batch(self, user_id: str) -> Iterator[None]:
+        """Journals every change made inside the block in one append."""
+        if self._journal is None:
+            yield
+            return
+        self._journal_batches[user_id] = []
+        try:
+            yield
+        finally:
+            self._journal.append(user_id, self._journal_batches.pop(user_id), self._items.get(user_id, {}).values())
+
+    def _replay(self, user_id: str, entry: List[Any]) -> None:
+        op = entry[2]
+        if op == "add":
+            self.add(user_id, entry[3], entry[4], entry[5], expires_on=entry[6] if len(entry) > 6 else None)
+        elif op == "remove":
+            self.remove(user_id, entry[3], entry[4], entry[5])
+        elif op == "delete":
+            self.delete(user_id, entry[3], entry[4])
+        elif op == "replace":
+            self.replace(user_id, entry[3])
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self._items
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def count(self, user_id: str) -> int:
+        return len(self._items.get(user_id, ()))
+
+    def get(self, user_id: str, item_name: str, unit: str) -> Optional[InventoryItem]:
+        items = self._items.get(user_id)
+        return items.get(item_key(item_name, unit)) if items else None
+
+    def find_by_name(self, user_id: str, item_name: str) -> Optional[InventoryItem]:
+        with self._lock(user_id):
+            by_name = self._by_name.get(user_id, {})
+            units = by_name.get(normalize(item_name))
+            if units is None and user_id in self._names:
+                resolved = self._names[user_id].resolve(item_name)
+                units = by_name.get(resolved) if resolved is not None else None
+            return next(iter(units.values())) if units else None
+
+    def list_items(self, user_id: str) -> List[InventoryItem]:
+        listing = self._listing.get(user_id)
+        if listing is None:
+            with self._lock(user_id):
+                listing = self._listing[user_id] = list(self._items.get(user_id, {}).values())
+        return listing
+
+    def snapshot(self, user_id: str) -> Tuple[int, List[InventoryItem]]:
+        with self._lock(user_id):
+            return self.version(user_id), [dict(item) for item in self._items.get(user_id, {}).values()]
+
+    def expiring(self, user_id: str, last_day: str) -> List[InventoryItem]:
+        with self._lock(user_id):
+            index, items = self._expiry.get(user_id), self._items.get(user_id, {})
+            return [dict(items[key]) for key in index.until(last_day)] if index else []
+
+    def add(self, user_id: str, item_name: str, quantity: float, unit: str,
+            expected_version: Optional[int] = None, expires_on: Optional[str] = None) -> Tuple[InventoryItem, bool]:
+        name_key, unit_key = item_key(item_name, unit)
+        with self._lock(user_id):
+            self._check_version(user_id, expected_version)
+            items = self._items.setdefault(user_id, {})
+            item = items.get((name_key, unit_key))
+            created = item is None
+            if created:
+                item = {"item_name": item_name, "quantity": quantity, "unit": unit}
+                if expires_on is not None:
+                    item["expires_on"] = expires_on
+                self._insert(user_id, items, name_key, unit_key, item)
+            else:
+                item["quantity"] = round_quantity(item["quantity"] + converter.convert(quantity, unit, item["unit"], name_key))
+                if expires_on is not None and expires_on != item.get("expires_on"):
+                    item["expires_on"] = earliest(item.get("expires_on"), expires_on)
+                    self._expiry.setdefault(user_id, ExpiryIndex()).set((name_key, unit_key), item["expires_on"])
+            self._changed(user_id, ["add", item_name, quantity, unit] + ([expires_on] if expires_on is not None else []))
+            return dict(item), created
+
+    def remove(self, user_id: str, item_name: str, quantity: float, unit: str,
+               expected_version: Optional[int] = None) -> Tuple[str, Optional[InventoryItem]]:
+        with self._lock(user_id):
+            self._check_version(user_id, expected_version)
+            if not self._items.get(user_id):
+                return EMPTY, None
+            item = self.get(user_id, item_name, unit)
+            if item is None:
+                return NOT_FOUND, None
+            left = remaining_after(item["quantity"], converter.convert(quantity, unit, item["unit"], item_name))
+            if left is None:
+                return INSUFFICIENT, dict(item)
+            if left:
+                item["quantity"] = left
+                outcome, item = REMOVED, dict(item)
+            else:
+                outcome, item = USED_UP, self._drop(user_id, *item_key(item_name, unit))
+            self._changed(user_id, ["remove", item_name, quantity, unit])
+            return outcome, item
+
+    def add_many(self, user_id: str, entries: List[AddEntry],
+                 expected_version: Optional[int] = None) -> List[Tuple[InventoryItem, bool]]:
+        with self._lock(user_id), self._journal_batch(user_id):
+            self._check_version(user_id, expected_version)
+            return [self.add(user_id, item_name, quantity, unit, expires_on=expires_on)
+                    for item_name, quantity, unit, expires_on in entries]
+
+    def remove_many(self, user_id: str, entries: List[BatchEntry],
+                    expected_version: Optional[int] = None) -> List[Tuple[str, Optional[InventoryItem]]]:
+        with self._lock(user_id), self._journal_batch(user_id):
+            self._check_version(user_id, expected_version)
+            return [self.remove(user_id, item_name, quantity, unit) for item_name, quantity, unit in entries]
+
+    def delete(self, user_id: str, item_name: str, unit: str, expected_version: Optional[int] = None) -> Optional[InventoryItem]:
+        with self._lock(user_id):
+            self._check_version(user_id, expected_version)
+            item = self._drop(user_id, *item_key(item_name, unit))
+            if item is not None:
+                self._changed(user_id, ["delete", item_name, unit])
+            return item
+
+    def replace(self, user_id: str, items: List[InventoryItem]) -> None:
+        with self._lock(user_id):
+            self._items[user_id] = {}
+            self._by_name[user_id] = {}
+            self._names[user_id] = NameIndex()
+            self._expiry.pop(user_id, None)
+            self._listing.pop(user_id, None)
+            for item in items:
+                key = item_key(item["item_name"], item["unit"])
+                existing = self._items[user_id].get(key)
+                if existing is not None:
+                    existing["quantity"] = round_quantity(
+                        existing["quantity"] + converter.convert(item["quantity"], item["unit"], existing["unit"], key[0]))
+                    if item.get("expires_on") is not None:
+                        existing["expires_on"] = earliest(existing.get("expires_on"), item["expires_on"])
+                        self._expiry.setdefault(user_id, ExpiryIndex()).set(key, existing["expires_on"])
+                else:
+                    self._insert(user_id, self._items[user_id], *key, item)
+            self._changed(user_id, ["replace", items])
+
+    def _drop(self, user_id: str, name_key: str, unit_key: str) -> Optional[InventoryItem]:
+        item = self._items.get(user_id, {}).pop((name_key, unit_key), None)
+        if item is None:
+            return None
+        units = self._by_name[user_id][name_key]
+        del units[unit_key]
+        if not units:
+            del self._by_name[user_id][name_key]
+            self._names[user_id].discard(name_key)
+        if item.get("expires_on") is not None:
+            self._expiry[user_id].discard((name_key, unit_key))
+        self._listing.pop(user_id, None)
+        return item
+
+    def _insert(self, user_id: str, items: Dict[ItemKey, InventoryItem], name_key: str, unit_key: str, item: InventoryItem) -> None:
+        items[(name_key, unit_key)] = item
+        units = self._by_name.setdefault(user_id, {}).setdefault(name_key, {})
+        if not units:
+            self._names.setdefault(user_id, NameIndex()).add(name_key)
+        units[unit_key] = item
+        if item.get("expires_on") is not None:
+            self._expiry.setdefault(user_id, ExpiryIndex()).set((name_key, unit_key), item["expires_on"])
+        self._listing.pop(user_id, None)
+
+
+# Stress check: hammers one user from many threads and coroutines and verifies quantities are conserved.
+if __name__ == "__main__":
+    import asyncio
+    import os
+    import random
+    import tempfile
+    import time
+    from collections import Counter
+
+    from .inventory_sqlite import SqliteInventoryBackend
+    # The package module's names, not this __main__ copy's: inventory_sqlite raises its VersionConflict
+    from .inventory_store import REMOVED, USED_UP, InMemoryInventoryBackend, VersionConflict, retry_on_conflict
+
+    USER = "household"
+    ITEMS = [f"item_{i}" for i in range(8)] # Few items, so writers collide constantly
+    THREADS, COROUTINES, OPS = 8, 16, 300
+
+    def stress(backend: InventoryBackend) -> Counter:
+        """Returns the conflicts seen and retries exhausted; asserts on any lost or phantom update."""
+        backend.replace(USER, [{"item_name": name, "quantity": 1000, "unit": "pieces"} for name in ITEMS])
+        deltas, stats, tally_lock = Counter(), Counter(), threading.Lock()
+
+        def record(item_name: str, delta: float) -> None:
+            with tally_lock:
+                deltas[item_name] += delta
+
+        def take_half(item_name: str, version: int) -> float:
+            """Read-decide-write: removes half of what the item had when read."""
+            item = backend.get(USER, item_name, "pieces")
+            amount = item["quantity"] // 2 if item else 0
+            if not amount:
+                return 0
+            time.sleep(0) # Let other writers in between the read and the write
+            try:
+                outcome, _ = backend.remove(USER, item_name, amount, "pieces", expected_version=version)
+            except VersionConflict:
+                with tally_lock:
+                    stats["conflicts"] += 1
+                raise
+            assert outcome == REMOVED, outcome # The version pins the quantity: anything else is a lost update
+            return amount
+
+        def thread_worker(seed: int) -> None:
+            rng = random.Random(seed)
+            for _ in range(OPS):
+                item_name = rng.choice(ITEMS)
+                if rng.random() < 0.3:
+                    try:
+                        record(item_name, -retry_on_conflict(backend, USER, lambda version: take_half(item_name, version)))
+                    except VersionConflict:
+                        with tally_lock:
+                            stats["retries_exhausted"] += 1
+                else:
+                    quantity = rng.randint(1, 5)
+                    backend.add(USER, item_name, quantity, "pieces")
+                    record(item_name, quantity)
+
+        async def coroutine_worker(seed: int) -> None:
+            rng = random.Random(seed)
+            for _ in range(OPS):
+                item_name, quantity = rng.choice(ITEMS), rng.randint(1, 5)
+                if rng.random() < 0.5:
+                    backend.add(USER, item_name, quantity, "pieces")
+                    record(item_name, quantity)
+                elif backend.remove(USER, item_name, quantity, "pieces")[0] in (REMOVED, USED_UP):
+                    record(item_name, -quantity)
+                await asyncio.sleep(0)
+
+        async def event_loop_worker(seed: int) -> None:
+            await asyncio.gather(*(coroutine_worker(seed * 1000 + index) for index in range(COROUTINES)))
+
+        workers = [threading.Thread(target=thread_worker, args=(seed,)) for seed in range(THREADS)]
+        workers += [threading.Thread(target=asyncio.run, args=(event_loop_worker(seed),)) for seed in range(THREADS, THREADS + 2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        for item_name in ITEMS:
+            item = backend.get(USER, item_name, "pieces")
+            expected = 1000 + deltas[item_name]
+            assert (item["quantity"] if item else 0) == expected, f"{item_name}: {item} != {expected}"
+        return stats
+
+    def check_isolation(backend: InMemoryInventoryBackend) -> None:
+        """A user whose lock is held doesn't block another user on a different stripe."""
+        busy, other = "busy_user", next(f"user_{i}" for i in range(1000) if backend._lock(f"user_{i}") is not backend._lock("busy_user"))
+        with backend._lock(busy):
+            worker = threading.Thread(target=backend.add, args=(other, "milk", 1, "liter"))
+            worker.start()
+            worker.join(timeout=1.0)
+            assert not worker.is_alive(), "An unrelated user was blocked"
+
+    memory_stats = stress(InMemoryInventoryBackend())
+    check_isolation(InMemoryInventoryBackend())
+    print(f"memory: quantities conserved; {dict(memory_stats) or 'no conflicts'}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_backend = SqliteInventoryBackend(os.path.join(tmp_dir, "inventory.sqlite3"), pool_size=4)
+        sqlite_stats = stress(sqlite_backend)
+        sqlite_backend.close()
+    print(f"sqlite: quantities conserved; {dict(sqlite_stats) or 'no conflicts'}")
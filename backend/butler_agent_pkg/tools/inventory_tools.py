@@ -1,59 +1,105 @@
 # butler_agent_pkg/tools/inventory_tools.py
 """Tools for managing user's kitchen inventory. 
-These tools interact with a mocked inventory database.
+These tools interact with an inventory backend (see inventory_store.py): an in-memory,
+hash-indexed store by default (journaled to disk when INVENTORY_JOURNAL_DIR is set), or a
+SQLite database when INVENTORY_DB_PATH is set.
 """
 
 import logging
-from typing import List, Dict, Any, Union
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from ..config import settings
+from ..shared_libraries.log_pipeline import Payload
+from ..shared_libraries.units import converter, round_quantity
+from . import inventory_store as store
+from .inventory_journal import InventoryJournal
+from .inventory_sqlite import SqliteInventoryBackend
 
 logger = logging.getLogger(__name__)
 
-# Mock database for inventory items
-# In a real application, this would be a connection to a proper database (e.g., MongoDB)
-mock_inventory_db: Dict[str, List[Dict[str, Any]]] = {
-    "user_default": [ # Default inventory for new sessions or testing
-        {"item_name": "eggs", "quantity": 6, "unit": "pieces"},
-        {"item_name": "milk", "quantity": 0.5, "unit": "liter"},
-        {"item_name": "butter", "quantity": 100, "unit": "grams"},
-    ]
-}
-
-def add_item_to_inventory(user_id: str, item_name: str, quantity: Union[int, float], unit: str) -> Dict[str, Any]:
+DEFAULT_INVENTORY = [ # Default inventory for new sessions or testing
+    {"item_name": "eggs", "quantity": 6, "unit": "pieces"},
+    {"item_name": "milk", "quantity": 0.5, "unit": "liter"},
+    {"item_name": "butter", "quantity": 100, "unit": "grams"},
+]
+
+# Change journal of the in-memory backend; the SQLite database is durable by itself.
+inventory_journal: Optional[InventoryJournal] = None
+if settings.INVENTORY_JOURNAL_DIR and settings.INVENTORY_DB_PATH:
+    logger.warning("INVENTORY_JOURNAL_DIR is ignored: INVENTORY_DB_PATH is set, and the SQLite backend is not journaled.")
+elif settings.INVENTORY_JOURNAL_DIR:
+    inventory_journal = InventoryJournal(settings.INVENTORY_JOURNAL_DIR, snapshot_every=settings.INVENTORY_SNAPSHOT_EVERY,
+                                         fsync=settings.INVENTORY_JOURNAL_FSYNC)
+
+# Process-wide inventory backend; in memory unless INVENTORY_DB_PATH is set.
+inventory_store: store.InventoryBackend = (
+    SqliteInventoryBackend(settings.INVENTORY_DB_PATH, pool_size=settings.INVENTORY_DB_POOL_SIZE)
+    if settings.INVENTORY_DB_PATH
+    else store.InMemoryInventoryBackend(journal=inventory_journal)
+)
+if not inventory_store.has_user("user_default"): # A database or journal keeps the user's changes across restarts
+    inventory_store.replace("user_default", [dict(item) for item in DEFAULT_INVENTORY])
+
+def _expiry_date(expires_on: Any, expires_in_days: Any = None) -> Optional[str]:
+    """`expires_on`, or today plus `expires_in_days`, as an ISO date ('YYYY-MM-DD'); None if neither is given.
+    Raises ValueError if it is not a date or a whole number of days."""
+    if expires_on is None or expires_on == "":
+        if expires_in_days is None or expires_in_days == "":
+            return None
+        try:
+            return (date.today() + timedelta(days=int(expires_in_days))).isoformat()
+        except OverflowError as e: # Past year 9999, or an infinite float
+            raise ValueError(f"expires_in_days out of range: {expires_in_days!r}") from e
+    return date.fromisoformat(str(expires_on).strip()).isoformat()
+
+def add_item_to_inventory(user_id: str, item_name: str, quantity: Union[int, float], unit: str, expires_on: Optional[str] = None,
+                          expires_in_days: Optional[int] = None) -> Dict[str, Any]:
     """Adds a specified quantity of an item to the user's inventory.
 
-    If the item with the same name and unit already exists, its quantity is updated.
-    Otherwise, a new item is added.
+    If the item with the same name already exists in a compatible unit (kg and grams, liter
+    and ml, pieces), the quantity is converted and added to it. Otherwise, a new item is added.
 
     Args:
         user_id (str): The unique identifier for the user.
         item_name (str): The name of the item to add (e.g., 'flour', 'eggs').
         quantity (Union[int, float]): The amount of the item to add.
         unit (str): The unit of measurement for the item (e.g., 'kg', 'pieces', 'liter').
+        expires_on (Optional[str]): Best-before date as 'YYYY-MM-DD', if known. When added to an existing
+                                    item, the item keeps the earlier of its date and this one.
+        expires_in_days (Optional[int]): For a relative best-before date ("good for 5 more days"), the number
+                                         of days from today. Ignored when expires_on is given.
 
     Returns:
         Dict[str, Any]: A dictionary containing the status of the operation and a message.
                          Example: {'status': 'success', 'message': '2 kg of flour added to inventory.'}
-                         Example: {'status': 'success', 'message': 'flour quantity updated to 2.5 kg.'}
+                         Example: {'status': 'success', 'message': 'flour quantity updated to 2.5 kg.'} (after adding 500 grams to 2 kg)
+                         Example: {'status': 'success', 'message': '1 liter of milk added to inventory. Best before 2026-10-20.'}
     """
-    logger.info(f"Attempting to add {quantity} {unit} of {item_name} for user {user_id}")
-    if user_id not in mock_inventory_db:
-        mock_inventory_db[user_id] = []
-    
-    for item in mock_inventory_db[user_id]:
-        if item["item_name"].lower() == item_name.lower() and item["unit"].lower() == unit.lower():
-            item["quantity"] += quantity
-            logger.info(f"Updated {item_name} quantity to {item['quantity']} {unit} for user {user_id}")
-            return {"status": "success", "message": f"{item_name} quantity updated to {item['quantity']} {unit}."}
+    logger.info("Attempting to add %s %s of %s for user %s", quantity, unit, item_name, user_id)
+    try:
+        expiry = _expiry_date(expires_on, expires_in_days)
+    except ValueError:
+        return {"status": "error", "message": f"Invalid expiry date {expires_on or expires_in_days!r}; use YYYY-MM-DD or a number of days."}
+    item, created = inventory_store.add(user_id, item_name, quantity, unit, expires_on=expiry)
+    return addition_result(user_id, item_name, quantity, unit, item, created)
+
+def addition_result(user_id: str, item_name: str, quantity: Union[int, float], unit: str, item: Dict[str, Any], created: bool) -> Dict[str, Any]:
+    """The add_item_to_inventory result for an `inventory_store.add` that already ran."""
+    best_before = f" Best before {item['expires_on']}." if item.get("expires_on") else ""
+    if not created:
+        logger.info("Updated %s quantity to %s %s for user %s", item_name, item["quantity"], item["unit"], user_id)
+        return {"status": "success", "message": f"{item_name} quantity updated to {item['quantity']} {item['unit']}.{best_before}"}
 
-    mock_inventory_db[user_id].append({"item_name": item_name, "quantity": quantity, "unit": unit})
-    logger.info(f"Added {quantity} {unit} of {item_name} to inventory for user {user_id}")
-    return {"status": "success", "message": f"{quantity} {unit} of {item_name} added to inventory."}
+    logger.info("Added %s %s of %s to inventory for user %s", quantity, unit, item_name, user_id)
+    return {"status": "success", "message": f"{quantity} {unit} of {item_name} added to inventory.{best_before}"}
 
 def remove_item_from_inventory(user_id: str, item_name: str, quantity: Union[int, float], unit: str) -> Dict[str, Any]:
     """Removes a specified quantity of an item from the user's inventory.
 
-    If the quantity to remove is greater than or equal to the available quantity,
-    the item is completely removed from the inventory.
+    If the quantity to remove is equal to the available quantity, the item is completely
+    removed from the inventory. The quantity may be in any unit compatible with the stored
+    one (e.g. grams from an item stored in kg).
 
     Args:
         user_id (str): The unique identifier for the user.
@@ -67,45 +113,125 @@ def remove_item_from_inventory(user_id: str, item_name: str, quantity: Union[int
                          Example: {'status': 'error', 'message': 'Item flour (kg) not found in inventory.'}
                          Example: {'status': 'error', 'message': 'Insufficient quantity of flour. Available: 0.5 kg.'}
     """
-    logger.info(f"Attempting to remove {quantity} {unit} of {item_name} for user {user_id}")
-    if user_id not in mock_inventory_db or not mock_inventory_db[user_id]:
-        logger.warning(f"Inventory not found or empty for user {user_id}")
+    logger.info("Attempting to remove %s %s of %s for user %s", quantity, unit, item_name, user_id)
+    outcome, item = inventory_store.remove(user_id, item_name, quantity, unit)
+    return removal_result(user_id, item_name, quantity, unit, outcome, item)
+
+def removal_result(user_id: str, item_name: str, quantity: Union[int, float], unit: str, outcome: str, item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The remove_item_from_inventory result for an `inventory_store.remove` that already ran."""
+    if outcome == store.EMPTY:
+        logger.warning("Inventory not found or empty for user %s", user_id)
         return {"status": "error", "message": "Inventory not found or is empty for this user."}
+    if outcome == store.NOT_FOUND:
+        logger.warning("Item %s with unit %s not found in inventory for user %s", item_name, unit, user_id)
+        return {"status": "error", "message": f"Item {item_name} ({unit}) not found in inventory."}
+    if outcome == store.REMOVED:
+        remaining_quantity = item["quantity"]
+        logger.info("Removed %s %s of %s. Remaining: %s", quantity, unit, item_name, remaining_quantity)
+        return {"status": "success", "message": f"Removed {quantity} {unit} of {item_name}. Remaining: {remaining_quantity} {item['unit']}."}
+    if outcome == store.INSUFFICIENT:
+        logger.warning("Insufficient quantity of %s to remove. Available: %s", item_name, item["quantity"])
+        return {"status": "error", "message": f"Insufficient quantity of {item_name}. Available: {item['quantity']} {item['unit']}."}
 
-    item_found = False
-    item_to_remove_idx = -1 # Initialize index for removal
-
-    for idx, item in enumerate(mock_inventory_db[user_id]):
-        if item["item_name"].lower() == item_name.lower() and item["unit"].lower() == unit.lower():
-            item_found = True
-            if item["quantity"] > quantity:
-                item["quantity"] -= quantity
-                remaining_quantity = item["quantity"]
-                logger.info(f"Removed {quantity} {unit} of {item_name}. Remaining: {remaining_quantity}")
-                return {"status": "success", "message": f"Removed {quantity} {unit} of {item_name}. Remaining: {remaining_quantity} {unit}."}
-            elif item["quantity"] == quantity:
-                item_to_remove_idx = idx # Mark for removal outside the loop
-                logger.info(f"Marked {item_name} for complete removal as quantity matches.")
-                # Do not return yet, let it be removed after loop
-                break # Item found and processed for removal
-            else: # item["quantity"] < quantity
-                logger.warning(f"Insufficient quantity of {item_name} to remove. Available: {item['quantity']}")
-                return {"status": "error", "message": f"Insufficient quantity of {item_name}. Available: {item['quantity']} {unit}."}
-    
-    if item_to_remove_idx != -1:
-        del mock_inventory_db[user_id][item_to_remove_idx]
-        logger.info(f"Completely removed {item_name} ({unit}) from inventory for user {user_id}.")
-        return {"status": "success", "message": f"Completely removed {item_name} ({unit}) from inventory."}
+    logger.info("Completely removed %s (%s) from inventory for user %s.", item_name, unit, user_id)
+    return {"status": "success", "message": f"Completely removed {item_name} ({unit}) from inventory."}
 
-    if not item_found:
-        logger.warning(f"Item {item_name} with unit {unit} not found in inventory for user {user_id}")
-        return {"status": "error", "message": f"Item {item_name} ({unit}) not found in inventory."}
-    
-    # This case should ideally not be reached if logic is correct, but as a fallback:
-    return {"status": "error", "message": "An unexpected error occurred during item removal."}
+def _merge_batch(items: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, Union[int, float], str, Optional[str], List[int]]], List[Dict[str, Any]]]:
+    """Sums entries for the same item and unit dimension (compared as the inventory does), in the
+    first entry's unit, keeping the earliest expiry date.
+
+    Returns ([(item_name, total quantity, unit, expires_on, positions in `items`)] in first-seen
+    order, [results for invalid entries]).
+    """
+    merged: Dict[Tuple[str, str], Tuple[str, Union[int, float], str, Optional[str], List[int]]] = {}
+    invalid = []
+    for position, entry in enumerate(items):
+        fields = entry if isinstance(entry, dict) else {}
+        item_name, quantity, unit = fields.get("item_name"), fields.get("quantity"), fields.get("unit")
+        if not (isinstance(item_name, str) and item_name.strip() and isinstance(unit, str) and unit.strip()
+                and isinstance(quantity, (int, float)) and not isinstance(quantity, bool) and quantity > 0):
+            invalid.append({"entries": [position], "status": "error",
+                            "message": f"Invalid item {entry!r}: item_name, unit and a positive quantity are required."})
+            continue
+        try:
+            expires_on = _expiry_date(fields.get("expires_on"), fields.get("expires_in_days"))
+        except ValueError:
+            invalid.append({"entries": [position], "status": "error",
+                            "message": f"Invalid item {entry!r}: expires_on must be a date (YYYY-MM-DD), expires_in_days a number of days."})
+            continue
+        key = store.item_key(item_name, unit)
+        if key in merged:
+            first_name, total, first_unit, first_expiry, positions = merged[key]
+            total = round_quantity(total + converter.convert(quantity, unit, first_unit, item_name))
+            merged[key] = (first_name, total, first_unit, store.earliest(first_expiry, expires_on), positions + [position])
+        else:
+            merged[key] = (item_name, quantity, unit, expires_on, [position])
+    return list(merged.values()), invalid
+
+def _bulk_result(verb: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    status = "success" if succeeded == len(results) else "partial" if succeeded else "error"
+    message = f"{verb} {succeeded} of {len(results)} items."
+    if succeeded < len(results):
+        message += f" {len(results) - succeeded} failed; see results."
+    return {"status": status, "results": results, "message": message}
+
+def add_items_bulk(user_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Adds many items to the user's inventory in one call, e.g. a delivery receipt or a pantry import.
+
+    Entries for the same item in compatible units are summed first. The whole batch is applied at once:
+    other requests see the inventory either before or after it, never in between.
+
+    Args:
+        user_id (str): The unique identifier for the user.
+        items (List[Dict[str, Any]]): The items to add, each with 'item_name', 'quantity' and 'unit', and optionally
+                                      'expires_on' (best-before date, 'YYYY-MM-DD') or 'expires_in_days' (days from today).
+                                      Example: [{'item_name': 'flour', 'quantity': 2, 'unit': 'kg'}, {'item_name': 'eggs', 'quantity': 12, 'unit': 'pieces', 'expires_on': '2026-11-02'}]
+
+    Returns:
+        Dict[str, Any]: The overall status ('success', 'partial' or 'error'), one result per distinct item and a summary message.
+                         Each result has the positions of the entries merged into it ('entries'), its status and the add_item_to_inventory message.
+                         Example: {'status': 'success', 'results': [{'entries': [0], 'item_name': 'flour', 'quantity': 2, 'unit': 'kg', 'status': 'success', 'message': '2 kg of flour added to inventory.'}], 'message': 'Added 1 of 1 items.'}
+    """
+    logger.info("Attempting to add %d entries in bulk for user %s", len(items), user_id)
+    merged, results = _merge_batch(items)
+    applied = inventory_store.add_many(user_id, [(item_name, quantity, unit, expires_on)
+                                                 for item_name, quantity, unit, expires_on, _ in merged])
+    for (item_name, quantity, unit, _, positions), (item, created) in zip(merged, applied):
+        result = addition_result(user_id, item_name, quantity, unit, item, created)
+        results.append({"entries": positions, "item_name": item_name, "quantity": quantity, "unit": unit, **result})
+    results.sort(key=lambda result: result["entries"][0])
+    return _bulk_result("Added", results)
+
+def remove_items_bulk(user_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Removes many items from the user's inventory in one call, e.g. everything a recipe used.
+
+    Entries for the same item in compatible units are summed first. The whole batch is applied at once,
+    and each item succeeds or fails on its own exactly as with remove_item_from_inventory:
+    an item that is missing or short is reported and left unchanged, the others are still removed.
+
+    Args:
+        user_id (str): The unique identifier for the user.
+        items (List[Dict[str, Any]]): The items to remove, each with 'item_name', 'quantity' and 'unit'.
+                                      Example: [{'item_name': 'flour', 'quantity': 0.5, 'unit': 'kg'}, {'item_name': 'eggs', 'quantity': 2, 'unit': 'pieces'}]
+
+    Returns:
+        Dict[str, Any]: The overall status ('success', 'partial' or 'error'), one result per distinct item and a summary message.
+                         Example: {'status': 'partial', 'results': [{'entries': [0], 'item_name': 'flour', 'quantity': 0.5, 'unit': 'kg', 'status': 'success', 'message': 'Removed 0.5 kg of flour. Remaining: 1.0 kg.'}, {'entries': [1], 'item_name': 'eggs', 'quantity': 2, 'unit': 'pieces', 'status': 'error', 'message': 'Item eggs (pieces) not found in inventory.'}], 'message': 'Removed 1 of 2 items. 1 failed; see results.'}
+    """
+    logger.info("Attempting to remove %d entries in bulk for user %s", len(items), user_id)
+    merged, results = _merge_batch(items)
+    applied = inventory_store.remove_many(user_id, [(item_name, quantity, unit) for item_name, quantity, unit, _, _ in merged])
+    for (item_name, quantity, unit, _, positions), (outcome, item) in zip(merged, applied):
+        result = removal_result(user_id, item_name, quantity, unit, outcome, item)
+        results.append({"entries": positions, "item_name": item_name, "quantity": quantity, "unit": unit, **result})
+    results.sort(key=lambda result: result["entries"][0])
+    return _bulk_result("Removed", results)
 
 def check_item_in_inventory(user_id: str, item_name: str) -> Dict[str, Any]:
     """Checks if an item exists in the user's inventory and returns its details.
+    A plural, synonym, branded variant or misspelling of a stored name finds that item
+    ("tomatoes" finds "Tomato", "scallions" finds "green onions").
 
     Args:
         user_id (str): The unique identifier for the user.
@@ -116,17 +242,17 @@ def check_item_in_inventory(user_id: str, item_name: str) -> Dict[str, Any]:
                          Example (found): {'status': 'found', 'item': {'item_name': 'flour', 'quantity': 1.5, 'unit': 'kg'}, 'message': 'flour is in your inventory.'}
                          Example (not found): {'status': 'not_found', 'message': 'salt not found in inventory.'}
     """
-    logger.info(f"Checking for item {item_name} for user {user_id}")
-    if user_id not in mock_inventory_db:
-        logger.warning(f"Inventory not found for user {user_id}")
+    logger.info("Checking for item %s for user %s", item_name, user_id)
+    if not inventory_store.has_user(user_id):
+        logger.warning("Inventory not found for user %s", user_id)
         return {"status": "not_found", "message": "Inventory not found for this user."}
 
-    for item in mock_inventory_db[user_id]:
-        if item["item_name"].lower() == item_name.lower():
-            logger.info(f"Item {item_name} found: {item}")
-            return {"status": "found", "item": item, "message": f"{item['item_name']} ({item['quantity']} {item['unit']}) is in your inventory."}
-    
-    logger.info(f"Item {item_name} not found for user {user_id}")
+    item = inventory_store.find_by_name(user_id, item_name)
+    if item is not None:
+        logger.info("Item %s found: %s", item_name, Payload(item))
+        return {"status": "found", "item": item, "message": f"{item['item_name']} ({item['quantity']} {item['unit']}) is in your inventory."}
+
+    logger.info("Item %s not found for user %s", item_name, user_id)
     return {"status": "not_found", "message": f"{item_name} not found in inventory."}
 
 def list_inventory_items(user_id: str) -> Dict[str, Any]:
@@ -140,15 +266,53 @@ def list_inventory_items(user_id: str) -> Dict[str, Any]:
                          Example: {'status': 'success', 'inventory': [{'item_name': 'flour', 'quantity': 1.5, 'unit': 'kg'}], 'message': 'Here are your inventory items.'}
                          Example (empty): {'status': 'empty', 'inventory': [], 'message': 'Your inventory is currently empty.'}
     """
-    logger.info(f"Listing inventory for user {user_id}")
-    if user_id not in mock_inventory_db or not mock_inventory_db[user_id]:
-        logger.warning(f"Inventory is empty or not found for user {user_id}")
+    logger.info("Listing inventory for user %s", user_id)
+    current_inventory = inventory_store.list_items(user_id)
+    if not current_inventory:
+        logger.warning("Inventory is empty or not found for user %s", user_id)
         return {"status": "empty", "inventory": [], "message": "Your inventory is currently empty."}
-    
-    current_inventory = mock_inventory_db[user_id]
-    logger.info(f"Inventory for user {user_id}: {current_inventory}")
+
+    logger.info("Inventory for user %s (%d items): %s", user_id, len(current_inventory), Payload(current_inventory))
     return {"status": "success", "inventory": current_inventory, "message": "Here are your current inventory items."}
 
+def _days_left_text(days_left: int) -> str:
+    if days_left < 0:
+        return f"expired {-days_left} day{'s' if days_left < -1 else ''} ago"
+    if days_left == 0:
+        return "expires today"
+    return f"in {days_left} day{'s' if days_left > 1 else ''}"
+
+def get_expiring_items(user_id: str, within_days: int = 3) -> Dict[str, Any]:
+    """Lists the items in the user's inventory that expire within the next `within_days` days, soonest first.
+
+    Only items with a best-before date ('expires_on') are considered. Items already past their
+    date are included too, with a negative 'days_left'. Use this to suggest recipes that use
+    these items up before they go bad.
+
+    Args:
+        user_id (str): The unique identifier for the user.
+        within_days (int): How many days ahead to look; 0 means today only. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the status, the expiring items (each with 'expires_on' and 'days_left') and a message.
+                         Example: {'status': 'success', 'items': [{'item_name': 'milk', 'quantity': 1, 'unit': 'liter', 'expires_on': '2026-10-18', 'days_left': 1}], 'message': '1 item expires within 3 days: milk (in 1 day).'}
+                         Example (none): {'status': 'empty', 'items': [], 'message': 'Nothing in your inventory expires within 3 days.'}
+    """
+    logger.info("Listing items expiring within %s days for user %s", within_days, user_id)
+    if isinstance(within_days, bool) or not isinstance(within_days, (int, float)) or within_days < 0:
+        return {"status": "error", "items": [], "message": f"Invalid within_days {within_days!r}; use a number of days, 0 or more."}
+    today = date.today()
+    items = inventory_store.expiring(user_id, (today + timedelta(days=int(within_days))).isoformat())
+    if not items:
+        return {"status": "empty", "items": [], "message": f"Nothing in your inventory expires within {int(within_days)} days."}
+
+    for item in items:
+        item["days_left"] = (date.fromisoformat(item["expires_on"]) - today).days
+    summary = ", ".join(f"{item['item_name']} ({_days_left_text(item['days_left'])})" for item in items)
+    logger.info("%d items expiring for user %s: %s", len(items), user_id, Payload(items))
+    verb = "item expires" if len(items) == 1 else "items expire"
+    return {"status": "success", "items": items, "message": f"{len(items)} {verb} within {int(within_days)} days: {summary}."}
+
 # Example usage (for testing purposes)
 if __name__ == "__main__":
     print("--- Testing Inventory Tools ---")
@@ -194,4 +358,46 @@ if __name__ == "__main__":
     print(remove_item_from_inventory("user_default", "butter", 100, "grams")) # Remove all butter
     print("List after removal (user_default):")
     print(list_inventory_items("user_default"))
+
+    print("\n--- Testing bulk operations (test_user) ---")
+    print(add_items_bulk(test_user, [
+        {"item_name": "rice", "quantity": 1, "unit": "kg"},
+        {"item_name": "tomatoes", "quantity": 6, "unit": "pieces"},
+        {"item_name": "Rice", "quantity": 0.5, "unit": "kg"}, # Merged with the first entry
+        {"item_name": "salt", "quantity": 0, "unit": "grams"}, # Invalid
+    ]))
+    print(remove_items_bulk(test_user, [
+        {"item_name": "rice", "quantity": 0.5, "unit": "kg"},
+        {"item_name": "tomatoes", "quantity": 10, "unit": "pieces"}, # Insufficient
+        {"item_name": "flour", "quantity": 1.5, "unit": "kg"}, # Used up
+    ]))
+    print(list_inventory_items(test_user))
+
+    print("\n--- Testing expiry dates (test_user) ---")
+    today = date.today()
+    print(add_item_to_inventory(test_user, "yogurt", 2, "pots", (today + timedelta(days=1)).isoformat()))
+    print(add_item_to_inventory(test_user, "spinach", 1, "bag", (today - timedelta(days=1)).isoformat())) # Already expired
+    print(add_item_to_inventory(test_user, "cheese", 200, "grams", (today + timedelta(days=20)).isoformat()))
+    print(add_item_to_inventory(test_user, "yogurt", 2, "pots", (today + timedelta(days=5)).isoformat())) # Keeps the earlier date
+    print(add_item_to_inventory(test_user, "cream", 1, "carton", "next week")) # Invalid date
+    print(get_expiring_items(test_user, 3)) # spinach, then yogurt
+    print(remove_item_from_inventory(test_user, "spinach", 1, "bag")) # Used up: drops out of the index
+    print(get_expiring_items(test_user, 3))
+    print(get_expiring_items(test_user, 0))
+
+    print("\n--- Testing unit conversion (test_user) ---")
+    print(add_item_to_inventory(test_user, "sugar", 500, "g")) # Converted into the stored kg
+    print(remove_item_from_inventory(test_user, "sugar", 250, "grams"))
+    print(add_item_to_inventory(test_user, "soy sauce", 100, "ml"))
+    print(remove_item_from_inventory(test_user, "soy sauce", 3, "tbsp")) # Volume to volume
+    print(add_item_to_inventory(test_user, "soy sauce", 60, "grams")) # Mass to volume, by density
+    print(remove_item_from_inventory(test_user, "rice", 2, "pieces")) # Incompatible: a different item
+
+    print("\n--- Testing loose name lookups (test_user) ---")
+    print(add_item_to_inventory(test_user, "scallions", 1, "bunch"))
+    print(check_item_in_inventory(test_user, "tomato")) # Singular of the stored "tomatoes"
+    print(check_item_in_inventory(test_user, "green onion")) # Synonym
+    print(check_item_in_inventory(test_user, "Kikkoman soy sauce")) # Brand
+    print(check_item_in_inventory(test_user, "yoghurt")) # Typo
+    print(check_item_in_inventory(test_user, "tomato paste")) # A different ingredient
     print("--- End of Inventory Tools Test ---")
@@ -10,10 +10,20 @@ from google.adk.sessions.state import State
 from google.adk.tools import ToolContext
 
 from ..shared_libraries import constants
+from ..shared_libraries.log_pipeline import Payload
 from ..shared_libraries.types import UserProfile, Ingredient
+from ..shared_libraries.session_store import MISSING
 
 logger = logging.getLogger(__name__)
 
+def _recall(key: str, context: Union[ToolContext, CallbackContext]) -> Any:
+    """
+    Reads a key from the session state. Returns MISSING if the key was never stored.
+    Persisted values are already in the state: PersistentSessionService loads them when it fetches the session.
+    """
+    session_state = context.state
+    return session_state[key] if key in session_state else MISSING
+
 def memorize(key: str, value: str, tool_context: ToolContext) -> Dict[str, str]:
     """
     Memorize a piece of information as a key-value pair in the session state.
@@ -34,7 +44,7 @@ def memorize(key: str, value: str, tool_context: ToolContext) -> Dict[str, str]:
         pass
 
     session_state[key] = processed_value
-    logger.info(f"Memorized '{key}': type='{type(processed_value)}', value (potentially truncated)='{str(processed_value)[:100]}'")
+    logger.info("Memorized '%s': type='%s', value='%s'", key, type(processed_value).__name__, Payload(processed_value, 100))
     return {"status": f"Successfully memorized '{key}'."}
 
 
@@ -53,15 +63,17 @@ def memorize_list_item(key: str, item: str, tool_context: ToolContext) -> Dict[s
     except (json.JSONDecodeError, TypeError):
         pass # Store as plain string
 
-    if key not in session_state or not isinstance(session_state[key], list):
-        session_state[key] = []
+    current_list = _recall(key, tool_context)
+    if not isinstance(current_list, list):
+        current_list = []
 
-    if processed_item not in session_state[key]:
-        session_state[key].append(processed_item)
-        logger.info(f"Added item to list '{key}': type='{type(processed_item)}', item (truncated)='{str(processed_item)[:100]}'")
+    if processed_item not in current_list:
+        # Assign a new list (rather than appending in place) so the change is recorded as a state delta
+        session_state[key] = current_list + [processed_item]
+        logger.info("Added item to list '%s': type='%s', item='%s'", key, type(processed_item).__name__, Payload(processed_item, 100))
         return {"status": f"Successfully added item to list '{key}'."}
     else:
-        logger.info(f"Item '{str(processed_item)[:100]}' already exists in list '{key}'. Not adding.")
+        logger.info("Item '%s' already exists in list '%s'. Not adding.", Payload(processed_item, 100), key)
         return {"status": f"Item already exists in list '{key}'."}
 
 
@@ -78,16 +90,19 @@ def forget_list_item(key: str, item: str, tool_context: ToolContext) -> Dict[str
     except (json.JSONDecodeError, TypeError):
         pass # Treat as plain string
 
-    if key in session_state and isinstance(session_state[key], list):
-        if processed_item in session_state[key]:
-            session_state[key].remove(processed_item)
-            logger.info(f"Removed item from list '{key}': type='{type(processed_item)}', item (truncated)='{str(processed_item)[:100]}'")
+    current_list = _recall(key, tool_context)
+    if isinstance(current_list, list):
+        if processed_item in current_list:
+            updated_list = list(current_list)
+            updated_list.remove(processed_item)
+            session_state[key] = updated_list # Assigned so the removal is recorded as a state delta
+            logger.info("Removed item from list '%s': type='%s', item='%s'", key, type(processed_item).__name__, Payload(processed_item, 100))
             return {"status": f"Successfully removed item from list '{key}'."}
         else:
-            logger.info(f"Item '{str(processed_item)[:100]}' not found in list '{key}'.")
+            logger.info("Item '%s' not found in list '%s'.", Payload(processed_item, 100), key)
             return {"status": f"Item not found in list '{key}'."}
     else:
-        logger.info(f"List '{key}' not found or is not a list.")
+        logger.info("List '%s' not found or is not a list.", key)
         return {"status": f"List '{key}' not found or is not a list."}
 
 
@@ -97,26 +112,25 @@ def get_memory(key: str, tool_context: ToolContext) -> Dict[str, Any]: # Return
     Complex objects (dicts, lists, UserProfile) are returned as string representations.
     Simple types (str, int, float, bool, None) are returned as is.
     """
-    session_state = tool_context.state
-    if key in session_state:
-        value = session_state[key]
-        logger.info(f"Retrieved '{key}': type='{type(value)}' from session state.")
+    value = _recall(key, tool_context)
+    if value is not MISSING:
+        logger.info("Retrieved '%s': type='%s' from session state.", key, type(value).__name__)
 
         # Check if the value is a complex type (dict, list) or UserProfile that needs JSON serialization
         if isinstance(value, (TypingDict, List, UserProfile)):
             try:
                 json_value = json.dumps(value, default=lambda o: o.__dict__ if hasattr(o, '__dict__') else str(o))
-                logger.info(f"Returning '{key}' as string representation: {json_value[:100]}...")
+                logger.info("Returning '%s' as string representation: %s", key, Payload(json_value, 100))
                 return {key: json_value}
             except (TypeError, OverflowError) as e:
                 logger.error(f"Error serializing value for key '{key}' to JSON: {e}. Returning as string.")
                 return {key: str(value), "error": "Failed to serialize value to its string representation."}
         else:
             # For simple types (str, int, float, bool, None), return as is
-            logger.info(f"Returning '{key}' as simple type: {value}")
+            logger.info("Returning '%s' as simple type: %s", key, Payload(value, 100))
             return {key: value}
     else:
-        logger.info(f"Key '{key}' not found in memory.")
+        logger.info("Key '%s' not found in memory.", key)
         return {key: None, "status": f"Key '{key}' not found."}
 
 
@@ -129,7 +143,8 @@ async def initialize_session_state(callback_context: CallbackContext) -> None:
     session_state = callback_context.state
 
     # Initialize UserProfile with inventory
-    if not session_state.get(constants.USER_PROFILE_KEY):
+    existing_profile = _recall(constants.USER_PROFILE_KEY, callback_context) # May have been restored from the persistent store
+    if existing_profile is MISSING or not existing_profile:
         logger.info(f"'{constants.USER_PROFILE_KEY}' not found in session. Initializing with default.")
 
         default_inventory = [
@@ -154,10 +169,11 @@ async def initialize_session_state(callback_context: CallbackContext) -> None:
         )
         session_state[constants.USER_PROFILE_KEY] = default_user_profile
         logger.info(f"Default UserProfile object stored under key '{constants.USER_PROFILE_KEY}'.")
-        logger.debug(f"Default UserProfile content: {default_user_profile.model_dump_json(indent=2)}")
+        logger.debug("Default UserProfile content: %s", Payload(default_user_profile))
 
     # Initialize Chat History
-    if not session_state.get(constants.CHAT_HISTORY_KEY):
+    existing_history = _recall(constants.CHAT_HISTORY_KEY, callback_context)
+    if existing_history is MISSING or not existing_history:
         session_state[constants.CHAT_HISTORY_KEY] = []
         logger.info(f"Initialized empty chat history under key '{constants.CHAT_HISTORY_KEY}'.")
     